@@ -13,10 +13,582 @@ Given: An integer k and a string Text.
 Return: Compositionk(Text) (the k-mers can be provided in any order).
 """
 import glob
+import heapq
+import itertools
+import math
+import mmap
+import os
 import sys
+import tempfile
+from array import array
+from collections import Counter, deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the vectorized modes
+    np = None
 
-def Composition(k, text): #Composition function, gets all kmers in lexicographic order
+
+BASES = "ACGT" # 2-bit code of each base is its index, so A<C<G<T keeps lexicographic order
+PACK_TABLE = [4] * 256 # byte -> 2-bit code, 4 breaks the window (N, IUPAC...), 5 is skipped
+for code, base in enumerate(BASES):
+    PACK_TABLE[ord(base)] = code
+    PACK_TABLE[ord(base.lower())] = code
+for space in b" \t\r\n":
+    PACK_TABLE[space] = 5
+
+
+def encode_kmer(kmer): #Packs a DNA string into an integer, 2 bits per base
+    code = 0
+    for base in kmer:
+        code = (code << 2) | BASES.index(base)
+    return code
+
+
+def decode_kmer(code, k): #Unpacks a 2-bit integer back to its k-mer string
+    kmer = []
+    for _ in range(k):
+        kmer.append(BASES[code & 3])
+        code >>= 2
+    return "".join(reversed(kmer))
+
+
+MASK64 = (1 << 64) - 1
+
+
+def reverse_complement_word(word): #Reverse complement of 32 packed bases (a full 64 bit word)
+    word = ~word & MASK64 # complement: A(00)<->T(11) and C(01)<->G(10) is a bitwise NOT
+    word = ((word >> 2) & 0x3333333333333333) | ((word & 0x3333333333333333) << 2) # swap bases in pairs
+    word = ((word >> 4) & 0x0F0F0F0F0F0F0F0F) | ((word & 0x0F0F0F0F0F0F0F0F) << 4) # swap pairs in nibbles
+    word = ((word >> 8) & 0x00FF00FF00FF00FF) | ((word & 0x00FF00FF00FF00FF) << 8) # swap bytes
+    word = ((word >> 16) & 0x0000FFFF0000FFFF) | ((word & 0x0000FFFF0000FFFF) << 16)
+    return (word >> 32) | ((word & 0xFFFFFFFF) << 32)
+
+
+def reverse_complement_packed(code, k):
+    """
+    Reverse complement of a packed k-mer using bit operations only (no decoding).
+    Works on Python ints and on uint64 NumPy arrays (k <= 32), for k > 32 the code is handled in 64 bit words.
+    """
+    words = (k + 31) // 32
+    if words == 1:
+        return reverse_complement_word(code) >> (64 - 2 * k)
+    reverse = 0
+    for _ in range(words): # the lowest word (last bases) becomes the highest one of the reverse complement
+        reverse = (reverse << 64) | reverse_complement_word(code & MASK64)
+        code >>= 64
+    return reverse >> (64 * words - 2 * k) # drop the complement of the zero padding
+
+
+def canonical_kmer(code, k): #Smallest of a packed k-mer and its reverse complement
+    reverse = reverse_complement_packed(code, k)
+    if np is not None and isinstance(code, np.ndarray):
+        return np.minimum(code, reverse)
+    return min(code, reverse)
+
+
+def packed_kmers(k, source):
+    """
+    Streaming k-mer engine, yields the 2-bit packed code of every k-mer of source in order of appearance.
+    source can be a str/bytes sequence or any iterable of str/bytes chunks (an open file, a generator...),
+    chunks are consumed one at a time and the window is kept as a rolling integer updated in O(1) per base,
+    so memory does not depend on the input length. Whitespace is skipped and any non ACGT symbol restarts
+    the window. For k <= 32 every code fits in an unsigned 64 bit integer.
+    """
+    if k < 1:
+        raise ValueError(f"k must be a positive integer, got {k}")
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        source = (source,)
+    mask = (1 << (2 * k)) - 1 # keeps only the last k bases of the window
+    code = 0
+    filled = 0 # number of valid bases currently in the window
+    for chunk in source:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii", "replace")
+        for byte in chunk:
+            bits = PACK_TABLE[byte]
+            if bits < 4:
+                code = ((code << 2) | bits) & mask # shift the new base in, the oldest falls out of the mask
+                filled += 1
+                if filled >= k:
+                    yield code
+            elif bits == 4:
+                code = 0
+                filled = 0
+
+
+def chain_records(records): #Chains records into one chunk stream for packed_kmers, no k-mer spans two records
+    for record in records:
+        yield record
+        yield b"N" # breaks the rolling window between records
+
+
+def encode_sequence_array(text):
+    """
+    Vectorized encoding of a whole sequence into a NumPy array of 2-bit codes (uint8).
+    Whitespace is dropped, any other non ACGT symbol is kept with code 4 so windows over it can be rejected.
+    """
+    if np is None:
+        raise ImportError("numpy is required for the vectorized k-mer modes")
+    if isinstance(text, str):
+        text = text.encode("ascii", "replace")
+    codes = np.asarray(PACK_TABLE, dtype=np.uint8)[np.frombuffer(text, dtype=np.uint8)]
+    return codes[codes != 5]
+
+
+def packed_kmer_array(k, text):
+    """
+    Vectorized sliding window, returns a uint64 array with the packed code of every valid k-mer of text
+    (k <= 32). The window is built with k shift/or passes over the whole array instead of one slice per k-mer.
+    """
+    if not 1 <= k <= 32:
+        raise ValueError(f"the vectorized k-mer modes need 1 <= k <= 32, got {k}")
+    return kmer_array_from_bases(k, encode_sequence_array(text))
+
+
+def kmer_array_from_bases(k, bases): #Sliding window over an already encoded array (see encode_sequence_array)
+    n_windows = len(bases) - k + 1
+    if n_windows <= 0:
+        return np.empty(0, dtype=np.uint64)
+    invalid = np.concatenate(([0], np.cumsum(bases == 4))) # prefix count of non ACGT symbols
+    valid = invalid[k:] == invalid[:n_windows] # windows without any non ACGT symbol
+    bits = (bases & 3).astype(np.uint64)
+    codes = np.zeros(n_windows, dtype=np.uint64)
+    for j in range(k): # one pass per position inside the window
+        codes <<= np.uint64(2)
+        codes |= bits[j:j + n_windows]
+    return codes[valid]
+
+
+def sort_kmers(codes, k):
+    """
+    Sorts packed k-mer codes, for 2-bit codes integer order is lexicographic order (A<C<G<T).
+    NumPy arrays are sorted with np.sort, any other iterable of codes is copied into a uint64 array, sorted the
+    same way and comes back as a list of ints. Without NumPy, or for k > 32, plain sorted() is used.
+    An LSD radix sort on the 2-bit digits was measured 4 to 7x slower than both (one argsort and one gather per
+    pass in NumPy), so this is a plain sort.
+    """
+    if np is not None and isinstance(codes, np.ndarray):
+        return np.sort(codes.astype(np.uint64, copy=False))
+    if np is None or k > 32:
+        return sorted(codes)
+    if not isinstance(codes, (list, tuple, set, frozenset, dict)):
+        codes = list(codes) # np.fromiter needs the length up front to avoid regrowing
+    return np.sort(np.fromiter(codes, dtype=np.uint64, count=len(codes))).tolist()
+
+
+def decode_kmer_block(codes, k): #Vectorized decode_kmer over a uint64 array, returns a list of k-mer strings
+    shifts = (2 * np.arange(k - 1, -1, -1)).astype(np.uint64) # first base sits in the highest bits
+    symbols = ((codes[:, None] >> shifts) & np.uint64(3)).astype(np.uint8) # one row of 2-bit codes per k-mer
+    letters = np.frombuffer(BASES.encode(), dtype=np.uint8).take(symbols) # lookup table code -> ASCII
+    return [kmer.decode() for kmer in letters.view(f"S{k}").ravel().tolist()] # one bytes object per row
+
+
+def iter_decoded_kmers(codes, k, block_size=1 << 16): #Lazy decoding, k-mer strings are created one block at a time while writing
+    if np is None or k > 32: # no vectorized path, plain integer arithmetic per k-mer
+        for code in codes:
+            yield decode_kmer(int(code), k)
+        return
+    if isinstance(codes, np.ndarray):
+        for start in range(0, len(codes), block_size):
+            yield from decode_kmer_block(codes[start:start + block_size], k)
+        return
+    codes = iter(codes) # generators (parallel / out-of-core counts) are cut in blocks
+    while len(block := np.fromiter(itertools.islice(codes, block_size), dtype=np.uint64)):
+        yield from decode_kmer_block(block, k)
+
+
+def CompositionCounts(k, text, canonical=False): #Counting mode, keeps the multiplicity of every k-mer
+    """
+    Returns two aligned NumPy arrays (kmers, counts) sorted in lexicographic order, kmers holds the 2-bit
+    packed codes (see decode_kmer) and counts how many times each one appears in text.
+    With canonical=True a k-mer and its reverse complement are counted together under the smallest of both.
+    """
+    codes = packed_kmer_array(k, text)
+    if canonical:
+        codes = canonical_kmer(codes, k)
+    codes = sort_kmers(codes, k)
+    if len(codes) == 0:
+        return codes, np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1]))) # first position of each run
+    counts = np.diff(np.append(starts, len(codes)))
+    return codes[starts], counts
+
+
+BYTES_PER_COUNTED_KMER = 100 # rough cost of one int -> int entry of a Python dict counter
+MAX_SUPER_KMER = 4096 # longest super-k-mer kept in memory, low complexity runs (AAAA...) are cut there
+RUN_BLOCK = 1 << 16 # (kmer, count) pairs read at once from a sorted run file
+
+
+def minimizer_hash(code): #Invertible multiplicative hash, spreads minimizers evenly over the buckets
+    return (code * 0x9E3779B97F4A7C15) & MASK64
+
+
+def super_kmers(k, m, source):
+    """
+    Splits source into super-k-mers, maximal runs of consecutive k-mers that share the same minimizer (the m-mer
+    with the smallest hash inside the k-mer). Yields (minimizer, super_kmer) pairs, super_kmer being the bytes of
+    the run. The window minimum is kept with a monotonic deque, so the split is linear in the input length.
+    """
+    if not 1 <= m <= k:
+        raise ValueError(f"the minimizer length must satisfy 1 <= m <= k, got m={m} k={k}")
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        source = (source,)
+    m_mask = (1 << (2 * m)) - 1
+    m_code = 0
+    filled = 0 # valid bases since the last window break
+    window = deque() # (hash, end position) of the candidate m-mers, hashes increasing from the front
+    run = bytearray() # bases of the current super-k-mer
+    run_minimizer = None
+    for chunk in source:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii", "replace")
+        for byte in chunk:
+            bits = PACK_TABLE[byte]
+            if bits == 5:
+                continue
+            if bits == 4: # non ACGT symbol, no k-mer crosses it
+                if run_minimizer is not None:
+                    yield run_minimizer, bytes(run)
+                m_code, filled, run_minimizer = 0, 0, None
+                window.clear()
+                run.clear()
+                continue
+            m_code = ((m_code << 2) | bits) & m_mask
+            run.append(ord(BASES[bits]))
+            filled += 1
+            if filled >= m:
+                m_hash = minimizer_hash(m_code)
+                while window and window[-1][0] > m_hash:
+                    window.pop()
+                window.append((m_hash, filled))
+            if filled < k:
+                continue
+            while window[0][1] < filled - k + m: # m-mer no longer inside the current k-mer
+                window.popleft()
+            minimizer = window[0][0]
+            if run_minimizer is None:
+                run_minimizer = minimizer
+            elif minimizer != run_minimizer or len(run) > MAX_SUPER_KMER:
+                yield run_minimizer, bytes(run[:-1]) # the previous k-mers, without the new base
+                del run[:-k] # the new super-k-mer starts with the current k-mer
+                run_minimizer = minimizer
+    if run_minimizer is not None:
+        yield run_minimizer, bytes(run)
+
+
+def write_sorted_run(file_path, counts, k): #Stores a bucket's counts as sorted (kmer, count) uint64 pairs
+    pairs = array("Q")
+    for code in sort_kmers(counts, k):
+        pairs.append(code)
+        pairs.append(counts[code])
+    with open(file_path, "wb") as run_file:
+        pairs.tofile(run_file)
+
+
+def read_sorted_run(file_path): #Streams the (kmer, count) pairs of a run file, RUN_BLOCK pairs at a time
+    with open(file_path, "rb") as run_file:
+        while True:
+            pairs = array("Q")
+            try:
+                pairs.fromfile(run_file, 2 * RUN_BLOCK)
+            except EOFError: # last, partial block
+                pass
+            for i in range(0, len(pairs), 2):
+                yield pairs[i], pairs[i + 1]
+            if len(pairs) < 2 * RUN_BLOCK:
+                return
+
+
+def count_bucket(bucket_path, k, max_kmers, canonical, run_paths):
+    """
+    Counts the k-mers of one bucket file into sorted run files. A bucket whose k-mers could exceed the memory
+    budget (one k-mer per base at most) is first split again by k-mer hash into binary sub-buckets.
+    """
+    def bucket_codes(): # k-mers of the bucket, super-k-mers are counted line by line so they never join
+        with open(bucket_path, "rb") as bucket:
+            for line in bucket:
+                for code in packed_kmers(k, line):
+                    yield canonical_kmer(code, k) if canonical else code
+
+    n_parts = -(-os.path.getsize(bucket_path) // max_kmers)
+    if n_parts <= 1:
+        run_paths.append(f"{bucket_path}.run")
+        write_sorted_run(run_paths[-1], Counter(bucket_codes()), k)
+        return
+    part_paths = [f"{bucket_path}.{part}" for part in range(n_parts)]
+    part_files = [open(path, "wb") for path in part_paths]
+    part_buffers = [array("Q") for _ in range(n_parts)] # codes are written in blocks, not one by one
+    try:
+        for code in bucket_codes():
+            part = minimizer_hash(code ^ 0x5555555555555555) % n_parts
+            part_buffers[part].append(code)
+            if len(part_buffers[part]) >= RUN_BLOCK:
+                part_buffers[part].tofile(part_files[part])
+                part_buffers[part] = array("Q")
+        for part_buffer, part_file in zip(part_buffers, part_files):
+            part_buffer.tofile(part_file)
+    finally:
+        for part_file in part_files:
+            part_file.close()
+    del part_buffers
+    for path in part_paths:
+        codes = array("Q")
+        with open(path, "rb") as part_file:
+            codes.frombytes(part_file.read())
+        os.remove(path)
+        run_paths.append(f"{path}.run")
+        write_sorted_run(run_paths[-1], Counter(codes), k)
+        del codes
+
+
+def count_kmers_out_of_core(k, source, m=None, memory_budget=256 * 2**20, n_buckets=64, tmp_dir=None, canonical=False):
+    """
+    Disk-backed k-mer counting (k <= 32). The input is split into super-k-mers that are written to n_buckets
+    temporary bucket files according to their minimizer, so every k-mer always lands in the same bucket. Each
+    bucket is then counted on its own within memory_budget bytes and kept as a sorted run file, and the runs are
+    merged lazily. Yields (kmer, count) pairs in lexicographic order, kmer being the 2-bit packed code.
+    Temporary files live under tmp_dir (system default if None) and are removed once the iteration ends.
+    """
+    if not 1 <= k <= 32:
+        raise ValueError(f"the out-of-core mode needs 1 <= k <= 32, got {k}")
+    if m is None:
+        m = min(k, 11)
+    max_kmers = max(1, memory_budget // BYTES_PER_COUNTED_KMER)
+    with tempfile.TemporaryDirectory(prefix="kmer_buckets_", dir=tmp_dir) as bucket_dir:
+        bucket_paths = [os.path.join(bucket_dir, f"bucket_{i}") for i in range(n_buckets)]
+        buckets = [open(path, "wb") for path in bucket_paths]
+        try:
+            for minimizer, super_kmer in super_kmers(k, m, source):
+                bucket = buckets[minimizer % n_buckets]
+                bucket.write(super_kmer)
+                bucket.write(b"\n")
+        finally:
+            for bucket in buckets:
+                bucket.close()
+        run_paths = []
+        for path in bucket_paths:
+            count_bucket(path, k, max_kmers, canonical, run_paths)
+            os.remove(path)
+        # runs hold disjoint k-mers except in canonical mode (both strands may sit in different buckets)
+        merged = heapq.merge(*(read_sorted_run(path) for path in run_paths))
+        last_code, last_count = None, 0
+        for code, count in merged:
+            if code == last_code:
+                last_count += count
+                continue
+            if last_code is not None:
+                yield last_code, last_count
+            last_code, last_count = code, count
+        if last_code is not None:
+            yield last_code, last_count
+
+
+def count_shard(k, shard, canonical, n_partitions):
+    """
+    Worker of the parallel counter, counts one shard (a sequence slice or a group of reads) and returns the table
+    split by k-mer hash into n_partitions packed partial tables, bytes of interleaved (kmer, count) uint64 pairs.
+    """
+    counts = Counter(packed_kmers(k, shard))
+    if canonical:
+        canonical_counts = Counter()
+        for code, count in counts.items():
+            canonical_counts[canonical_kmer(code, k)] += count
+        counts = canonical_counts
+    partitions = [array("Q") for _ in range(n_partitions)]
+    for code, count in counts.items():
+        partitions[minimizer_hash(code) % n_partitions].extend((code, count))
+    return [partition.tobytes() for partition in partitions]
+
+
+def merge_partition(k, partial_tables):
+    """Reduction worker, adds up the partial tables of one hash partition and returns its sorted packed pairs."""
+    counts = Counter()
+    for table in partial_tables:
+        pairs = array("Q", table)
+        for i in range(0, len(pairs), 2):
+            counts[pairs[i]] += pairs[i + 1]
+    merged = array("Q")
+    for code in sort_kmers(counts, k):
+        merged.extend((code, counts[code]))
+    return merged.tobytes()
+
+
+def count_kmers_parallel(k, text, workers=None, canonical=False, shards_per_worker=4):
+    """
+    Process-pool k-mer counter (k <= 32). A single sequence (str/bytes) is cut into shards that overlap by k-1 bases so every
+    k-mer belongs to exactly one shard, a list of reads is cut into groups of reads joined by an N so no k-mer spans
+    two reads. Workers return hash-partitioned packed tables and each partition is reduced by one worker, the sorted
+    partitions are finally merged. Returns the (kmer, count) pairs in lexicographic order, same as the serial count.
+    """
+    if not 1 <= k <= 32:
+        raise ValueError(f"the parallel mode needs 1 <= k <= 32, got {k}")
+    workers = workers or os.cpu_count() or 1
+    n_shards = workers * shards_per_worker
+    if isinstance(text, (str, bytes, bytearray, memoryview)):
+        sequence = text.encode("ascii", "replace") if isinstance(text, str) else bytes(text)
+        sequence = sequence.translate(None, b" \t\r\n") # overlaps are counted in bases
+        step = max(k, -(-len(sequence) // n_shards))
+        shards = [sequence[start:start + step + k - 1] for start in range(0, max(1, len(sequence) - k + 1), step)]
+    else:
+        reads = [read.encode("ascii", "replace") if isinstance(read, str) else bytes(read) for read in text]
+        step = max(1, -(-len(reads) // n_shards))
+        shards = [b"N".join(reads[start:start + step]) for start in range(0, len(reads), step)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tables = list(executor.map(count_shard, [k] * len(shards), shards, [canonical] * len(shards), [workers] * len(shards)))
+        partitions = [[table[part] for table in tables] for part in range(workers)]
+        del tables
+        merged = list(executor.map(merge_partition, [k] * workers, partitions))
+    del partitions
+    sorted_partitions = []
+    for table in merged:
+        pairs = array("Q", table)
+        sorted_partitions.append([(pairs[i], pairs[i + 1]) for i in range(0, len(pairs), 2)])
+    return list(heapq.merge(*sorted_partitions))
+
+
+def packed_kmer_batches(k, source, batch_size=1 << 20):
+    """
+    Yields the packed k-mers of source as uint64 arrays of at most batch_size codes. A str/bytes sequence is encoded
+    once and windowed batch by batch (consecutive batches overlap by k-1 bases), any other streaming source goes
+    through packed_kmers, so memory besides the input itself stays bounded by the batch size.
+    """
+    if not 1 <= k <= 32:
+        raise ValueError(f"the vectorized k-mer modes need 1 <= k <= 32, got {k}")
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        bases = encode_sequence_array(source)
+        for start in range(0, max(1, len(bases) - k + 1), batch_size):
+            yield kmer_array_from_bases(k, bases[start:start + batch_size + k - 1])
+        return
+    kmers = packed_kmers(k, source)
+    while True:
+        batch = np.fromiter(itertools.islice(kmers, batch_size), dtype=np.uint64)
+        if len(batch) == 0:
+            return
+        yield batch
+
+
+class CountMinSketch:
+    """
+    Fixed-size approximate counter over packed k-mers, depth rows of width counters in a NumPy table, one hash per row.
+    Estimates never undercount, and with width = ceil(e / epsilon), depth = ceil(ln(1 / delta)) an estimate exceeds
+    the true count by more than epsilon * N (N being the number of insertions) with probability at most delta.
+    Updates are conservative: only the counters below the new estimate of a k-mer are raised.
+    """
+    def __init__(self, width, depth, seed=0):
+        if width < 1 or depth < 1:
+            raise ValueError(f"width and depth must be positive, got width={width} depth={depth}")
+        if np is None:
+            raise ImportError("numpy is required for the count-min sketch")
+        random_state = np.random.default_rng(seed)
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self.multipliers = random_state.integers(1, 2**63, size=(depth, 1), dtype=np.uint64) | np.uint64(1)
+        self.offsets = random_state.integers(0, 2**63, size=(depth, 1), dtype=np.uint64)
+        self.rows = np.arange(depth)[:, None]
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon, delta, seed=0): #Sizes the sketch for an error of epsilon * N with probability delta
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), seed)
+
+    def columns(self, codes): #(depth, n) counter column of every code in every row
+        hashed = codes[None, :] * self.multipliers + self.offsets # multiply-add modulo 2^64, one pair per row
+        hashed ^= hashed >> np.uint64(31)
+        return (hashed % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, codes):
+        """
+        Inserts a batch of packed k-mers. Repeated codes are grouped first, then every counter of a code is raised to
+        at least (its current estimate + its count). Counters shared by several codes keep the largest request, which
+        still never undercounts.
+        """
+        codes, counts = np.unique(np.asarray(codes, dtype=np.uint64).ravel(), return_counts=True)
+        if len(codes) == 0:
+            return
+        columns = self.columns(codes)
+        target = (self.table[self.rows, columns].min(axis=0) + counts).astype(np.uint32)
+        for row in range(self.depth):
+            np.maximum.at(self.table[row], columns[row], target)
+        self.total += int(counts.sum())
+
+    def estimate(self, codes):
+        """Estimated abundance of a k-mer (str or packed code) or of an array of packed codes."""
+        if isinstance(codes, str):
+            codes = encode_kmer(codes)
+        scalar = np.ndim(codes) == 0
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.uint64))
+        estimates = self.table[self.rows, self.columns(codes)].min(axis=0)
+        return int(estimates[0]) if scalar else estimates
+
+    def abundance_histogram(self, k, text, max_abundance=1000, canonical=False):
+        """
+        k-mer spectrum of text from the sketch: entry c estimates how many distinct k-mers appear c times (the last
+        entry gathers everything above max_abundance). Every occurrence of a k-mer estimated at c adds 1/c to bin c,
+        so c occurrences add up to one distinct k-mer without remembering which k-mers were already seen.
+        Needs a second pass over text and constant memory. k-mers of text estimated at 0 (text differs from what
+        was added) are skipped.
+        """
+        histogram = np.zeros(max_abundance + 1)
+        for batch in packed_kmer_batches(k, text):
+            if canonical:
+                batch = canonical_kmer(batch, k)
+            if len(batch) == 0:
+                continue
+            abundances = self.estimate(batch)
+            abundances = abundances[abundances > 0] # k-mers never added to the sketch have no abundance to count
+            np.add.at(histogram, np.minimum(abundances, max_abundance), 1 / abundances)
+        return np.rint(histogram).astype(np.int64)
+
+
+def CompositionSketch(k, text, width=1 << 20, depth=4, canonical=False): #Approximate mode, constant memory
+    """
+    Approximate k-mer abundances of text in a CountMinSketch of width x depth counters (see CountMinSketch for the
+    error bounds), whatever the input size. Query it with estimate(), get the spectrum with abundance_histogram().
+    """
+    sketch = CountMinSketch(width, depth)
+    for batch in packed_kmer_batches(k, text):
+        sketch.add(canonical_kmer(batch, k) if canonical else batch)
+    return sketch
+
+
+def distinct_kmer_array(k, text, canonical=False):
+    """
+    Sorted uint64 array of the distinct packed k-mers of text (str/bytes or a streaming source, see
+    packed_kmer_batches). Every batch is deduplicated with np.unique as it comes and the sorted per-batch results
+    are merged once at the end, so memory is the distinct codes of every batch (at most one code per k-mer) without
+    a Python set of ints, and the cost stays close to one sort of all the codes.
+    """
+    batches = []
+    for batch in packed_kmer_batches(k, text):
+        if canonical:
+            batch = canonical_kmer(batch, k)
+        batches.append(np.unique(batch))
+    if not batches:
+        return np.empty(0, dtype=np.uint64)
+    if len(batches) == 1:
+        return batches[0]
+    # The batches are sorted runs: the stable sort (timsort for uint64) merges them in O(n log runs)
+    merged = np.sort(np.concatenate(batches), kind="stable")
+    return merged[np.concatenate(([True], merged[1:] != merged[:-1]))]
+
+
+def Composition(k, text, packed=False, canonical=False, memory_budget=None, workers=None): #Composition function, gets all kmers in lexicographic order
+    if workers is not None: # sharded counting over a process pool
+        return iter_decoded_kmers((code for code, _ in count_kmers_parallel(k, text, workers, canonical)), k)
+    if memory_budget is not None: # disk-backed mode for inputs whose k-mers do not fit in memory
+        counts = count_kmers_out_of_core(k, text, memory_budget=memory_budget, canonical=canonical)
+        return iter_decoded_kmers((code for code, _ in counts), k)
+    if (packed or canonical) and np is not None and k <= 32: # vectorized 2-bit engine, 8 bytes per distinct k-mer
+        return iter_decoded_kmers(distinct_kmer_array(k, text, canonical), k) # decoded lazily by the writer
+    if packed or canonical: # 2-bit engine, text can be a streaming source (see packed_kmers)
+        composition_codes = set(packed_kmers(k, text)) # integer keys instead of k-mer strings
+        if canonical: # both strands share one key, min(kmer, reverse complement)
+            composition_codes = {canonical_kmer(code, k) for code in composition_codes}
+        return iter_decoded_kmers(sort_kmers(composition_codes, k), k) # decoded lazily by the writer
     composition_list = {} # dictionary to save kmers
     for i in range(len(text)-k+1): # loop to explore all k-pattern windows and adding in dictionary
         composition_list[text[i:i+k]] = None #Update kmer key with None Value, the only keys are working
@@ -36,6 +608,84 @@ def read_file_txt(file_path):
     except Exception as error:
         print(f"Error while reading file {file_path}: {error}")
 
+def read_sequences_mmap(file_path):
+    """
+    Memory-mapped reader, yields the sequence of every record as a read-only memoryview slice of the file (no copy).
+    FASTA (">" headers, the sequence may be wrapped over several lines and then keeps its line breaks), FASTQ
+    ("@" header, sequence lines, "+" separator, then quality lines until they are as long as the sequence, so
+    wrapped records and quality lines starting with "@" are read correctly) and plain text (one sequence per
+    non empty line) are supported. Malformed or truncated FASTQ records raise ValueError.
+    The mapping is released once no yielded slice is referenced anymore.
+    """
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    size = len(mapped)
+
+    def line_bounds(start): # (start, end) of every line from start on, trailing spaces and \r excluded
+        while start < size:
+            end = mapped.find(b"\n", start)
+            next_start = size if end == -1 else end + 1
+            end = size if end == -1 else end
+            while end > start and mapped[end - 1] in b" \t\r":
+                end -= 1
+            yield start, end
+            start = next_start
+
+    first = 0
+    while first < size and mapped[first] in b" \t\r\n":
+        first += 1
+    if first == size:
+        return
+    match mapped[first:first + 1]:
+        case b">":
+            start = first
+            while start != -1:
+                sequence_start = mapped.find(b"\n", start) + 1 # skip the header line
+                end = mapped.find(b"\n>", start)
+                next_start = -1 if end == -1 else end + 1
+                end = size if end == -1 else end
+                while end > sequence_start and mapped[end - 1] in b" \t\r\n":
+                    end -= 1
+                if sequence_start > 0 and end > sequence_start:
+                    yield view[sequence_start:end]
+                start = next_start
+        case b"@":
+            lines = line_bounds(first)
+            for start, end in lines: # header line of the next record
+                if end == start:
+                    continue
+                if mapped[start:start + 1] != b"@":
+                    raise ValueError(f"{file_path}: FASTQ header expected at byte {start}")
+                record = start
+                sequence_start = sequence_end = None
+                length = 0 # sequence length without the line breaks
+                for start, end in lines: # sequence lines up to the "+" separator
+                    if mapped[start:start + 1] == b"+":
+                        break
+                    if sequence_start is None:
+                        sequence_start = start
+                    sequence_end = end
+                    length += end - start
+                else:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has no '+' line")
+                quality = 0
+                while quality < length: # quality lines until they cover the sequence
+                    bounds = next(lines, None)
+                    if bounds is None:
+                        raise ValueError(f"{file_path}: FASTQ record at byte {record} is truncated")
+                    quality += bounds[1] - bounds[0]
+                if quality != length:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has {quality} quality values for {length} bases")
+                if length:
+                    yield view[sequence_start:sequence_end]
+        case _:
+            for start, end in line_bounds(first):
+                if end > start:
+                    yield view[start:end]
+
 def write_file_txt(file_path, content):
     name_split = file_path.split("/")
     output_name = f"./outputs/{name_split[-1].strip(".txt")}_output.txt"
@@ -54,6 +704,9 @@ def write_file_txt(file_path, content):
             case dict():
                 for key in content:
                     print(str(key), end="\n", file= f)
+            case Iterator(): # lazy outputs are written as they are produced
+                for text in content:
+                    print(str(text), end="\n", file= f)
 
 
 if __name__ == "__main__":
@@ -63,7 +716,8 @@ if __name__ == "__main__":
 
     #MODIFY THIS SECTION FOR EACH FUNCTION
     for input_file in input_files:
-        file_load = read_file_txt(input_file)
-        composition_s = Composition(int(file_load[0].strip()), file_load[1].strip())
+        records = read_sequences_mmap(input_file) # k line, then the text, both read zero-copy
+        k = int(bytes(next(records)))
+        composition_s = Composition(k, chain_records(records), packed=True)
         write_file_txt(input_file, composition_s)
 
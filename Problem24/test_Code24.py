@@ -0,0 +1,193 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from Code24 import (Composition, CompositionCounts, CompositionSketch, CountMinSketch, canonical_kmer,
+                    count_kmers_out_of_core, count_kmers_parallel, decode_kmer, decode_kmer_block, encode_kmer,
+                    iter_decoded_kmers, read_sequences_mmap, reverse_complement_packed, sort_kmers, super_kmers)
+
+
+def random_dna(length, seed=0):
+    generator = random.Random(seed)
+    return "".join(generator.choice("ACGT") for _ in range(length))
+
+
+class SortKmersTest(unittest.TestCase):
+    def test_numpy_array_sorted(self):
+        codes = np.random.default_rng(1).integers(0, 4**21, 5000, dtype=np.uint64)
+        result = sort_kmers(codes, 21)
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.tolist(), sorted(codes.tolist()))
+
+    def test_python_iterables_come_back_as_int_lists(self):
+        codes = {encode_kmer(kmer) for kmer in ("TTT", "AAA", "GCA", "ACG")}
+        result = sort_kmers(codes, 3)
+        self.assertEqual([decode_kmer(code, 3) for code in result], ["AAA", "ACG", "GCA", "TTT"])
+        self.assertTrue(all(type(code) is int for code in result))
+        self.assertEqual(sort_kmers(iter([5, 1, 3]), 2), [1, 3, 5])
+
+    def test_long_kmers_use_python_ints(self):
+        codes = [encode_kmer(random_dna(40, seed)) for seed in range(20)]
+        self.assertEqual(sort_kmers(codes, 40), sorted(codes))
+
+    def test_counts_in_lexicographic_order(self):
+        text = random_dna(2000)
+        kmers, counts = CompositionCounts(6, text)
+        expected = {}
+        for i in range(len(text) - 5):
+            expected[text[i:i + 6]] = expected.get(text[i:i + 6], 0) + 1
+        self.assertEqual([decode_kmer(int(code), 6) for code in kmers], sorted(expected))
+        self.assertEqual(counts.tolist(), [expected[kmer] for kmer in sorted(expected)])
+
+
+class DecodeTest(unittest.TestCase):
+    def test_block_matches_scalar_decode(self):
+        for k in (1, 7, 31, 32):
+            codes = np.random.default_rng(k).integers(0, 4**k, 300, dtype=np.uint64)
+            self.assertEqual(decode_kmer_block(codes, k), [decode_kmer(int(code), k) for code in codes])
+
+    def test_arrays_and_generators_cut_in_blocks(self):
+        codes = np.random.default_rng(2).integers(0, 4**9, 1000, dtype=np.uint64)
+        expected = [decode_kmer(int(code), 9) for code in codes]
+        self.assertEqual(list(iter_decoded_kmers(codes, 9, block_size=64)), expected)
+        self.assertEqual(list(iter_decoded_kmers((int(code) for code in codes), 9, block_size=64)), expected)
+        self.assertEqual(list(iter_decoded_kmers(iter([]), 9)), [])
+
+
+class CanonicalPackingTest(unittest.TestCase):
+    def test_canonical_is_min_of_both_strands(self):
+        for kmer in ("ACGTT", "GGGCA", "TTTTT", "ACGT"):
+            code = encode_kmer(kmer)
+            reverse = reverse_complement_packed(code, len(kmer))
+            self.assertEqual(canonical_kmer(code, len(kmer)), min(code, reverse))
+            self.assertEqual(canonical_kmer(code, len(kmer)), canonical_kmer(reverse, len(kmer)))
+
+    def test_canonical_array_matches_scalar(self):
+        codes = np.random.default_rng(2).integers(0, 4**11, 200, dtype=np.uint64)
+        expected = [canonical_kmer(int(code), 11) for code in codes]
+        self.assertEqual(canonical_kmer(codes, 11).tolist(), expected)
+
+
+class CompositionTest(unittest.TestCase):
+    def test_packed_matches_string_mode(self):
+        text = random_dna(3000, seed=3)
+        self.assertEqual(list(Composition(7, text, packed=True)), Composition(7, text))
+
+    def test_packed_streaming_source(self):
+        text = random_dna(500, seed=4)
+        chunks = (text[i:i + 37] for i in range(0, len(text), 37))
+        self.assertEqual(list(Composition(5, chunks, packed=True)), Composition(5, text))
+
+    def test_canonical_merges_strands(self):
+        text = random_dna(800, seed=5)
+        kmers = Composition(6, text)
+        expected = sorted({min(encode_kmer(kmer), reverse_complement_packed(encode_kmer(kmer), 6)) for kmer in kmers})
+        self.assertEqual(list(Composition(6, text, canonical=True)), [decode_kmer(code, 6) for code in expected])
+
+    def test_long_kmers_fall_back_to_python_codes(self):
+        text = random_dna(300, seed=6)
+        self.assertEqual(list(Composition(40, text, packed=True)), Composition(40, text))
+
+
+class OutOfCoreTest(unittest.TestCase):
+    def test_super_kmers_cover_every_kmer_once(self):
+        text = random_dna(1000, seed=10)
+        kmers = []
+        for _, super_kmer in super_kmers(9, 5, text):
+            run = super_kmer.decode()
+            kmers.extend(run[i:i + 9] for i in range(len(run) - 8))
+        self.assertEqual(kmers, [text[i:i + 9] for i in range(len(text) - 8)])
+
+    def test_counts_match_in_memory_counts(self):
+        text = random_dna(5000, seed=11)
+        kmers, counts = CompositionCounts(8, text)
+        # a budget of 10 k-mers per run forces many sorted runs per bucket
+        pairs = list(count_kmers_out_of_core(8, text, memory_budget=1000, n_buckets=4))
+        self.assertEqual(pairs, list(zip(kmers.tolist(), counts.tolist())))
+
+    def test_canonical_merges_runs(self):
+        text = random_dna(3000, seed=12)
+        kmers, counts = CompositionCounts(7, text, canonical=True)
+        pairs = list(count_kmers_out_of_core(7, text, memory_budget=2000, n_buckets=3, canonical=True))
+        self.assertEqual(pairs, list(zip(kmers.tolist(), counts.tolist())))
+        self.assertEqual(list(Composition(7, text, canonical=True, memory_budget=2000)),
+                         list(Composition(7, text, canonical=True)))
+
+
+class ParallelCountTest(unittest.TestCase):
+    def test_sequence_shards_match_serial_counts(self):
+        text = random_dna(4000, seed=13)
+        kmers, counts = CompositionCounts(6, text)
+        # small shards, so many k-mers sit on a shard boundary
+        self.assertEqual(count_kmers_parallel(6, text, workers=2, shards_per_worker=8),
+                         list(zip(kmers.tolist(), counts.tolist())))
+        self.assertEqual(list(Composition(6, text, workers=2)), Composition(6, text))
+
+    def test_reads_never_join(self):
+        reads = [random_dna(50, seed) for seed in range(20)]
+        expected = {}
+        for read in reads:
+            for i in range(len(read) - 4):
+                expected[encode_kmer(read[i:i + 5])] = expected.get(encode_kmer(read[i:i + 5]), 0) + 1
+        self.assertEqual(count_kmers_parallel(5, reads, workers=2), sorted(expected.items()))
+
+
+class SketchTest(unittest.TestCase):
+    def test_estimates_never_undercount(self):
+        text = random_dna(5000, seed=7)
+        sketch = CompositionSketch(5, text, width=64, depth=3)
+        kmers, counts = CompositionCounts(5, text)
+        self.assertTrue(np.all(sketch.estimate(kmers) >= counts))
+        self.assertEqual(sketch.total, int(counts.sum()))
+
+    def test_exact_when_wide(self):
+        text = random_dna(2000, seed=8)
+        sketch = CompositionSketch(4, text, width=1 << 16, depth=4)
+        kmers, counts = CompositionCounts(4, text)
+        self.assertEqual(sketch.estimate(kmers).tolist(), counts.tolist())
+        self.assertEqual(sketch.estimate(decode_kmer(int(kmers[0]), 4)), int(counts[0]))
+
+    def test_histogram_counts_distinct_kmers(self):
+        text = random_dna(2000, seed=9)
+        sketch = CompositionSketch(6, text, width=1 << 16, depth=4)
+        _, counts = CompositionCounts(6, text)
+        histogram = sketch.abundance_histogram(6, text, max_abundance=10)
+        self.assertEqual(histogram.tolist(), np.bincount(np.minimum(counts, 10), minlength=11).tolist())
+
+    def test_histogram_skips_kmers_never_added(self):
+        sketch = CountMinSketch(1 << 12, 3)
+        sketch.add(np.array([encode_kmer("AAAA")] * 3, dtype=np.uint64))
+        histogram = sketch.abundance_histogram(4, "AAAAAA" + "CGTGTGCGC", max_abundance=5)
+        self.assertEqual(histogram.tolist(), [0, 0, 0, 1, 0, 0])
+
+
+class ReadSequencesTest(unittest.TestCase):
+    def read(self, content):
+        with tempfile.NamedTemporaryFile("wb", suffix=".txt", delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return ["".join(bytes(record).decode().split()) for record in read_sequences_mmap(file.name)]
+
+    def test_fasta_and_plain_text(self):
+        self.assertEqual(self.read(b">a\nACG\nTT\n>b\nGG\n"), ["ACGTT", "GG"])
+        self.assertEqual(self.read(b"3\nACGT\n\nTTA\n"), ["3", "ACGT", "TTA"])
+        self.assertEqual(self.read(b""), [])
+
+    def test_fastq_four_line_records(self):
+        self.assertEqual(self.read(b"@r1\nACGT\n+\nIIII\n@r2\nGG\n+r2\n!!\n"), ["ACGT", "GG"])
+
+    def test_fastq_wrapped_records_and_at_quality(self):
+        content = b"@r1\nACG\nTTA\n+\n@II\nIII\n@r2\nCC\n+\n@@\n"
+        self.assertEqual(self.read(content), ["ACGTTA", "CC"])
+
+    def test_fastq_malformed_records_raise(self):
+        for content in (b"@r1\nACGT\n+\nII\n", b"@r1\nACGT\n", b"@r1\nAC\n+\nIII\n", b"@r1\nAC\n+\nII\nAC\n"):
+            with self.assertRaises(ValueError):
+                self.read(content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,11 @@ Given: A sequence of k-mers Pattern1, ... , Patternn such that the last k - 1 sy
 Return: A string Text of length k+n-1 where the i-th k-mer in Text is equal to Patterni for all i.
 """
 import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.spelling import PathSpeller
 
 
 def prefix(text):
@@ -18,20 +23,51 @@ def suffix(text):
     return text[1:]
 
 
-def side_finder(pat_dict, pattern, direction):
-    no_coincidences = True
+EXTENSION_ORDER = {'A': 0, 'G': 1, 'C': 2, 'T': 3} # order in which the extension loop tries the bases
+
+
+def build_side_indexes(pat_dict):
+    """One pass over the patterns: prefix -> patterns starting with it, suffix -> patterns ending with it."""
+    prefix_index = {}
+    suffix_index = {}
+    for pattern in pat_dict:
+        prefix_index.setdefault(prefix(pattern), []).append(pattern)
+        suffix_index.setdefault(suffix(pattern), []).append(pattern)
+    return prefix_index, suffix_index
+
+
+def side_finder(pat_dict, pattern, direction, indexes=None):
+    if indexes is None: # callers checking many patterns should build the indexes once and pass them
+        indexes = build_side_indexes(pat_dict)
+    prefix_index, suffix_index = indexes
     match direction:
-        case 'begin':
-            for pattern_comp in pat_dict:
-                if (suffix(pattern_comp) == prefix(pattern)) & (pattern_comp != pattern):
-                    no_coincidences = False
-                    break
-        case 'end':
-            for pattern_comp in pat_dict:
-                if (suffix(pattern) == prefix(pattern_comp)) & (pattern_comp != pattern):
-                    no_coincidences = False
-                    break
-    return no_coincidences
+        case 'begin': # another pattern whose suffix is our prefix?
+            matches = suffix_index.get(prefix(pattern), ())
+        case 'end': # another pattern whose prefix is our suffix?
+            matches = prefix_index.get(suffix(pattern), ())
+        case _:
+            matches = ()
+    return all(pattern_comp == pattern for pattern_comp in matches) # a key appears once, so this stops after 2 checks
+
+
+def next_extension(seqList, indexes, last_forward, last_reverse):
+    """
+    Picks the next pattern to glue, using the indexes instead of probing every base. Returns ('forward', pattern)
+    for a pattern following last_forward or ('reverse', pattern) for one preceding last_reverse, trying the bases
+    in EXTENSION_ORDER and forward before reverse for the same base, or None when nothing can be glued.
+    """
+    prefix_index, suffix_index = indexes
+    moves = []
+    for pattern in prefix_index.get(suffix(last_forward), ()):
+        if pattern in seqList:
+            moves.append((EXTENSION_ORDER.get(pattern[-1], 4), 0, pattern))
+    for pattern in suffix_index.get(prefix(last_reverse), ()):
+        if pattern in seqList:
+            moves.append((EXTENSION_ORDER.get(pattern[0], 4), 1, pattern))
+    if not moves:
+        return None
+    _, side, pattern = min(moves)
+    return ('forward', 'reverse')[side], pattern
 
 
 #dict_pat_t = {'ACCGA': None, 'CCGAA': None, 'CGAAG': None, 'GAAGC': None, 'AAGCT': None}
@@ -45,11 +81,12 @@ def Reconstruction_seq(seqList):
     end_seq = ''
     reconstructed_seq = ''
     d = len(seqList)
+    indexes = build_side_indexes(seqList) # built once, O(n), instead of rescanning the dict per pattern
     for p in seqList:
-        if side_finder(seqList, p, 'begin'):
+        if side_finder(seqList, p, 'begin', indexes):
             initial_seq = p
             continue
-        if side_finder(seqList, p, 'end'):
+        if side_finder(seqList, p, 'end', indexes):
             end_seq = p
             continue
         if (initial_seq != '' and end_seq != ''):
@@ -57,18 +94,25 @@ def Reconstruction_seq(seqList):
     seqList.pop(initial_seq)
     seqList.pop(end_seq)
     k = len(initial_seq)
+    last_forward = initial_seq # k-mers at the growing ends, the spelled strings are only joined at the end
+    last_reverse = end_seq
+    forward_seq = PathSpeller(initial_seq)
+    reverse_seq = PathSpeller(end_seq)
     while seqList:
-        for o in ['A', 'G', 'C', 'T']:
-            if suffix(initial_seq[-k:])+ o in seqList:
-                initial_seq = initial_seq + o
-                seqList.pop(initial_seq[-k:])
-                break
-            if o + prefix(end_seq[:k]) in seqList:
-                end_seq = o  + end_seq
-                seqList.pop(end_seq[:k])
-                break
-    if suffix(initial_seq[-k:]) == prefix(end_seq[:k]):
-        reconstructed_seq = initial_seq + end_seq[k - 1:]
+        extension = next_extension(seqList, indexes, last_forward, last_reverse)
+        if extension is None: # the remaining patterns cannot be glued to either end
+            break
+        match extension:
+            case ('forward', pattern):
+                forward_seq.append(pattern[-1])
+                last_forward = pattern
+                seqList.pop(pattern)
+            case ('reverse', pattern):
+                reverse_seq.prepend(pattern[0])
+                last_reverse = pattern
+                seqList.pop(pattern)
+    if suffix(last_forward) == prefix(last_reverse):
+        reconstructed_seq = forward_seq.getvalue() + reverse_seq.getvalue()[k - 1:]
     return reconstructed_seq
 
 
@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from Code25 import PathSpeller, Reconstruction_seq, build_side_indexes, side_finder
+
+
+def random_dna(length, seed=0):
+    generator = random.Random(seed)
+    return "".join(generator.choice("ACGT") for _ in range(length))
+
+
+class ReconstructionTest(unittest.TestCase):
+    def test_shuffled_kmers_give_the_text_back(self):
+        for seed in range(5):
+            text = random_dna(300, seed)
+            kmers = [text[i:i + 15] for i in range(len(text) - 14)]
+            self.assertEqual(len(set(kmers)), len(kmers))
+            random.Random(seed).shuffle(kmers)
+            self.assertEqual(Reconstruction_seq(dict.fromkeys(kmers)), text)
+
+    def test_side_finder_with_shared_indexes(self):
+        patterns = dict.fromkeys(["ACCGA", "CCGAA", "CGAAG", "GAAGC", "AAGCT"])
+        indexes = build_side_indexes(patterns)
+        for pattern in patterns:
+            for direction in ("begin", "end"):
+                self.assertEqual(side_finder(patterns, pattern, direction, indexes),
+                                 side_finder(patterns, pattern, direction))
+        self.assertEqual([pattern for pattern in patterns if side_finder(patterns, pattern, "begin", indexes)],
+                         ["ACCGA"])
+        self.assertEqual([pattern for pattern in patterns if side_finder(patterns, pattern, "end", indexes)],
+                         ["AAGCT"])
+
+
+class PathSpellerTest(unittest.TestCase):
+    def test_grows_from_both_ends(self):
+        speller = PathSpeller("CG")
+        speller.append("TA")
+        speller.prepend("GA")
+        speller.prepend("T")
+        self.assertEqual(speller.getvalue(), "TGACGTA")
+        self.assertEqual(len(speller), 7)
+        self.assertEqual(PathSpeller().getvalue(), "")
+
+    def test_from_node_path(self):
+        text = random_dna(500, 7)
+        path = [text[i:i + 6] for i in range(len(text) - 5)]
+        self.assertEqual(PathSpeller.from_node_path(path).getvalue(), text)
+        self.assertEqual(PathSpeller.from_node_path([]).getvalue(), "")
+
+    def test_from_edge_path(self):
+        text = random_dna(500, 8)
+        nodes = [text[i:i + 5] for i in range(len(text) - 4)]
+        edges = list(zip(nodes, nodes[1:]))
+        self.assertEqual(PathSpeller.from_edge_path(edges).getvalue(), text)
+        self.assertEqual(PathSpeller.from_edge_path([]).getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,19 @@ Given: A sequence of k-mers Pattern1, ... , Patternn such that the last k - 1 sy
 Return: A string Text of length k+n-1 where the i-th k-mer in Text is equal to Patterni for all i.
 """
 import glob
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the suffix array overlap detection
+    np = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.spelling import PathSpeller
 
 
 def prefix(text):
@@ -18,64 +31,454 @@ def suffix(text):
     return text[1:]
 
 
-def side_finder(pat_dict, pattern, direction):
-    no_coincidences = True
-    match direction:
-        case 'begin':
-            for pattern_comp in pat_dict:
-                if (suffix(pattern_comp) == prefix(pattern)) & (pattern_comp != pattern):
-                    no_coincidences = False
-                    break
-        case 'end':
-            for pattern_comp in pat_dict:
-                if (suffix(pattern) == prefix(pattern_comp)) & (pattern_comp != pattern):
-                    no_coincidences = False
+class Node:
+    def __init__(self, value):
+        self.value = value  # Unique identifier or data for the node
+        self.neighbors = []  # List to store references to neighboring Node objects
+
+    def add_neighbor(self, neighbor_node):
+        self.neighbors.append(neighbor_node)
+
+    def __repr__(self):
+        return f"{self.value}"
+
+
+class Graph:
+    def __init__(self):
+        self.nodes = {}  # Dictionary to store Node objects, keyed by their value
+
+    def add_node(self, value):
+        if value not in self.nodes:
+            new_node = Node(value)
+            self.nodes[value] = new_node
+            return new_node
+        return self.nodes[value]
+
+    def add_edge(self, value1, value2):
+        node1 = self.add_node(value1)
+        node2 = self.add_node(value2)
+        node1.add_neighbor(node2)
+
+    def get_node(self, value):
+        return self.nodes.get(value)
+
+    def sort_graph(self):
+        self.nodes = dict(sorted(self.nodes.items()))
+        return self.nodes
+
+    def get_simplegraph(self):
+        nodes = self.sort_graph()
+        simplegraph = {}
+        for node_value, node_obj in nodes.items():
+            neighbor_values = sorted([n.value for n in node_obj.neighbors])
+            if neighbor_values:
+                simplegraph[node_value] = neighbor_values
+        return simplegraph
+
+    def __repr__(self):
+        nodes = self.sort_graph()
+        graph_repr = ""
+        for node_value, node_obj in nodes.items():
+            neighbor_values = sorted([n.value for n in node_obj.neighbors])
+            if neighbor_values:
+                graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
+        return graph_repr
+
+
+def suffix_array(text_codes):
+    """
+    Suffix array of an integer array by prefix doubling with NumPy: every round sorts the suffixes by the pair
+    (rank of the first h symbols, rank of the next h symbols) and it stops as soon as all ranks are distinct, after
+    O(log L) rounds for a longest repeat of length L. Each round is a comparison argsort, so the bound is
+    O(n log n log L), O(n log^2 n) in the worst case (a radix pass per round would make it O(n log n), but it is
+    a Python loop here). Returns (sa, rank) with rank[sa[p]] == p.
+    """
+    n = len(text_codes)
+    rank = np.unique(text_codes, return_inverse=True)[1].astype(np.int64).ravel()
+    sa = np.argsort(rank, kind="stable")
+    h = 1
+    while n:
+        second = np.full(n, -1, dtype=np.int64) # rank of the suffix h symbols further, -1 past the end
+        second[:n - h] = rank[h:]
+        keys = rank * (n + 1) + (second + 1)
+        sa = np.argsort(keys, kind="stable")
+        sorted_keys = keys[sa]
+        rank[sa] = np.concatenate(([0], np.cumsum(sorted_keys[1:] != sorted_keys[:-1])))
+        if rank[sa[-1]] == n - 1 or h >= n: # all suffixes distinct
+            break
+        h *= 2
+    return sa, rank
+
+
+def lcp_array(text_codes, sa, rank):
+    """Kasai's algorithm, lcp[p] is the longest common prefix of the suffixes sa[p - 1] and sa[p] (lcp[0] = 0)."""
+    text = text_codes.tolist()
+    sa_list = sa.tolist()
+    rank_list = rank.tolist()
+    n = len(text)
+    lcp = [0] * n
+    h = 0
+    for i in range(n):
+        if rank_list[i] == 0:
+            h = 0
+            continue
+        j = sa_list[rank_list[i] - 1]
+        while i + h < n and j + h < n and text[i + h] == text[j + h]:
+            h += 1
+        lcp[rank_list[i]] = h
+        if h:
+            h -= 1
+    return lcp
+
+
+def find_suffix_prefix_overlaps(reads, min_overlap):
+    """
+    Every exact overlap of at least min_overlap symbols between a proper suffix of a read and a proper prefix of a
+    read (contained reads are not reported), reads may have any length. The reads are concatenated with a distinct
+    separator after each one, smaller than every symbol, and the suffix array is scanned once: a read suffix that ends
+    on its separator sorts right before all the suffixes it prefixes, so a stack of open read suffixes, popped when
+    the lcp drops below their length, holds exactly the overlaps of each read start met. Time is O(n) for the scan
+    plus the output, after the suffix array construction. Returns (source read, target read, overlap length) triples.
+    """
+    if np is None:
+        raise ImportError("numpy is required for the suffix array overlap detection")
+    reads = [read.encode() if isinstance(read, str) else bytes(read) for read in reads]
+    n_reads = len(reads)
+    if n_reads == 0:
+        return []
+    read_lengths = np.array([len(read) for read in reads], dtype=np.int64)
+    read_ends = np.cumsum(read_lengths + 1) - 1 # position of the separator of every read
+    read_starts = read_ends - read_lengths
+    text_codes = np.frombuffer(b"".join(read + b"\0" for read in reads), dtype=np.uint8).astype(np.int64) + n_reads
+    text_codes[read_ends] = np.arange(n_reads) # unique separators, no common prefix runs across a read end
+    read_of = np.repeat(np.arange(n_reads), read_lengths + 1)
+    sa, rank = suffix_array(text_codes)
+    lcp = lcp_array(text_codes, sa, rank)
+    read_of = read_of.tolist()
+    read_starts = read_starts.tolist()
+    read_ends = read_ends.tolist()
+    read_lengths = read_lengths.tolist()
+    overlaps = []
+    open_suffixes = [] # (length, read) of the read suffixes prefixing the current suffix, lengths increasing
+    for position, start in enumerate(sa.tolist()):
+        while open_suffixes and open_suffixes[-1][0] > lcp[position]:
+            open_suffixes.pop()
+        read = read_of[start]
+        length = read_ends[read] - start
+        if length == 0: # separator
+            continue
+        if start == read_starts[read]: # read start: every open suffix is an overlap with its prefix
+            for overlap_length, source in open_suffixes:
+                if overlap_length >= read_lengths[read]:
                     break
-    return no_coincidences
+                overlaps.append((source, read, overlap_length))
+        if min_overlap <= length < read_lengths[read]:
+            open_suffixes.append((length, read))
+    return overlaps
 
 
-#dict_pat_t = {'ACCGA': None, 'CCGAA': None, 'CGAAG': None, 'GAAGC': None, 'AAGCT': None}
+MASK64 = (1 << 64) - 1
+BASE_CODES = {"A": 0, "C": 1, "G": 2, "T": 3}
 
 
-#for p in dict_pat_t:
-#    side_finder(dict_pat_t, p,'end')
+def minimizer_hash(code): #Invertible multiplicative hash, spreads the minimizers evenly
+    return (code * 0x9E3779B97F4A7C15) & MASK64
 
-def Overlap_seq(seqList):
-    initial_seq = ""
-    end_seq = ""
-    seq_graph = {}
-    for p in seqList:
-        if side_finder(seqList, p, 'begin'):
-            initial_seq = p
+
+def minimizer_sketch(read, k, w):
+    """
+    (w, k)-minimizers of a read: the k-mer with the smallest hash in every window of w consecutive k-mers, kept once
+    per run of windows sharing it. Non-ACGT symbols break the windows. Returns (hash, position) pairs in read order,
+    the window minimum is kept with a monotonic deque so the sketch is linear in the read length.
+    """
+    mask = (1 << (2 * k)) - 1
+    sketch = []
+    window = deque() # (hash, position), hashes increasing from the left
+    code = 0
+    valid = 0 # bases since the last break
+    for position, base in enumerate(read):
+        base_code = BASE_CODES.get(base)
+        if base_code is None:
+            window.clear()
+            valid = 0
             continue
-        if side_finder(seqList, p, 'end'):
-            end_seq = p
+        code = ((code << 2) | base_code) & mask
+        valid += 1
+        if valid < k:
             continue
-        if (len(initial_seq) != 0 and len(end_seq) != 0):
-            break
-    seqList.pop(initial_seq)
-    seqList.pop(end_seq)
-    k = len(initial_seq)
-    last_forward = initial_seq
-    last_reverse = end_seq
-    while seqList:
-        for o in ['A', 'G', 'C', 'T']:
-            if suffix(last_forward) + o in seqList:
-                new_seq = suffix(last_forward) + o
-                seq_graph[last_forward] = new_seq
-                last_forward = new_seq
-                seqList.pop(new_seq)
-                break
-            if o + prefix(last_reverse) in seqList:
-                new_seq = o + prefix(last_reverse)
-                seq_graph[new_seq] = last_reverse
-                last_reverse = new_seq
-                seqList.pop(new_seq)
-                break
+        start = position - k + 1
+        value = minimizer_hash(code)
+        while window and window[-1][0] > value:
+            window.pop()
+        window.append((value, start))
+        while window[0][1] <= start - w:
+            window.popleft()
+        if valid >= k + w - 1 and (not sketch or sketch[-1][1] != window[0][1]):
+            sketch.append(window[0])
+    return sketch
+
+
+def chain_hits(hits, band):
+    """
+    Best co-linear chain of (query position, target position) hits: hits are grouped by diagonal (query - target
+    position, within band of the previous one) and the longest chain increasing in both reads is taken inside every
+    group. Returns the hits of the best chain.
+    """
+    hits.sort(key=lambda hit: (hit[0] - hit[1], hit[0]))
+    best = []
+    group_start = 0
+    for end in range(1, len(hits) + 1):
+        if end < len(hits) and (hits[end][0] - hits[end][1]) - (hits[end - 1][0] - hits[end - 1][1]) <= band:
             continue
-    seq_graph[last_forward] = last_reverse
-    nodes_list = sorted([f"{key} -> {value}" for key, value in seq_graph.items()])
-    return nodes_list
+        group = sorted(hits[group_start:end])
+        # Longest increasing run of target positions (patience sorting), predecessor links rebuild the chain
+        tails, tail_index, previous = [], [], [0] * len(group)
+        for index, (_, target_position) in enumerate(group):
+            slot = bisect_left(tails, target_position)
+            if slot == len(tails):
+                tails.append(target_position)
+                tail_index.append(index)
+            else:
+                tails[slot] = target_position
+                tail_index[slot] = index
+            previous[index] = tail_index[slot - 1] if slot else -1
+        if len(tails) > len(best):
+            chain = []
+            index = tail_index[-1]
+            while index != -1:
+                chain.append(group[index])
+                index = previous[index]
+            best = chain[::-1]
+        group_start = end
+    return best
+
+
+def find_approximate_overlaps(reads, k=15, w=10, min_overlap=100, min_hits=3, min_identity=0.0, band=50,
+                              batch_size=100000, max_occurrences=200):
+    """
+    Candidate suffix-prefix overlaps between reads carrying sequencing errors. The reads are indexed in batches of
+    batch_size, so memory is bounded by one batch of sketches: every batch gets an inverted minimizer -> (read,
+    position) index (minimizers seen more than max_occurrences times are repeats and are dropped), then every read is
+    sketched and looked up against it. The hits of each read pair are chained co-linearly by diagonal, a chain with
+    the target starting inside the query and running past its end is an overlap query -> target. Identity is
+    estimated from the fraction f of the query minimizers inside the overlap found in the chain, f ** (1 / k) since
+    one error destroys the k-mers around it. Yields (source read, target read, overlap length, identity) tuples,
+    reads is a sequence (it is scanned once per batch).
+    """
+    for batch_start in range(0, len(reads), batch_size):
+        index = {}
+        for read_id in range(batch_start, min(batch_start + batch_size, len(reads))):
+            for value, position in minimizer_sketch(reads[read_id], k, w):
+                index.setdefault(value, []).append((read_id, position))
+        for value in [value for value, entries in index.items() if len(entries) > max_occurrences]:
+            del index[value]
+        for query_id, query in enumerate(reads):
+            sketch = minimizer_sketch(query, k, w)
+            hits_by_target = {}
+            for value, query_position in sketch:
+                for target_id, target_position in index.get(value, ()):
+                    if target_id != query_id:
+                        hits_by_target.setdefault(target_id, []).append((query_position, target_position))
+            for target_id, hits in hits_by_target.items():
+                if len(hits) < min_hits:
+                    continue
+                chain = chain_hits(hits, band)
+                if len(chain) < min_hits:
+                    continue
+                shift = round(sum(query_position - target_position for query_position, target_position in chain)
+                              / len(chain)) # target start inside the query
+                overlap_length = len(query) - shift
+                if shift <= 0 or len(reads[target_id]) <= overlap_length or overlap_length < min_overlap:
+                    continue # wrong direction (found from the other read) or containment
+                expected = sum(1 for _, query_position in sketch if query_position >= shift)
+                identity = min(1.0, len(chain) / max(expected, 1)) ** (1 / k)
+                if identity >= min_identity:
+                    yield query_id, target_id, overlap_length, identity
+
+
+class OverlapGraph:
+    """
+    Overlap graph of a collection of patterns. Node i is the i-th pattern (repeated patterns are separate nodes) and
+    every suffix -> prefix match is an edge, self matches included. The adjacency uses integer ids in CSR form: the
+    successors of node i are targets[offsets[i]:offsets[i + 1]] and lengths holds the overlap length of each edge.
+    """
+    def __init__(self, patterns, offsets, targets, lengths):
+        self.patterns = patterns # node id -> label
+        self.offsets = offsets
+        self.targets = targets
+        self.lengths = lengths
+
+    @classmethod
+    def from_patterns(cls, patterns):
+        """k-mer overlap graph (overlaps of k-1 symbols) built through a (k-1)-prefix index in O(n + edges)."""
+        patterns = list(patterns)
+        prefix_index = {} # prefix -> ids of the patterns starting with it
+        for node_id, pattern in enumerate(patterns):
+            prefix_index.setdefault(prefix(pattern), array("q")).append(node_id)
+        offsets = array("q", [0])
+        targets = array("q")
+        lengths = array("q")
+        for pattern in patterns:
+            successors = prefix_index.get(suffix(pattern))
+            if successors:
+                targets.extend(successors)
+                lengths.extend([len(pattern) - 1] * len(successors))
+            offsets.append(len(targets))
+        return cls(patterns, offsets, targets, lengths)
+
+    @classmethod
+    def from_overlaps(cls, patterns, overlaps):
+        """Builds the graph from (source id, target id, overlap length) triples, grouped by source in two passes."""
+        patterns = list(patterns)
+        overlaps = list(overlaps)
+        offsets = array("q", [0] * (len(patterns) + 1))
+        for source, _, _ in overlaps: # out-degree counts, then prefix sums
+            offsets[source + 1] += 1
+        for node_id in range(len(patterns)):
+            offsets[node_id + 1] += offsets[node_id]
+        fill = array("q", offsets[:-1]) # next free slot of every source
+        targets = array("q", [0] * len(overlaps))
+        lengths = array("q", [0] * len(overlaps))
+        for source, target, length in overlaps:
+            targets[fill[source]] = target
+            lengths[fill[source]] = length
+            fill[source] += 1
+        return cls(patterns, offsets, targets, lengths)
+
+    @classmethod
+    def from_reads(cls, reads, min_overlap):
+        """Variable-length reads, one edge per exact suffix-prefix overlap of at least min_overlap symbols."""
+        reads = list(reads)
+        return cls.from_overlaps(reads, find_suffix_prefix_overlaps(reads, min_overlap))
+
+    @classmethod
+    def from_noisy_reads(cls, reads, min_identity=0.0, **options):
+        """Reads with sequencing errors, one edge per minimizer-chained overlap (see find_approximate_overlaps)."""
+        reads = list(reads)
+        overlaps = find_approximate_overlaps(reads, min_identity=min_identity, **options)
+        return cls.from_overlaps(reads, ((source, target, length) for source, target, length, _ in overlaps))
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def edge_count(self):
+        return len(self.targets)
+
+    def successors(self, node_id):
+        return self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]
+
+    def edges(self): #(source id, target id, overlap length) of every edge
+        for source in range(len(self.patterns)):
+            for position in range(self.offsets[source], self.offsets[source + 1]):
+                yield source, self.targets[position], self.lengths[position]
+
+    def overhang(self, position): #Symbols the target of an edge adds past its source
+        return len(self.patterns[self.targets[position]]) - self.lengths[position]
+
+    def transitive_reduction(self, fuzz=0):
+        """
+        String graph of the overlap graph (Myers 2005): the edge v -> x is removed when some v -> w -> x goes through
+        it, i.e. when overhang(v, w) + overhang(w, x) equals overhang(v, x) (within fuzz). Adjacencies are sorted by
+        overhang once so the inner scan of w stops at the longest overhang of v, and the per-node mark arrays are
+        reset only on the successors touched, which makes the pass near-linear on real read sets. Self loops and
+        reads looping back to v never reduce an edge. Returns a new OverlapGraph.
+        """
+        vacant, in_play, eliminated = 0, 1, 2
+        n = len(self.patterns)
+        # Sorted adjacency: every edge range by increasing overhang
+        order = array("q")
+        for node_id in range(n):
+            order.extend(sorted(range(self.offsets[node_id], self.offsets[node_id + 1]), key=self.overhang))
+        targets = array("q", (self.targets[position] for position in order))
+        lengths = array("q", (self.lengths[position] for position in order))
+        overhangs = array("q", (self.overhang(position) for position in order))
+        mark = bytearray(n)
+        reach = set() # (x, overhang of v -> w -> x) of the current v, several per x when the reads have repeats
+        reduced = []
+        for v in range(n):
+            start, end = self.offsets[v], self.offsets[v + 1]
+            if start == end:
+                continue
+            for position in range(start, end):
+                mark[targets[position]] = in_play
+            longest = overhangs[end - 1] + fuzz
+            for position in range(start, end):
+                w = targets[position]
+                if w == v:
+                    continue
+                for next_position in range(self.offsets[w], self.offsets[w + 1]):
+                    through = overhangs[position] + overhangs[next_position]
+                    if through > longest:
+                        break
+                    x = targets[next_position]
+                    if x != v and x != w and mark[x] != vacant:
+                        mark[x] = eliminated
+                        reach.add((x, through))
+            for position in range(start, end):
+                x = targets[position]
+                if mark[x] != eliminated or not any((x, overhangs[position] + shift) in reach
+                                                    for shift in range(-fuzz, fuzz + 1)):
+                    reduced.append((v, x, lengths[position]))
+            for position in range(start, end):
+                mark[targets[position]] = vacant
+            reach.clear()
+        return OverlapGraph.from_overlaps(self.patterns, reduced)
+
+    def to_graph(self): #Same structure as the de Bruijn code (Node/Graph keyed by label), repeated labels merge
+        graph = Graph()
+        for pattern in self.patterns:
+            graph.add_node(pattern)
+        for source, target, _ in self.edges():
+            graph.add_edge(self.patterns[source], self.patterns[target])
+        return graph
+
+    def adjacency_lines(self): #"pattern -> pattern" for every edge, in lexicographic order
+        return sorted(f"{self.patterns[source]} -> {self.patterns[target]}" for source, target, _ in self.edges())
+
+
+def string_graph_contigs(graph):
+    """
+    Contigs of an (ideally transitively reduced) overlap graph: maximal non-branching paths, found like the de Bruijn
+    contigs (start from every node that is not 1-in-1-out, then the isolated cycles), and spelled with the overlap
+    length of every edge instead of a fixed k - 1.
+    """
+    n = len(graph)
+    in_degree = array("q", [0] * n)
+    for target in graph.targets:
+        in_degree[target] += 1
+
+    def out_degree(node_id):
+        return graph.offsets[node_id + 1] - graph.offsets[node_id]
+
+    def is_1_in_1_out(node_id):
+        return in_degree[node_id] == 1 and out_degree(node_id) == 1
+
+    def spell(node_id, position):
+        speller = PathSpeller(graph.patterns[node_id])
+        visited[node_id] = True
+        while True:
+            target = graph.targets[position]
+            speller.append(graph.patterns[target][graph.lengths[position]:])
+            if not is_1_in_1_out(target) or visited[target]:
+                visited[target] = True
+                return speller.getvalue()
+            visited[target] = True
+            position = graph.offsets[target]
+
+    contigs = []
+    visited = bytearray(n)
+    for node_id in range(n):
+        if not is_1_in_1_out(node_id):
+            for position in range(graph.offsets[node_id], graph.offsets[node_id + 1]):
+                contigs.append(spell(node_id, position))
+    for node_id in range(n): # isolated cycles, every node 1-in-1-out
+        if not visited[node_id] and is_1_in_1_out(node_id):
+            contigs.append(spell(node_id, graph.offsets[node_id]))
+    return contigs
+
+
+def Overlap_seq(seqList):
+    return OverlapGraph.from_patterns(seqList).adjacency_lines()
 
 ################### EVAL FUCTION ###########################
 #Testing with files
@@ -117,8 +520,6 @@ if __name__ == "__main__":
     # #MODIFY THIS SECTION FOR EACH FUNCTION
     for input_file in input_files:
         file_load = read_file_txt(input_file)
-        pattern_dict = dict()
-        for l in file_load:
-            pattern_dict[l.strip("\n")] = None
-        seq_s = Overlap_seq(pattern_dict)
+        patterns = [l.strip() for l in file_load if l.strip()] # repeated k-mers are kept, each one is a node
+        seq_s = Overlap_seq(patterns)
         write_file_txt(input_file, seq_s)
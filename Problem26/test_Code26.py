@@ -0,0 +1,123 @@
+import os
+import random
+import unittest
+
+import numpy as np
+
+from Code26 import (BASE_CODES, OverlapGraph, Overlap_seq, find_approximate_overlaps, find_suffix_prefix_overlaps,
+                    lcp_array, minimizer_hash, minimizer_sketch, string_graph_contigs, suffix_array)
+
+
+def random_reads(count, seed, alphabet="ACGT", lengths=(3, 12)):
+    generator = random.Random(seed)
+    return ["".join(generator.choice(alphabet) for _ in range(generator.randint(*lengths))) for _ in range(count)]
+
+
+def tiled_reads(genome_length=3000, read_length=400, step=150, seed=5):
+    genome = random_reads(1, seed, lengths=(genome_length, genome_length))[0]
+    return genome, [genome[i:i + read_length] for i in range(0, genome_length - read_length + 1, step)]
+
+
+class OverlapGraphTest(unittest.TestCase):
+    def test_adjacency_matches_all_pairs(self):
+        patterns = ["ATGCG", "GCATG", "CATGC", "AGGCA", "GGCAT", "GGCAC", "CATGC"]
+        expected = sorted(f"{a} -> {b}" for a in patterns for b in patterns if a[1:] == b[:-1])
+        self.assertEqual(Overlap_seq(patterns), expected)
+
+    def test_csr_layout(self):
+        graph = OverlapGraph.from_patterns(["AAA", "AAC", "ACG"])
+        self.assertEqual(list(graph.offsets), [0, 2, 3, 3])
+        self.assertEqual(list(graph.successors(0)), [0, 1])
+        self.assertEqual(list(graph.edges()), [(0, 0, 2), (0, 1, 2), (1, 2, 2)])
+        self.assertEqual(graph.edge_count(), 3)
+
+    def test_self_loop_and_empty(self):
+        self.assertEqual(Overlap_seq(["AAAA"]), ["AAAA -> AAAA"])
+        self.assertEqual(Overlap_seq([]), [])
+
+
+
+class SuffixArrayTest(unittest.TestCase):
+    def test_matches_sorted_suffixes(self):
+        for text in ["banana", "aaaaaaa", "a", "abracadabra", "mississippi"] + random_reads(20, 1, "ab", (1, 40)):
+            codes = np.frombuffer(text.encode(), dtype=np.uint8).astype(np.int64)
+            sa, rank = suffix_array(codes)
+            self.assertEqual(sa.tolist(), sorted(range(len(text)), key=lambda i: text[i:]))
+            self.assertEqual(rank[sa].tolist(), list(range(len(text))))
+            expected = [0] + [len(os.path.commonprefix([text[sa[p - 1]:], text[sa[p]:]])) for p in range(1, len(text))]
+            self.assertEqual(lcp_array(codes, sa, rank), expected)
+
+    def test_overlaps_match_all_pairs(self):
+        for seed in range(5):
+            reads = random_reads(25, seed, "AC")
+            expected = sorted((source, target, length)
+                              for source, read in enumerate(reads) for target, other in enumerate(reads)
+                              for length in range(2, min(len(read), len(other)))
+                              if read[-length:] == other[:length])
+            self.assertEqual(sorted(find_suffix_prefix_overlaps(reads, 2)), expected)
+        self.assertEqual(find_suffix_prefix_overlaps([], 3), [])
+
+    def test_from_reads(self):
+        graph = OverlapGraph.from_reads(["ACGTTGCA", "TTGCATTA", "CATTAGG"], 3)
+        self.assertEqual(sorted(graph.edges()), [(0, 1, 5), (1, 2, 5)])
+
+
+
+class TransitiveReductionTest(unittest.TestCase):
+    def test_tiled_reads_reduce_to_a_chain(self):
+        genome, reads = tiled_reads()
+        graph = OverlapGraph.from_reads(reads, 100)
+        self.assertIn((0, 2, 100), list(graph.edges())) # skips a read, transitive
+        reduced = graph.transitive_reduction()
+        self.assertEqual(sorted(reduced.edges()), [(i, i + 1, 250) for i in range(len(reads) - 1)])
+        self.assertEqual(string_graph_contigs(reduced), [genome[:150 * (len(reads) - 1) + 400]])
+
+    def test_triangle_loses_its_shortcut(self):
+        graph = OverlapGraph.from_overlaps(["AAAAC", "AACGG", "CGGTT"], [(0, 1, 3), (1, 2, 3), (0, 2, 1)])
+        self.assertEqual(sorted(graph.transitive_reduction().edges()), [(0, 1, 3), (1, 2, 3)])
+        self.assertEqual(sorted(graph.transitive_reduction(fuzz=1).edges()), [(0, 1, 3), (1, 2, 3)])
+        graph = OverlapGraph.from_overlaps(["AAAAC", "AACGG", "GGTTT"], [(0, 1, 3), (1, 2, 2)])
+        self.assertEqual(sorted(graph.transitive_reduction().edges()), [(0, 1, 3), (1, 2, 2)])
+
+
+
+class MinimizerTest(unittest.TestCase):
+    def test_sketch_matches_window_minima(self):
+        read = random_reads(1, 6, lengths=(300, 300))[0]
+        k, w = 7, 5
+        codes = [sum(BASE_CODES[base] << (2 * (k - 1 - j)) for j, base in enumerate(read[i:i + k]))
+                 for i in range(len(read) - k + 1)]
+        hashes = [(minimizer_hash(code), i) for i, code in enumerate(codes)]
+        expected = []
+        for start in range(len(hashes) - w + 1):
+            minimum = min(hashes[start:start + w])
+            if not expected or expected[-1] != minimum:
+                expected.append(minimum)
+        self.assertEqual(minimizer_sketch(read, k, w), expected)
+        self.assertEqual(minimizer_sketch("ACGNACG", 3, 2), []) # N breaks every window
+
+    def test_error_free_overlaps_found(self):
+        _, reads = tiled_reads()
+        overlaps = {(source, target): (length, identity)
+                    for source, target, length, identity in find_approximate_overlaps(reads, min_overlap=100)}
+        for i in range(len(reads) - 1):
+            self.assertEqual(overlaps[i, i + 1][0], 250)
+            self.assertGreater(overlaps[i, i + 1][1], 0.95)
+        self.assertTrue(all(source < target for source, target in overlaps)) # found in the right direction only
+
+    def test_noisy_reads_keep_the_chain(self):
+        genome, reads = tiled_reads(seed=7)
+        generator = random.Random(8)
+        noisy = []
+        for read in reads: # about 1% substitutions
+            read = list(read)
+            for position in generator.sample(range(len(read)), 4):
+                read[position] = "ACGT"[("ACGT".index(read[position]) + 1) % 4]
+            noisy.append("".join(read))
+        graph = OverlapGraph.from_noisy_reads(noisy, min_identity=0.9)
+        edges = {(source, target) for source, target, _ in graph.edges()}
+        self.assertTrue(all((i, i + 1) in edges for i in range(len(reads) - 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
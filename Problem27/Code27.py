@@ -1,14 +1,32 @@
 import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.kmers import PACK_BYTES, canonical_pattern, decode_kmer, reverse_complement_packed
 
 
 class Node:
     def __init__(self, value):
         self.value = value  # Unique identifier or data for the node
-        self.neighbors = [] # List to store references to neighboring Node objects
+        self.edges = {} # Neighboring Node -> multiplicity, each distinct edge is stored once
+        self.in_count = 0 # edges entering / leaving the node, kept up to date by add_neighbor
+        self.out_count = 0
+
+    def add_neighbor(self, neighbor_node, multiplicity=1): #O(1) dictionary update instead of a scan of the neighbors
+        self.edges[neighbor_node] = self.edges.get(neighbor_node, 0) + multiplicity
+        self.out_count += multiplicity
+        neighbor_node.in_count += multiplicity
+
+    @property
+    def neighbors(self): #Unique neighbors, as this graph has always listed them
+        return list(self.edges)
 
-    def add_neighbor(self, neighbor_node):
-        if neighbor_node not in self.neighbors:
-            self.neighbors.append(neighbor_node)
+    def out_degree(self):
+        return self.out_count
+
+    def in_degree(self):
+        return self.in_count
 
     def sorted_neighbors(self):
         return sorted(self.neighbors)
@@ -19,6 +37,10 @@ class Node:
 class Graph:
     def __init__(self):
         self.nodes = {} # Dictionary to store Node objects, keyed by their value
+        self.label_length = None # length of the packed (k-1)-mer codes when the node values are integers
+
+    def label(self, value): #Node value as printed, packed codes are decoded only here
+        return value if self.label_length is None else decode_kmer(value, self.label_length)
 
     def add_node(self, value):
         if value not in self.nodes:
@@ -45,13 +67,39 @@ class Graph:
         for node_value, node_obj in nodes.items():
             neighbor_values = sorted([n.value for n in node_obj.neighbors])
             if neighbor_values:
-                graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
+                graph_repr += f"{self.label(node_value)} -> {",".join(map(self.label, neighbor_values))}\n"
         return graph_repr
 
-def PathGraph(Text, k):
+
+def PathGraph(Text, k, canonical=False, packed=False):
+    """
+    de Bruijn graph of the k-mers of Text, one edge per k-mer (repeated k-mers raise the edge multiplicity).
+    canonical=True adds the edge of min(k-mer, reverse complement) to the same directed graph, so both strands give
+    the same nodes and edge counts, but the edges of a reverse complemented k-mer point the other way: paths no longer
+    spell Text. That mode is for counting (nodes, edges, multiplicities) only, spelling both strands would need a
+    bidirected graph.
+    """
     Debruijn_graph = Graph()
+    if packed: # integer node ids rolled along Text: prefix code >> 2, suffix code & mask, labels decoded at output
+        digits = Text.encode().translate(PACK_BYTES)
+        if digits.lstrip(b"0123"): # another symbol was left
+            raise ValueError("integer node ids need an ACGT text")
+        Debruijn_graph.label_length = k - 1
+        kmer_mask = (1 << (2 * k)) - 1
+        node_mask = kmer_mask >> 2
+        code = 0
+        for i, digit in enumerate(digits):
+            code = ((code << 2) | (digit - 48)) & kmer_mask # 48 is ord("0")
+            if i >= k - 1:
+                kmer = min(code, reverse_complement_packed(code, k)) if canonical else code
+                Debruijn_graph.add_edge(kmer >> 2, kmer & node_mask)
+        return Debruijn_graph
     for i in range(len(Text)-k+1):
-        Debruijn_graph.add_edge(Text[i:i+k-1], Text[i+1:i+k])
+        if canonical: # both strands of a k-mer share the edge of its canonical form
+            pattern = canonical_pattern(Text[i:i+k])
+            Debruijn_graph.add_edge(pattern[:-1], pattern[1:])
+        else:
+            Debruijn_graph.add_edge(Text[i:i+k-1], Text[i+1:i+k])
     return Debruijn_graph
 
 # Text = "AAGATTCTCTAC"
@@ -100,5 +148,5 @@ if __name__ == "__main__":
         file_load = read_file_txt(input_file)
         k = int(file_load[0].strip("\n"))
         Text = file_load[1].strip("\n")
-        graph = PathGraph(Text, k)
+        graph = PathGraph(Text, k, packed=True)
         write_file_txt(input_file, graph.__repr__())
@@ -0,0 +1,45 @@
+import random
+import unittest
+
+from Code27 import PathGraph, canonical_pattern
+
+
+def reverse_complement(text):
+    return text[::-1].translate(str.maketrans("ACGT", "TGCA"))
+
+
+def edge_counts(graph):
+    return {(graph.label(node.value), graph.label(target.value)): count
+            for node in graph.nodes.values() for target, count in node.edges.items()}
+
+
+class PathGraphTest(unittest.TestCase):
+    text = "".join(random.Random(0).choice("ACGT") for _ in range(300))
+
+    def test_packed_matches_strings(self):
+        for canonical in (False, True):
+            self.assertEqual(edge_counts(PathGraph(self.text, 6, canonical, packed=True)),
+                             edge_counts(PathGraph(self.text, 6, canonical)))
+
+    def test_plain_graph_spells_text(self):
+        graph = PathGraph("AAGATTCTCTAC", 4)
+        self.assertEqual(repr(graph).splitlines()[0], "AAG -> AGA")
+        self.assertEqual(sum(edge_counts(graph).values()), 9)
+
+    def test_canonical_graph_is_strand_independent(self):
+        forward = edge_counts(PathGraph(self.text, 7, canonical=True))
+        self.assertEqual(forward, edge_counts(PathGraph(reverse_complement(self.text), 7, canonical=True)))
+        self.assertEqual(sum(forward.values()), len(self.text) - 6)
+        for (source, target) in forward: # every edge is a canonical k-mer
+            kmer = source + target[-1]
+            self.assertEqual(canonical_pattern(kmer), kmer)
+
+    def test_canonical_graph_is_for_counting_only(self):
+        # GTT and TTT are stored as AAC and AAA (the other strand): the edges no longer chain into GTTTCG
+        graph = PathGraph("GTTTCG", 3, canonical=True)
+        self.assertEqual(edge_counts(graph), {("AA", "AC"): 1, ("AA", "AA"): 1, ("GA", "AA"): 1, ("CG", "GA"): 1})
+        self.assertNotIn("GT", {graph.label(value) for value in graph.nodes})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,42 @@
 import glob
+import hashlib
+import math
+import mmap
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the CSR graph backend and the binary graph format
+    np = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.kmers import (canonical_pattern, decode_kmer, encode_kmer, packed_kmer_blocks, packed_pattern,
+                            reverse_complement_packed)
+from dnagraph.csr import GRAPH_HEADER, CSRGraph, load_graph, save_graph
 
 
 class Node:
     def __init__(self, value):
         self.value = value  # Unique identifier or data for the node
-        self.neighbors = [] # List to store references to neighboring Node objects
+        self.edges = {} # Neighboring Node -> multiplicity, each distinct edge is stored once
+        self.in_count = 0 # edges entering / leaving the node, kept up to date by add_neighbor
+        self.out_count = 0
+
+    def add_neighbor(self, neighbor_node, multiplicity=1):
+        self.edges[neighbor_node] = self.edges.get(neighbor_node, 0) + multiplicity
+        self.out_count += multiplicity
+        neighbor_node.in_count += multiplicity
+
+    @property
+    def neighbors(self): #Re-expanded with the multiplicities, only for the code that needs every parallel edge
+        return [neighbor for neighbor, multiplicity in self.edges.items() for _ in range(multiplicity)]
+
+    def out_degree(self):
+        return self.out_count
 
-    def add_neighbor(self, neighbor_node):
-        #if neighbor_node not in self.neighbors: #For unique Nodes
-            #self.neighbors.append(neighbor_node)
-        self.neighbors.append(neighbor_node)
+    def in_degree(self):
+        return self.in_count
 
     def sorted_neighbors(self):
         return sorted(self.neighbors)
@@ -20,6 +47,10 @@ class Node:
 class Graph:
     def __init__(self):
         self.nodes = {} # Dictionary to store Node objects, keyed by their value
+        self.label_length = None # length of the packed (k-1)-mer codes when the node values are integers
+
+    def label(self, value): #Node value as printed, packed codes are decoded only here
+        return value if self.label_length is None else decode_kmer(value, self.label_length)
 
     def add_node(self, value):
         if value not in self.nodes:
@@ -46,13 +77,93 @@ class Graph:
         for node_value, node_obj in nodes.items():
             neighbor_values = sorted([n.value for n in node_obj.neighbors])
             if neighbor_values:
-                graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
+                graph_repr += f"{self.label(node_value)} -> {",".join(map(self.label, neighbor_values))}\n"
         return graph_repr
 
-def CompositeGraph(ListPatterns):
-    Debruijn_graph = Graph()
-    k = len(ListPatterns[0])
+
+class BloomFilter:
+    """Compact set membership with false positives only, m bits and h hash positions per item (double hashing)."""
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2)) # number of bits
+        self.n_hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.n_hashes)]
+
+    def add(self, item): #Inserts item, returns True if it was (probably) already there
+        seen = True
+        for bit in self.positions(item):
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                seen = False
+                self.bits[bit >> 3] |= 1 << (bit & 7)
+        return seen
+
+    def __contains__(self, item):
+        return all(self.bits[bit >> 3] & (1 << (bit & 7)) for bit in self.positions(item))
+
+def normalize_pattern(pattern, canonical):
+    if not isinstance(pattern, str): # bytes-like records (see read_sequences_mmap), line breaks removed
+        pattern = "".join(str(pattern, "ascii").split())
+    if canonical: # both strands of a k-mer share the edge of its canonical form
+        pattern = canonical_pattern(pattern)
+    return pattern
+
+def solid_kmers(ListPatterns, min_count, canonical=False, error_rate=0.01):
+    """
+    Two-pass solid k-mer filter. Pass 1 records first sightings in a Bloom filter and only k-mers seen again
+    become candidates, so the many k-mers seen once (sequencing errors) never reach a dict. Pass 2 counts the
+    candidates exactly. Returns {kmer: count} for the k-mers seen at least min_count times.
+    """
+    if iter(ListPatterns) is ListPatterns:
+        raise ValueError("the solid k-mer mode reads the patterns twice, pass a re-iterable collection")
+    capacity = len(ListPatterns) if hasattr(ListPatterns, "__len__") else 1 << 20
+    first_sightings = BloomFilter(capacity, error_rate)
+    candidates = {}
     for pattern in ListPatterns:
+        pattern = normalize_pattern(pattern, canonical)
+        if first_sightings.add(pattern):
+            candidates[pattern] = 0
+    del first_sightings
+    for pattern in ListPatterns:
+        pattern = normalize_pattern(pattern, canonical)
+        if pattern in candidates:
+            candidates[pattern] += 1
+    return {pattern: count for pattern, count in candidates.items() if count >= min_count}
+
+def CompositeGraph(ListPatterns, canonical=False, min_count=1, graph_type=Graph, packed=False):
+    """
+    de Bruijn graph of a k-mer collection, one edge per pattern. With canonical=True each pattern adds the edge of
+    its canonical form, which is only meant for counting: the graph stays directed, so its paths do not spell the
+    genome (see PathGraph in Problem27).
+    """
+    Debruijn_graph = graph_type()
+    solid = solid_kmers(ListPatterns, min_count, canonical) if min_count > 1 else None
+    if packed: # integer node ids: prefix code >> 2 and suffix code & mask, labels decoded only at output
+        if solid is not None:
+            solid = {packed_pattern(pattern)[0] for pattern in solid}
+        bulk = isinstance(Debruijn_graph, CSRGraph) # array-based construction of the CSR backend
+        for codes, length in packed_kmer_blocks(ListPatterns, canonical, vectorized=np is not None):
+            if not isinstance(codes, list):
+                codes = codes.tolist()
+            if solid is not None: # k-mers seen fewer than min_count times are dropped
+                codes = [code for code in codes if code in solid]
+            Debruijn_graph.label_length = length - 1
+            if bulk and length <= 32:
+                Debruijn_graph.add_kmer_codes(codes, length)
+            else:
+                node_mask = (1 << (2 * (length - 1))) - 1
+                for code in codes:
+                    Debruijn_graph.add_edge(code >> 2, code & node_mask)
+        return Debruijn_graph
+    for pattern in ListPatterns:
+        pattern = normalize_pattern(pattern, canonical)
+        if solid is not None and pattern not in solid: # k-mer seen fewer than min_count times
+            continue
         Debruijn_graph.add_edge(pattern[:-1], pattern[1:])
     return Debruijn_graph
 
@@ -72,6 +183,84 @@ def read_file_txt(file_path):
     except Exception as error:
         print(f"Error while reading file {file_path}: {error}")
 
+def read_sequences_mmap(file_path):
+    """
+    Memory-mapped reader, yields the sequence of every record as a read-only memoryview slice of the file (no copy).
+    FASTA (">" headers, the sequence may be wrapped over several lines and then keeps its line breaks), FASTQ
+    ("@" header, sequence lines, "+" separator, then quality lines until they are as long as the sequence, so
+    wrapped records and quality lines starting with "@" are read correctly) and plain text (one sequence per
+    non empty line) are supported. Malformed or truncated FASTQ records raise ValueError.
+    The mapping is released once no yielded slice is referenced anymore.
+    """
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    size = len(mapped)
+
+    def line_bounds(start): # (start, end) of every line from start on, trailing spaces and \r excluded
+        while start < size:
+            end = mapped.find(b"\n", start)
+            next_start = size if end == -1 else end + 1
+            end = size if end == -1 else end
+            while end > start and mapped[end - 1] in b" \t\r":
+                end -= 1
+            yield start, end
+            start = next_start
+
+    first = 0
+    while first < size and mapped[first] in b" \t\r\n":
+        first += 1
+    if first == size:
+        return
+    match mapped[first:first + 1]:
+        case b">":
+            start = first
+            while start != -1:
+                sequence_start = mapped.find(b"\n", start) + 1 # skip the header line
+                end = mapped.find(b"\n>", start)
+                next_start = -1 if end == -1 else end + 1
+                end = size if end == -1 else end
+                while end > sequence_start and mapped[end - 1] in b" \t\r\n":
+                    end -= 1
+                if sequence_start > 0 and end > sequence_start:
+                    yield view[sequence_start:end]
+                start = next_start
+        case b"@":
+            lines = line_bounds(first)
+            for start, end in lines: # header line of the next record
+                if end == start:
+                    continue
+                if mapped[start:start + 1] != b"@":
+                    raise ValueError(f"{file_path}: FASTQ header expected at byte {start}")
+                record = start
+                sequence_start = sequence_end = None
+                length = 0 # sequence length without the line breaks
+                for start, end in lines: # sequence lines up to the "+" separator
+                    if mapped[start:start + 1] == b"+":
+                        break
+                    if sequence_start is None:
+                        sequence_start = start
+                    sequence_end = end
+                    length += end - start
+                else:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has no '+' line")
+                quality = 0
+                while quality < length: # quality lines until they cover the sequence
+                    bounds = next(lines, None)
+                    if bounds is None:
+                        raise ValueError(f"{file_path}: FASTQ record at byte {record} is truncated")
+                    quality += bounds[1] - bounds[0]
+                if quality != length:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has {quality} quality values for {length} bases")
+                if length:
+                    yield view[sequence_start:sequence_end]
+        case _:
+            for start, end in line_bounds(first):
+                if end > start:
+                    yield view[start:end]
+
 
 def write_file_txt(file_path, content):
     name_split = file_path.split("/")
@@ -99,7 +288,5 @@ if __name__ == "__main__":
 
     # #MODIFY THIS SECTION FOR EACH FUNCTION
     for input_file in input_files:
-        file_load = read_file_txt(input_file)
-        ListKmer  = [l.strip() for l in file_load]
-        graph = CompositeGraph(ListKmer)
+        graph = CompositeGraph(read_sequences_mmap(input_file), packed=True)
         write_file_txt(input_file, graph.__repr__())
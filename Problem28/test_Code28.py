@@ -0,0 +1,186 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from Code28 import (GRAPH_HEADER, BloomFilter, CSRGraph, CompositeGraph, Graph, encode_kmer, load_graph,
+                    packed_kmer_blocks, reverse_complement_packed, save_graph, solid_kmers)
+
+
+class SolidKmersTest(unittest.TestCase):
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        items = [f"item{i}" for i in range(1000)]
+        self.assertFalse(any(bloom.add(item) for item in items[:1]))
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300) # about 1% expected
+
+    def test_counts_match_exact_counts(self):
+        generator = random.Random(1)
+        kmers = ["".join(generator.choice("AC") for _ in range(5)) for _ in range(300)]
+        for min_count in (2, 5):
+            expected = {kmer: kmers.count(kmer) for kmer in set(kmers) if kmers.count(kmer) >= min_count}
+            self.assertEqual(solid_kmers(kmers, min_count), expected)
+        with self.assertRaises(ValueError):
+            solid_kmers(iter(kmers), 2)
+
+    def test_graph_drops_rare_kmers(self):
+        kmers = ["ACGT", "ACGT", "CGTA", "CGTA", "GTAC", "TTTT"]
+        expected = repr(CompositeGraph(kmers[:4])) # solid k-mers keep their multiplicity
+        for graph_type in (Graph, CSRGraph):
+            for packed in (False, True):
+                graph = CompositeGraph(kmers, min_count=2, graph_type=graph_type, packed=packed)
+                self.assertEqual(repr(graph), expected)
+
+
+class PackedKmerBlocksTest(unittest.TestCase):
+    def test_vectorized_matches_scalar(self):
+        kmers = ["ACGTA", "TTGCA", "GGGGC", "CATGA"]
+        for canonical in (False, True):
+            (vectorized, k), = packed_kmer_blocks(kmers, canonical, vectorized=True)
+            (scalar, _), = packed_kmer_blocks(kmers, canonical)
+            self.assertIsInstance(vectorized, np.ndarray)
+            self.assertEqual(k, 5)
+            self.assertEqual(vectorized.tolist(), scalar)
+        (codes, _), = packed_kmer_blocks(["ACGTA"], canonical=True, vectorized=True)
+        self.assertEqual(codes.tolist(), [min(encode_kmer("ACGTA"), reverse_complement_packed(encode_kmer("ACGTA"), 5))])
+
+    def test_mixed_lengths_are_rejected(self):
+        # joined length 8 is a multiple of k=3 (seen on ACG... of length 4): must not be packed as two rows
+        for kmers in (["ACG", "T", "GCAA"], ["ACGT", "ACG", "ACGTA"]):
+            with self.assertRaises(ValueError):
+                list(packed_kmer_blocks(kmers, vectorized=True))
+
+    def test_bytes_records_with_line_breaks(self):
+        (codes, k), = packed_kmer_blocks([b"ACG\n", memoryview(b"TTA")], vectorized=True)
+        self.assertEqual((list(codes), k), ([encode_kmer("ACG"), encode_kmer("TTA")], 3))
+
+
+class CompositeGraphTest(unittest.TestCase):
+    kmers = ["GAGG", "CAGG", "GGGG", "GGGA", "CAGG", "AGGG", "GGAG"]
+
+    def test_packed_and_csr_match_strings(self):
+        expected = repr(CompositeGraph(self.kmers))
+        self.assertEqual(repr(CompositeGraph(self.kmers, packed=True)), expected)
+        self.assertEqual(repr(CompositeGraph(self.kmers, graph_type=CSRGraph, packed=True)), expected)
+        self.assertEqual(repr(CompositeGraph(self.kmers, graph_type=CSRGraph)), expected)
+
+    def test_canonical_graph_merges_strands(self):
+        reverse = [kmer[::-1].translate(str.maketrans("ACGT", "TGCA")) for kmer in self.kmers]
+        for graph_type in (Graph, CSRGraph):
+            self.assertEqual(repr(CompositeGraph(self.kmers, canonical=True, graph_type=graph_type)),
+                             repr(CompositeGraph(reverse, canonical=True, graph_type=graph_type)))
+
+    def test_degrees(self):
+        graph = CompositeGraph(self.kmers, graph_type=Graph)
+        node = graph.get_node("AGG")
+        self.assertEqual((node.in_degree(), node.out_degree()), (3, 1))
+
+    def test_degree_index_matches_edge_counts(self):
+        generator = random.Random(2)
+        kmers = ["".join(generator.choice("ACG") for _ in range(5)) for _ in range(200)]
+        out_expected, in_expected = {}, {}
+        for kmer in kmers:
+            out_expected[kmer[:-1]] = out_expected.get(kmer[:-1], 0) + 1
+            in_expected[kmer[1:]] = in_expected.get(kmer[1:], 0) + 1
+        for graph_type in (Graph, CSRGraph):
+            for packed in (False, True):
+                graph = CompositeGraph(kmers, graph_type=graph_type, packed=packed)
+                for value in graph.nodes:
+                    label, node = graph.label(value), graph.nodes[value]
+                    self.assertEqual((node.out_degree(), node.in_degree()),
+                                     (out_expected.get(label, 0), in_expected.get(label, 0)))
+        for graph_type in (Graph, CSRGraph): # kept up to date as edges are added after a lookup
+            graph = CompositeGraph(kmers, graph_type=graph_type)
+            node = kmers[0][:-1]
+            self.assertEqual(graph.get_node(node).in_degree(), in_expected.get(node, 0))
+            graph.add_edge("TTTT", node)
+            self.assertEqual(graph.get_node(node).in_degree(), in_expected.get(node, 0) + 1)
+            self.assertEqual(graph.get_node("TTTT").out_degree(), 1)
+
+    def test_repeated_kmers_raise_multiplicity(self):
+        for graph_type in (Graph, CSRGraph):
+            graph = CompositeGraph(self.kmers, graph_type=graph_type)
+            node = graph.get_node("CAG")
+            self.assertEqual(node.edges, {graph.get_node("AGG"): 2}) # one entry per distinct neighbor
+            self.assertEqual(node.neighbors, [graph.get_node("AGG")] * 2) # re-expanded for the walkers
+            self.assertEqual(node.out_degree(), 2)
+        self.assertIn("CAG -> AGG,AGG", repr(CompositeGraph(self.kmers)))
+
+    def test_csr_stores_distinct_targets(self):
+        graph = CompositeGraph(self.kmers + ["CAGG"], graph_type=CSRGraph)
+        node_id = graph.ids["CAG"]
+        self.assertEqual(len(graph.targets), sum(len(node.edges) for node in graph.nodes.values()))
+        self.assertEqual([graph.labels[target] for target in graph.successors(node_id)], ["AGG"])
+        self.assertEqual(graph.multiplicities_of(node_id).tolist(), [3])
+        self.assertEqual((graph.out_degree(node_id), graph.in_degree(graph.ids["AGG"])), (3, 4)) # GAGG enters AGG too
+        self.assertEqual(int(graph.in_degrees.sum()), len(self.kmers) + 1)
+
+
+class BinaryFormatTest(unittest.TestCase):
+    kmers = ["GAGG", "CAGG", "GGGG", "GGGA", "CAGG", "AGGG", "GGAG"]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "graph.bin")
+
+    def round_trip(self, graph):
+        save_graph(graph, self.path)
+        loaded = load_graph(self.path)
+        self.assertEqual(repr(loaded), repr(graph))
+        for value in graph.nodes:
+            self.assertEqual(loaded.nodes[value].out_degree(), graph.nodes[value].out_degree())
+            self.assertEqual(loaded.nodes[value].in_degree(), graph.nodes[value].in_degree())
+        return loaded
+
+    def test_string_and_packed_labels(self):
+        for graph_type in (Graph, CSRGraph):
+            for packed in (False, True):
+                loaded = self.round_trip(CompositeGraph(self.kmers, graph_type=graph_type, packed=packed))
+                self.assertEqual(loaded.label_length, 3 if packed else None)
+
+    def test_parallel_edges_stay_counted(self):
+        graph = CompositeGraph(self.kmers, graph_type=CSRGraph) # CAGG twice
+        save_graph(graph, self.path)
+        loaded = load_graph(self.path)
+        self.assertEqual(loaded.targets.tolist(), graph.targets.tolist())
+        self.assertEqual(loaded.multiplicities.tolist(), graph.multiplicities.tolist())
+        self.assertFalse(loaded.csr_multiplicities.flags.writeable) # mapped from the file, not expanded
+        self.round_trip(graph)
+
+    def test_loaded_graph_can_grow(self):
+        graph = CompositeGraph(self.kmers, graph_type=CSRGraph)
+        save_graph(graph, self.path)
+        loaded = load_graph(self.path)
+        loaded.add_edge("GGG", "TTT")
+        graph.add_edge("GGG", "TTT")
+        self.assertEqual(repr(loaded), repr(graph))
+
+    def test_empty_graph(self):
+        self.round_trip(CSRGraph())
+
+    def test_truncated_files_raise(self):
+        save_graph(CompositeGraph(self.kmers), self.path)
+        with open(self.path, "rb") as file:
+            content = file.read()
+        for size in (0, GRAPH_HEADER.size - 1, GRAPH_HEADER.size + 8, len(content) - 1):
+            with open(self.path, "wb") as file:
+                file.write(content[:size])
+            with self.assertRaises(ValueError):
+                load_graph(self.path)
+
+    def test_bad_magic(self):
+        with open(self.path, "wb") as file:
+            file.write(b"NOTGRAPH" + bytes(GRAPH_HEADER.size))
+        with self.assertRaises(ValueError):
+            load_graph(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
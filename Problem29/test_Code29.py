@@ -0,0 +1,46 @@
+import sys
+import unittest
+
+from Code29 import EulerianError, eulerian_cycle, has_eulerian_cycle, strongly_connected_components
+
+
+def edges_of(graph):
+    return sorted((node, neighbor) for node, neighbors in graph.items() for neighbor in neighbors)
+
+
+class EulerianCycleTest(unittest.TestCase):
+    def test_cycle_uses_every_edge_once(self):
+        graph = {0: [3], 1: [0], 2: [1, 6], 3: [2], 4: [2], 5: [4], 6: [5, 8], 7: [9], 8: [7], 9: [6]}
+        cycle = eulerian_cycle(graph)
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual(sorted(zip(cycle, cycle[1:])), edges_of(graph))
+        self.assertTrue(has_eulerian_cycle(graph))
+
+    def test_unbalanced_graph(self):
+        graph = {"A": ["B", "C"], "B": ["C"], "C": ["A"]} # A has out-degree 2, in-degree 1
+        with self.assertRaises(EulerianError) as raised:
+            eulerian_cycle(graph)
+        self.assertEqual(raised.exception.components, [])
+        self.assertFalse(has_eulerian_cycle(graph))
+        self.assertFalse(has_eulerian_cycle({"A": ["B"]})) # B only has an incoming edge
+
+    def test_disconnected_balanced_graph(self):
+        graph = {"A": ["B"], "B": ["A"], "C": ["D"], "D": ["E"], "E": ["C"]}
+        with self.assertRaises(EulerianError) as raised:
+            eulerian_cycle(graph)
+        self.assertEqual(sorted(map(sorted, raised.exception.components)), [["A", "B"], ["C", "D", "E"]])
+        self.assertFalse(has_eulerian_cycle(graph))
+
+    def test_no_edges(self):
+        with self.assertRaises(EulerianError):
+            eulerian_cycle({})
+
+    def test_deep_chain_beyond_the_recursion_limit(self):
+        n = 20 * sys.getrecursionlimit()
+        graph = {i: [(i + 1) % n] for i in range(n)}
+        self.assertEqual(eulerian_cycle(graph), list(range(n)) + [0])
+        self.assertEqual(len(strongly_connected_components([[i + 1] for i in range(n - 1)] + [[]])), n)
+
+
+if __name__ == "__main__":
+    unittest.main()
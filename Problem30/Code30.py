@@ -10,9 +10,100 @@ Return: An Eulerian path in this graph.
 """
 import glob
 
+def strongly_connected_components(successors):
+    """
+    Iterative Tarjan's algorithm over integer node ids, successors[i] being the list of targets of node i, O(V + E)
+    without recursion. Returns the components as lists of ids, a component before any component that reaches it.
+    """
+    order = [-1] * len(successors) # discovery index of every node, -1 until visited
+    low = [0] * len(successors)
+    on_stack = [False] * len(successors)
+    stack = []
+    components = []
+    counter = 0
+    for root in range(len(successors)):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        call_nodes = [root] # explicit call stack: node and the position of the next edge to follow
+        call_edges = [0]
+        while call_nodes:
+            node = call_nodes[-1]
+            edge = call_edges[-1]
+            if edge < len(successors[node]):
+                call_edges[-1] = edge + 1
+                target = successors[node][edge]
+                if order[target] == -1:
+                    order[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    call_nodes.append(target)
+                    call_edges.append(0)
+                elif on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+            else:
+                call_nodes.pop()
+                call_edges.pop()
+                if call_nodes and low[node] < low[call_nodes[-1]]:
+                    low[call_nodes[-1]] = low[node]
+                if low[node] == order[node]: # node is the root of a component, pop it
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+class EulerianError(ValueError):
+    """
+    Raised when a graph has no Eulerian cycle / path. components holds the strongly connected components (lists of
+    nodes) the edges split into when that is the reason, it is empty when the degrees do not balance.
+    """
+    def __init__(self, message, components=()):
+        super().__init__(message)
+        self.components = list(components)
+
+def adjacency_components(graph, path_ends=None):
+    """
+    Strongly connected components (lists of nodes) of the nodes of an adjacency list dictionary that have edges,
+    with an extra edge path_ends[1] -> path_ends[0] when given, which closes an Eulerian path into a cycle. A
+    balanced graph has an Eulerian cycle only when there is at most one, so any more are the offending components.
+    """
+    index = {}
+    for node, neighbors in graph.items():
+        index.setdefault(node, len(index))
+        for neighbor in neighbors:
+            index.setdefault(neighbor, len(index))
+    nodes = list(index)
+    successors = [[] for _ in nodes]
+    for node, neighbors in graph.items():
+        successors[index[node]].extend(index[neighbor] for neighbor in neighbors)
+    if path_ends is not None:
+        start, end = path_ends
+        successors[index[end]].append(index[start])
+    return [[nodes[i] for i in component] for component in strongly_connected_components(successors)
+            if len(component) > 1 or successors[component[0]]]
+
+def check_components(graph, path_ends=None):
+    """Raise EulerianError naming the components when adjacency_components(graph, path_ends) finds more than one."""
+    components = adjacency_components(graph, path_ends)
+    if len(components) > 1:
+        summary = "; ".join(f"{len(component)} nodes ({", ".join(map(str, component[:3]))}"
+                            f"{", ..." if len(component) > 3 else ""})" for component in components)
+        raise EulerianError(f"the edges split into {len(components)} strongly connected components: {summary}",
+                            components)
+
 def eulerian_path(graph):
+    """Eulerian path of an adjacency list dictionary, raises EulerianError when it has none."""
     if not graph:
-        return None
+        raise EulerianError("the graph has no edges")
     
     # Calculate in-degrees and out-degrees for all vertices
     in_degree = {}
@@ -45,7 +136,20 @@ def eulerian_path(graph):
                 break
     
     if start is None:
-        return None  # No valid start vertex found
+        raise EulerianError("the graph has no edges")  # No valid start vertex found
+
+    # Degrees must balance except at the two ends of the path
+    unbalanced = [v for v in out_degree if out_degree[v] != in_degree.get(v, 0)]
+    path_ends = None
+    if unbalanced:
+        ends = [v for v in unbalanced if in_degree.get(v, 0) - out_degree[v] == 1]
+        if len(unbalanced) != 2 or out_degree[start] - in_degree.get(start, 0) != 1 or not ends:
+            summary = ", ".join(f"{v} ({out_degree[v] - in_degree.get(v, 0):+d})" for v in unbalanced[:5])
+            raise EulerianError(f"out-degree - in-degree is not +1 at one node and -1 at another: {summary}")
+        path_ends = (start, ends[0])
+
+    # Fail fast when the edges, closed by end -> start, do not form one strongly connected component
+    check_components(graph, path_ends)
 
     # Hierholzer's algorithm to find Eulerian path
     path = []
@@ -69,7 +173,7 @@ def eulerian_path(graph):
     # Verify that we used all edges
     total_edges = sum(len(edges) for edges in graph.values())
     if len(path) - 1 != total_edges:
-        return None
+        raise EulerianError(f"the walk used {len(path) - 1} of {total_edges} edges")
 
     return path
 
@@ -136,9 +240,11 @@ if __name__ == "__main__":
             (node, neighbors) = line.split(" -> ")
             neighbors = neighbors.split(",")
             graph[node] = neighbors
-        path = eulerian_path(graph)
-        if path:
-            solution = "->".join(map(str, path))
-        else:
+        try:
+            path = eulerian_path(graph)
+        except EulerianError as error:
+            print(f"{input_file}: {error}")
             solution = "The graph does not contain an Eulerian path"
+        else:
+            solution = "->".join(map(str, path))
         write_file_txt(input_file, solution)
\ No newline at end of file
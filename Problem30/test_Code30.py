@@ -0,0 +1,48 @@
+import sys
+import unittest
+
+from Code30 import EulerianError, eulerian_path, strongly_connected_components
+
+
+def edges_of(graph):
+    return sorted((node, neighbor) for node, neighbors in graph.items() for neighbor in neighbors)
+
+
+class EulerianPathTest(unittest.TestCase):
+    def test_path_uses_every_edge_once(self):
+        graph = {0: [2], 1: [3], 2: [1], 3: [0, 4], 6: [3, 7], 7: [8], 8: [9], 9: [6]}
+        path = eulerian_path(graph)
+        self.assertEqual((path[0], path[-1]), (6, 4))
+        self.assertEqual(sorted(zip(path, path[1:])), edges_of(graph))
+
+    def test_balanced_graph_gives_a_cycle(self):
+        graph = {"A": ["B"], "B": ["C"], "C": ["A"]}
+        path = eulerian_path(graph)
+        self.assertEqual(path[0], path[-1])
+        self.assertEqual(sorted(zip(path, path[1:])), edges_of(graph))
+
+    def test_unbalanced_graph(self):
+        graph = {"A": ["B", "C", "D"], "B": ["A"]} # A is +2, C and D are -1
+        with self.assertRaises(EulerianError) as raised:
+            eulerian_path(graph)
+        self.assertEqual(raised.exception.components, [])
+
+    def test_disconnected_balanced_graph(self):
+        graph = {"A": ["B"], "B": ["A"], "C": ["D"], "D": ["E"], "E": ["C"]}
+        with self.assertRaises(EulerianError) as raised:
+            eulerian_path(graph)
+        self.assertEqual(sorted(map(sorted, raised.exception.components)), [["A", "B"], ["C", "D", "E"]])
+
+    def test_no_edges(self):
+        with self.assertRaises(EulerianError):
+            eulerian_path({})
+
+    def test_deep_chain_beyond_the_recursion_limit(self):
+        n = 20 * sys.getrecursionlimit()
+        graph = {i: [i + 1] for i in range(n - 1)}
+        self.assertEqual(eulerian_path(graph), list(range(n)))
+        self.assertEqual(len(strongly_connected_components([[i + 1] for i in range(n - 1)] + [[]])), n)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,46 @@
-from collections import defaultdict
 import glob
+import hashlib
+import math
+import mmap
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the CSR graph backend and the binary graph format
+    np = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.spelling import PathSpeller
+from dnagraph.kmers import canonical_pattern, decode_kmer, packed_kmer_blocks, packed_pattern
+from dnagraph.csr import CSRGraph, load_graph, save_graph
+from dnagraph.eulerian import (EulerianError, csr_eulerian_start, csr_hierholzer_walk, edge_arrays, eulerian_cycle_csr,
+                               eulerian_cycle_direct, eulerian_path_csr, eulerian_path_direct, has_eulerian_cycle_direct,
+                               hierholzer_walk)
+from dnagraph.implicit import ImplicitDeBruijnGraph # k-mer set backend, eulerian_path_direct runs on it unchanged
 
 class Node:
     def __init__(self, value):
         self.value = value  # Unique identifier or data for the node
-        self.neighbors = [] # List to store references to neighboring Node objects
+        self.edges = {} # Neighboring Node -> multiplicity, each distinct edge is stored once
+        self.in_count = 0 # edges entering / leaving the node, kept up to date by add_neighbor
+        self.out_count = 0
+
+    def add_neighbor(self, neighbor_node, multiplicity=1):
+        self.edges[neighbor_node] = self.edges.get(neighbor_node, 0) + multiplicity
+        self.out_count += multiplicity
+        neighbor_node.in_count += multiplicity
+
+    @property
+    def neighbors(self): #Re-expanded with the multiplicities, only for the code that needs every parallel edge
+        return [neighbor for neighbor, multiplicity in self.edges.items() for _ in range(multiplicity)]
 
-    def add_neighbor(self, neighbor_node):
-        #if neighbor_node not in self.neighbors: #For unique Nodes
-            #self.neighbors.append(neighbor_node)
-        self.neighbors.append(neighbor_node)
+    def out_degree(self):
+        return self.out_count
+
+    def in_degree(self):
+        return self.in_count
 
     def __repr__(self):
         return f"{self.value}"
@@ -17,6 +48,10 @@ class Node:
 class Graph:
     def __init__(self):
         self.nodes = {} # Dictionary to store Node objects, keyed by their value
+        self.label_length = None # length of the packed (k-1)-mer codes when the node values are integers
+
+    def label(self, value): #Node value as printed, packed codes are decoded only here
+        return value if self.label_length is None else decode_kmer(value, self.label_length)
 
     def add_node(self, value):
         if value not in self.nodes:
@@ -44,7 +79,7 @@ class Graph:
         for node_value, node_obj in nodes.items():
             neighbor_values = sorted([n.value for n in node_obj.neighbors])
             if neighbor_values:
-                simplegraph[node_value] = neighbor_values
+                simplegraph[self.label(node_value)] = [self.label(value) for value in neighbor_values]
         return simplegraph
 
     def __repr__(self):
@@ -53,144 +88,142 @@ class Graph:
         for node_value, node_obj in nodes.items():
             neighbor_values = sorted([n.value for n in node_obj.neighbors])
             if neighbor_values:
-                graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
+                graph_repr += f"{self.label(node_value)} -> {",".join(map(self.label, neighbor_values))}\n"
         return graph_repr
 
-def CompositeGraph(ListPatterns, k):
-    Debruijn_graph = Graph()
+
+class BloomFilter:
+    """Compact set membership with false positives only, m bits and h hash positions per item (double hashing)."""
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2)) # number of bits
+        self.n_hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.n_hashes)]
+
+    def add(self, item): #Inserts item, returns True if it was (probably) already there
+        seen = True
+        for bit in self.positions(item):
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                seen = False
+                self.bits[bit >> 3] |= 1 << (bit & 7)
+        return seen
+
+    def __contains__(self, item):
+        return all(self.bits[bit >> 3] & (1 << (bit & 7)) for bit in self.positions(item))
+
+def normalize_pattern(pattern, canonical):
+    if not isinstance(pattern, str): # bytes-like records (see read_sequences_mmap), line breaks removed
+        pattern = "".join(str(pattern, "ascii").split())
+    if canonical: # both strands of a k-mer share the edge of its canonical form
+        pattern = canonical_pattern(pattern)
+    return pattern
+
+def solid_kmers(ListPatterns, min_count, canonical=False, error_rate=0.01):
+    """
+    Two-pass solid k-mer filter. Pass 1 records first sightings in a Bloom filter and only k-mers seen again
+    become candidates, so the many k-mers seen once (sequencing errors) never reach a dict. Pass 2 counts the
+    candidates exactly. Returns {kmer: count} for the k-mers seen at least min_count times.
+    """
+    if iter(ListPatterns) is ListPatterns:
+        raise ValueError("the solid k-mer mode reads the patterns twice, pass a re-iterable collection")
+    capacity = len(ListPatterns) if hasattr(ListPatterns, "__len__") else 1 << 20
+    first_sightings = BloomFilter(capacity, error_rate)
+    candidates = {}
+    for pattern in ListPatterns:
+        pattern = normalize_pattern(pattern, canonical)
+        if first_sightings.add(pattern):
+            candidates[pattern] = 0
+    del first_sightings
+    for pattern in ListPatterns:
+        pattern = normalize_pattern(pattern, canonical)
+        if pattern in candidates:
+            candidates[pattern] += 1
+    return {pattern: count for pattern, count in candidates.items() if count >= min_count}
+
+def CompositeGraph(ListPatterns, k, canonical=False, min_count=1, graph_type=Graph, packed=False):
+    """
+    de Bruijn graph of a k-mer collection, one edge per pattern. With canonical=True each pattern adds the edge of
+    its canonical form, which is only meant for counting: the graph stays directed, so its paths do not spell the
+    genome (see PathGraph in Problem27).
+    """
+    Debruijn_graph = graph_type()
     #k = len(ListPatterns[0])
+    solid = solid_kmers(ListPatterns, min_count, canonical) if min_count > 1 else None
+    if packed: # integer node ids: prefix code >> 2 and suffix code & mask, labels decoded only at output
+        if solid is not None:
+            solid = {packed_pattern(pattern)[0] for pattern in solid}
+        bulk = isinstance(Debruijn_graph, CSRGraph) # array-based construction of the CSR backend
+        for codes, length in packed_kmer_blocks(ListPatterns, canonical, vectorized=np is not None):
+            if not isinstance(codes, list):
+                codes = codes.tolist()
+            if solid is not None: # k-mers seen fewer than min_count times are dropped
+                codes = [code for code in codes if code in solid]
+            Debruijn_graph.label_length = length - 1
+            if bulk and length <= 32:
+                Debruijn_graph.add_kmer_codes(codes, length)
+            else:
+                node_mask = (1 << (2 * (length - 1))) - 1
+                for code in codes:
+                    Debruijn_graph.add_edge(code >> 2, code & node_mask)
+        return Debruijn_graph
     for pattern in ListPatterns:
+        pattern = normalize_pattern(pattern, canonical)
+        if solid is not None and pattern not in solid: # k-mer seen fewer than min_count times
+            continue
         Debruijn_graph.add_edge(pattern[:-1], pattern[1:])
     return Debruijn_graph
 
-def find_unexplored_edge_direct(node, visited_edges):
-    """Find an unexplored edge from the given node using direct Graph object."""
-    for neighbor in node.neighbors:
-        if (node.value, neighbor.value) not in visited_edges:
-            return neighbor
-    return None
-
-def eulerian_cycle_direct(graph):
-    """Find an Eulerian cycle in the directed graph using Graph object."""
-    # Count total edges
-    total_edges = sum(len(node.neighbors) for node in graph.nodes.values())
-    
-    # Initialize visited edges set
-    visited_edges = set()
-    
-    # Start from any node
-    start_node = next(iter(graph.nodes.values()))
-    cycle = [start_node]
-    current = start_node
-    
-    # Form initial cycle
-    while True:
-        next_node = find_unexplored_edge_direct(current, visited_edges)
-        if next_node is None:
-            break
-        visited_edges.add((current.value, next_node.value))
-        cycle.append(next_node)
-        current = next_node
-    
-    # While there are unexplored edges
-    while len(visited_edges) < total_edges:
-        # Find a node in cycle with unexplored edges
-        new_start = None
-        for i, node in enumerate(cycle):
-            if find_unexplored_edge_direct(node, visited_edges) is not None:
-                new_start = i
-                break
-        
-        # Form new cycle starting from new_start
-        new_cycle = cycle[new_start:]
-        new_cycle.extend(cycle[1:new_start + 1])
-        cycle = new_cycle
-        
-        # Add the random walk part
-        current = cycle[-1]
-        while True:
-            next_node = find_unexplored_edge_direct(current, visited_edges)
-            if next_node is None:
-                break
-            visited_edges.add((current.value, next_node.value))
-            cycle.append(next_node)
-            current = next_node
-    
-    return [node.value for node in cycle]
-
-def has_eulerian_cycle_direct(graph):
-    """Check if the Graph object has an Eulerian cycle."""
-    # Calculate in-degrees
-    in_degree = defaultdict(int)
-    for node in graph.nodes.values():
-        for neighbor in node.neighbors:
-            in_degree[neighbor.value] += 1
-    
-    # Check if in-degree equals out-degree for each node
-    for node in graph.nodes.values():
-        if len(node.neighbors) != in_degree[node.value]:
-            return False
-    return True
-
-def eulerian_path_direct(graph):
-    """Find an Eulerian path in the directed Graph object."""
-    if not graph.nodes:
-        return None
-    
-    # Calculate in-degrees and out-degrees
-    in_degree = defaultdict(int)
-    out_degree = {}
-    
-    # Initialize degrees
-    for node in graph.nodes.values():
-        out_degree[node.value] = len(node.neighbors)
-        for neighbor in node.neighbors:
-            in_degree[neighbor.value] += 1
-            if neighbor.value not in out_degree:
-                out_degree[neighbor.value] = 0
-        if node.value not in in_degree:
-            in_degree[node.value] = 0
-    
-    # Find start vertex
-    start = None
-    for value, node in graph.nodes.items():
-        if out_degree[value] - in_degree[value] == 1:
-            start = node
-            break
-    if start is None:
-        # If no vertex with out_degree = in_degree + 1, take any vertex with edges
-        for value, node in graph.nodes.items():
-            if out_degree[value] > 0:
-                start = node
-                break
-    
-    if start is None:
-        return None
-    
-    # Hierholzer's algorithm
-    path = []
-    stack = [start]
-    current_path = []
-    
-    remaining_edges = {node.value: list(node.neighbors) for node in graph.nodes.values()}
-    
-    while stack:
-        current = stack[-1]
-        if not remaining_edges[current.value]:
-            current_path.append(stack.pop().value)
-        else:
-            next_vertex = remaining_edges[current.value].pop()
-            stack.append(next_vertex)
-    
-    # Reverse path to get correct order
-    path = current_path[::-1]
-    
-    # Verify that we used all edges
-    total_edges = sum(len(node.neighbors) for node in graph.nodes.values())
-    if len(path) - 1 != total_edges:
-        return None
-    
-    return path
+
+def cached_composite_graph(input_file, graph_dir):
+    """
+    de Bruijn graph of input_file (k line, then the sequence) through a directory of binary graph files: the first
+    run builds it as a packed CSRGraph and writes graph_dir/<input name>.graph with save_graph, later runs map that
+    file with load_graph (the CSR arrays stay on disk, no k-mer is read again). A file older than its input is rebuilt.
+    """
+    cache_path = os.path.join(graph_dir, os.path.splitext(os.path.basename(input_file))[0] + ".graph")
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(input_file):
+        return load_graph(cache_path)
+    records = read_sequences_mmap(input_file)
+    k = int(bytes(next(records)))
+    graph = CompositeGraph(records, k, graph_type=CSRGraph, packed=True)
+    os.makedirs(graph_dir, exist_ok=True)
+    save_graph(graph, cache_path)
+    return graph
+
+def benchmark_eulerian(edge_counts=(10 ** 6, 10 ** 7, 10 ** 8), seed=0):
+    """
+    Time the CSR Eulerian path search on random Eulerian graphs of the given sizes, with int32 node ids and ten edges
+    per node, in the two steps eulerian_path_csr runs: the pre-check (csr_eulerian_start: degree balance, start
+    selection and the strong connectivity pass) and the walk (csr_hierholzer_walk), then their sum. The edges close
+    one random walk, so every graph is connected and balanced by construction.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"{'edges':>11} {'check s':>9} {'walk s':>9} {'total s':>9} {'MiB':>9}")
+    for edge_count in edge_counts:
+        node_count = max(1, edge_count // 10)
+        walk = rng.integers(0, node_count, size=edge_count, dtype=np.int32)
+        targets = np.roll(walk, -1)[np.argsort(walk, kind="stable")]
+        offsets = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(walk, minlength=node_count), out=offsets[1:])
+        multiplicities = np.ones(edge_count, dtype=np.int64) # a repeated target stays a separate entry, still valid
+        del walk
+        start = time.perf_counter()
+        start_node = csr_eulerian_start(offsets, targets, multiplicities, path=True)
+        checked = time.perf_counter()
+        cycle = csr_hierholzer_walk(offsets, targets, multiplicities, start_node)
+        walked = time.perf_counter()
+        assert len(cycle) == edge_count + 1
+        # targets, stack and result, multiplicities and their copy, plus offsets and cursors
+        working_set = 3 * targets.nbytes + 2 * multiplicities.nbytes + 2 * offsets.nbytes
+        print(f"{edge_count:>11} {checked - start:9.2f} {walked - checked:9.2f} {walked - start:9.2f} "
+              f"{working_set / 2 ** 20:9.0f}")
+        del targets, offsets, multiplicities, cycle
 
 
 ################### EVAL FUCTION ###########################
@@ -205,6 +238,84 @@ def read_file_txt(file_path):
     except Exception as error:
         print(f"Error while reading file {file_path}: {error}")
 
+def read_sequences_mmap(file_path):
+    """
+    Memory-mapped reader, yields the sequence of every record as a read-only memoryview slice of the file (no copy).
+    FASTA (">" headers, the sequence may be wrapped over several lines and then keeps its line breaks), FASTQ
+    ("@" header, sequence lines, "+" separator, then quality lines until they are as long as the sequence, so
+    wrapped records and quality lines starting with "@" are read correctly) and plain text (one sequence per
+    non empty line) are supported. Malformed or truncated FASTQ records raise ValueError.
+    The mapping is released once no yielded slice is referenced anymore.
+    """
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    size = len(mapped)
+
+    def line_bounds(start): # (start, end) of every line from start on, trailing spaces and \r excluded
+        while start < size:
+            end = mapped.find(b"\n", start)
+            next_start = size if end == -1 else end + 1
+            end = size if end == -1 else end
+            while end > start and mapped[end - 1] in b" \t\r":
+                end -= 1
+            yield start, end
+            start = next_start
+
+    first = 0
+    while first < size and mapped[first] in b" \t\r\n":
+        first += 1
+    if first == size:
+        return
+    match mapped[first:first + 1]:
+        case b">":
+            start = first
+            while start != -1:
+                sequence_start = mapped.find(b"\n", start) + 1 # skip the header line
+                end = mapped.find(b"\n>", start)
+                next_start = -1 if end == -1 else end + 1
+                end = size if end == -1 else end
+                while end > sequence_start and mapped[end - 1] in b" \t\r\n":
+                    end -= 1
+                if sequence_start > 0 and end > sequence_start:
+                    yield view[sequence_start:end]
+                start = next_start
+        case b"@":
+            lines = line_bounds(first)
+            for start, end in lines: # header line of the next record
+                if end == start:
+                    continue
+                if mapped[start:start + 1] != b"@":
+                    raise ValueError(f"{file_path}: FASTQ header expected at byte {start}")
+                record = start
+                sequence_start = sequence_end = None
+                length = 0 # sequence length without the line breaks
+                for start, end in lines: # sequence lines up to the "+" separator
+                    if mapped[start:start + 1] == b"+":
+                        break
+                    if sequence_start is None:
+                        sequence_start = start
+                    sequence_end = end
+                    length += end - start
+                else:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has no '+' line")
+                quality = 0
+                while quality < length: # quality lines until they cover the sequence
+                    bounds = next(lines, None)
+                    if bounds is None:
+                        raise ValueError(f"{file_path}: FASTQ record at byte {record} is truncated")
+                    quality += bounds[1] - bounds[0]
+                if quality != length:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has {quality} quality values for {length} bases")
+                if length:
+                    yield view[sequence_start:sequence_end]
+        case _:
+            for start, end in line_bounds(first):
+                if end > start:
+                    yield view[start:end]
+
 
 def write_file_txt(file_path, content):
     name_split = file_path.split("/")
@@ -243,26 +354,32 @@ def write_file_txt(file_path, content):
 
 # Getting txt files
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark_eulerian()
+        sys.exit()
+
+    # --graph-dir DIR keeps the built graphs as binary files in DIR and maps them on the next runs
+    graph_dir = sys.argv[sys.argv.index("--graph-dir") + 1] if "--graph-dir" in sys.argv else None
+
     folder_path = "./inputs"
     input_files = glob.glob(f"{folder_path}/*.txt")
 
     # #MODIFY THIS SECTION FOR EACH FUNCTION
     for input_file in input_files:
-        file_load = read_file_txt(input_file)
-        file_load = [l.strip() for l in file_load]
-        k = int(file_load[0])
-        kmers = []
-        for line in file_load[1:]:
-            kmers.append(line)
-        graph_seq = CompositeGraph(kmers, k)
-        if has_eulerian_cycle_direct(graph_seq):
-            cycle = eulerian_cycle_direct(graph_seq)
-            #solution = " -> ".join(map(str, cycle))
-            solution = cycle[0]+''.join(c[-1]for p in path[1:-1])
+        if graph_dir is not None:
+            graph_seq = cached_composite_graph(input_file, graph_dir)
         else:
-            path = eulerian_path_direct(graph_seq)
-            if path:
-                solution = path[0] + "".join(p[-1] for p in path[1:])
-            else:
-                print("Neither Eulerian path nor Eulerian cycle was found.")
+            records = read_sequences_mmap(input_file)
+            k = int(bytes(next(records)))
+            graph_seq = CompositeGraph(records, k, packed=True)
+        try:
+            path = [graph_seq.label(node) for node in eulerian_path_direct(graph_seq)]
+        except EulerianError as error:
+            print(f"{input_file}: {error}")
+            solution = "Neither Eulerian path nor Eulerian cycle was found."
+        else:
+            if path[0] == path[-1]: # a cycle, its last node closes it
+                path = path[:-1]
+            #solution = " -> ".join(map(str, path))
+            solution = PathSpeller.from_node_path(path).getvalue()
         write_file_txt(input_file, solution)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import os
+import random
+import tempfile
+import unittest
+
+from Code31 import (CompositeGraph, CSRGraph, EulerianError, Graph, PathSpeller, cached_composite_graph, edge_arrays,
+                    eulerian_cycle_csr, eulerian_cycle_direct, eulerian_path_csr, eulerian_path_direct,
+                    has_eulerian_cycle_direct, hierholzer_walk)
+
+
+def build(graph_type, edges):
+    graph = graph_type()
+    for source, target in edges:
+        graph.add_edge(source, target)
+    return graph
+
+
+class CSRNodeTest(unittest.TestCase):
+    def test_sort_graph_makes_handles_stale(self):
+        graph = build(CSRGraph, [("C", "A"), ("A", "B")])
+        node = graph.nodes["C"]
+        graph.sort_graph()
+        with self.assertRaises(RuntimeError):
+            node.out_degree()
+        self.assertEqual(graph.nodes["C"].out_degree(), 1)
+
+    def test_sorted_graph_keeps_handles(self):
+        graph = build(CSRGraph, [("A", "B"), ("B", "C")])
+        node = graph.nodes["B"]
+        repr(graph) # sorts, but the ids are already in label order
+        self.assertEqual([neighbor.value for neighbor in node.neighbors], ["C"])
+
+
+class EdgeArraysTest(unittest.TestCase):
+    edges = [("A", "B"), ("B", "C"), ("A", "B"), ("C", "A"), ("B", "A")]
+
+    def test_backends_agree(self):
+        for graph_type in (Graph, CSRGraph):
+            values, offsets, targets, multiplicities, in_degrees = edge_arrays(build(graph_type, self.edges))
+            self.assertEqual(list(values), ["A", "B", "C"])
+            self.assertEqual(list(offsets), [0, 1, 3, 4])
+            self.assertEqual([values[target] for target in targets], ["B", "C", "A", "A"])
+            self.assertEqual(list(multiplicities), [2, 1, 1, 1])
+            self.assertEqual(list(in_degrees), [2, 2, 1])
+
+    def test_hierholzer_uses_every_edge(self):
+        rng = random.Random(3)
+        walk = [rng.choice("ABCDE") for _ in range(60)]
+        walk.append(walk[0])
+        edges = list(zip(walk, walk[1:]))
+        for graph_type in (Graph, CSRGraph):
+            values, offsets, targets, multiplicities, _ = edge_arrays(build(graph_type, edges))
+            nodes, edge_ids = hierholzer_walk(offsets, targets, multiplicities, list(values).index(walk[0]))
+            spelled = [values[node_id] for node_id in nodes]
+            self.assertEqual(sorted(zip(spelled, spelled[1:])), sorted(edges))
+            entries = [entry for entry, multiplicity in enumerate(multiplicities) for _ in range(multiplicity)]
+            self.assertEqual([values[targets[entries[edge]]] for edge in edge_ids], spelled[1:])
+
+    def test_parallel_edges_used_once_each(self):
+        edges = [("A", "B")] * 3 + [("B", "A")] * 3 + [("B", "C"), ("C", "B")]
+        for graph_type in (Graph, CSRGraph):
+            graph = build(graph_type, edges)
+            for find in (eulerian_cycle_direct, eulerian_path_direct):
+                path, edge_ids = find(graph, with_edges=True)
+                self.assertEqual(sorted(edge_ids), list(range(len(edges))))
+                self.assertEqual(len(path), len(edges) + 1)
+                self.assertEqual(sorted(zip(path, path[1:])), sorted(edges))
+
+
+class EulerianTest(unittest.TestCase):
+    def test_cycle_and_path(self):
+        for graph_type in (Graph, CSRGraph):
+            cycle = eulerian_cycle_direct(build(graph_type, [(0, 1), (1, 2), (2, 0), (2, 3), (3, 2)]))
+            self.assertEqual((len(cycle), cycle[0]), (6, cycle[-1]))
+            path = eulerian_path_direct(build(graph_type, [(0, 1), (1, 2), (2, 1), (1, 3)]))
+            self.assertEqual((path[0], path[-1], len(path)), (0, 3, 5))
+
+    def test_split_balanced_graph_raises_with_components(self):
+        for graph_type in (Graph, CSRGraph):
+            graph = build(graph_type, [(0, 1), (1, 0), (2, 3), (3, 2)])
+            graph.add_node(4) # nodes without edges are not a component of their own
+            with self.assertRaises(EulerianError) as caught:
+                eulerian_cycle_direct(graph)
+            self.assertEqual(sorted(map(sorted, caught.exception.components)), [[0, 1], [2, 3]])
+            self.assertFalse(has_eulerian_cycle_direct(graph))
+            with self.assertRaises(EulerianError):
+                eulerian_path_direct(graph)
+
+    def test_path_needs_one_start_and_one_end(self):
+        for graph_type in (Graph, CSRGraph):
+            graph = build(graph_type, [(0, 1), (0, 2)])
+            with self.assertRaises(EulerianError) as caught:
+                eulerian_path_direct(graph)
+            self.assertEqual(caught.exception.components, [])
+            self.assertFalse(has_eulerian_cycle_direct(graph))
+        with self.assertRaises(EulerianError):
+            eulerian_path_direct(Graph())
+
+    def test_path_split_by_a_cycle(self):
+        # 0 -> 1 balances like a path, the 2 <-> 3 cycle is never reached from it
+        with self.assertRaises(EulerianError) as caught:
+            eulerian_path_direct(build(Graph, [(0, 1), (2, 3), (3, 2)]))
+        self.assertEqual(len(caught.exception.components), 2)
+
+    def test_message_names_decoded_labels(self):
+        graph = CompositeGraph(["AAC", "ACG", "TTG", "TGT", "GTT"], 3, packed=True)
+        with self.assertRaises(EulerianError) as caught:
+            eulerian_path_direct(graph)
+        self.assertIn("AA", str(caught.exception))
+
+
+class EulerianCSRTest(unittest.TestCase):
+    def spelled(self, graph, walk):
+        return [graph.labels[node_id] for node_id in walk.tolist()]
+
+    def test_walks_use_every_edge(self):
+        edges = [("A", "B"), ("B", "C"), ("C", "A"), ("C", "D"), ("D", "C")]
+        graph = build(CSRGraph, edges)
+        cycle = self.spelled(graph, eulerian_cycle_csr(graph))
+        self.assertEqual(sorted(zip(cycle, cycle[1:])), sorted(edges))
+        graph = build(CSRGraph, edges + [("D", "E")])
+        path = self.spelled(graph, eulerian_path_csr(graph))
+        self.assertEqual((path[0], path[-1]), ("D", "E"))
+        self.assertIsNone(eulerian_cycle_csr(graph))
+
+    def test_parallel_edges_counted(self):
+        edges = [("A", "B")] * 3 + [("B", "A")] * 2 + [("B", "C"), ("C", "A")]
+        graph = build(CSRGraph, edges)
+        self.assertEqual(len(graph.targets), 4) # one entry per distinct edge
+        cycle = self.spelled(graph, eulerian_cycle_csr(graph))
+        self.assertEqual(sorted(zip(cycle, cycle[1:])), sorted(edges))
+        graph.add_edge("A", "B") # A is left with one more edge out than in
+        self.assertIsNone(eulerian_cycle_csr(graph))
+        path = self.spelled(graph, eulerian_path_csr(graph))
+        self.assertEqual((path[0], path[-1], len(path)), ("A", "B", len(edges) + 2))
+
+    def test_degree_check(self):
+        graph = build(CSRGraph, [("A", "B"), ("A", "C")])
+        self.assertIsNone(eulerian_path_csr(graph))
+        self.assertIsNone(eulerian_cycle_csr(graph))
+        self.assertIsNone(eulerian_path_csr(CSRGraph()))
+
+    def test_components_check(self):
+        graph = build(CSRGraph, [("A", "B"), ("B", "A"), ("C", "D"), ("D", "C")])
+        self.assertIsNone(eulerian_cycle_csr(graph))
+        self.assertIsNone(eulerian_path_csr(graph))
+        self.assertIsNone(eulerian_path_csr(build(CSRGraph, [("A", "B"), ("C", "D"), ("D", "C")])))
+
+    def test_matches_graph_walkers(self):
+        generator = random.Random(3)
+        for _ in range(200):
+            edges = [(generator.randrange(6), generator.randrange(6)) for _ in range(generator.randint(1, 10))]
+            try:
+                eulerian_path_direct(build(Graph, edges))
+            except EulerianError:
+                expected = None
+            else:
+                expected = sorted(edges)
+            graph = build(CSRGraph, edges)
+            path = eulerian_path_csr(graph)
+            if path is not None:
+                path = self.spelled(graph, path)
+                path = sorted(zip(path, path[1:]))
+            self.assertEqual(path, expected)
+
+
+class GraphCacheTest(unittest.TestCase):
+    def test_second_run_maps_the_saved_graph(self):
+        text = "".join(random.Random(6).choice("ACGT") for _ in range(300))
+        with tempfile.TemporaryDirectory() as directory:
+            input_file = os.path.join(directory, "genome.txt")
+            with open(input_file, "w") as file:
+                file.write("12\n" + "\n".join(text[i:i + 12] for i in range(len(text) - 11)) + "\n")
+            graph_dir = os.path.join(directory, "graphs")
+            built = cached_composite_graph(input_file, graph_dir)
+            self.assertTrue(os.path.exists(os.path.join(graph_dir, "genome.graph")))
+            loaded = cached_composite_graph(input_file, graph_dir)
+            self.assertFalse(loaded.csr_targets.flags.writeable) # a view on the mapped file, not a copy
+            self.assertEqual(repr(loaded), repr(built))
+            path = [loaded.label(node) for node in eulerian_path_direct(loaded)]
+            self.assertEqual(PathSpeller.from_node_path(path).getvalue(), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,33 @@
-from collections import defaultdict
 import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.spelling import PathSpeller
+from dnagraph.csr import CSRGraph # backend for CompositeGraph(..., graph_type=CSRGraph)
+from dnagraph.eulerian import eulerian_cycle_direct
 
 class Node:
     def __init__(self, value):
         self.value = value  # Unique identifier or data for the node
-        self.neighbors = []  # List to store references to neighboring Node objects
+        self.edges = {}  # Neighboring Node -> multiplicity, each distinct edge is stored once
+        self.in_count = 0  # edges entering / leaving the node, kept up to date by add_neighbor
+        self.out_count = 0
+
+    def add_neighbor(self, neighbor_node, multiplicity=1):
+        self.edges[neighbor_node] = self.edges.get(neighbor_node, 0) + multiplicity
+        self.out_count += multiplicity
+        neighbor_node.in_count += multiplicity
+
+    @property
+    def neighbors(self): #Re-expanded with the multiplicities, only for the code that needs every parallel edge
+        return [neighbor for neighbor, multiplicity in self.edges.items() for _ in range(multiplicity)]
+
+    def out_degree(self):
+        return self.out_count
 
-    def add_neighbor(self, neighbor_node):
-        # if neighbor_node not in self.neighbors: #For unique Nodes
-        # self.neighbors.append(neighbor_node)
-        self.neighbors.append(neighbor_node)
+    def in_degree(self):
+        return self.in_count
 
     def __repr__(self):
         return f"{self.value}"
@@ -56,141 +74,14 @@ class Graph:
                 graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
         return graph_repr
 
-def CompositeGraph(ListPatterns, k):
-    Debruijn_graph = Graph()
+
+def CompositeGraph(ListPatterns, k, graph_type=Graph):
+    Debruijn_graph = graph_type()
     # k = len(ListPatterns[0])
     for pattern in ListPatterns:
         Debruijn_graph.add_edge(pattern[:-1], pattern[1:])
     return Debruijn_graph
 
-def find_unexplored_edge_direct(node, visited_edges):
-    """Find an unexplored edge from the given node using direct Graph object."""
-    for neighbor in node.neighbors:
-        if (node.value, neighbor.value) not in visited_edges:
-            return neighbor
-    return None
-
-def eulerian_cycle_direct(graph):
-    """Find an Eulerian cycle in the directed graph using Graph object."""
-    # Count total edges
-    total_edges = sum(len(node.neighbors) for node in graph.nodes.values())
-
-    # Initialize visited edges set
-    visited_edges = set()
-
-    # Start from any node
-    start_node = next(iter(graph.nodes.values()))
-    cycle = [start_node]
-    current = start_node
-
-    # Form initial cycle
-    while True:
-        next_node = find_unexplored_edge_direct(current, visited_edges)
-        if next_node is None:
-            break
-        visited_edges.add((current.value, next_node.value))
-        cycle.append(next_node)
-        current = next_node
-
-    # While there are unexplored edges
-    while len(visited_edges) < total_edges:
-        # Find a node in cycle with unexplored edges
-        new_start = None
-        for i, node in enumerate(cycle):
-            if find_unexplored_edge_direct(node, visited_edges) is not None:
-                new_start = i
-                break
-
-        # Form new cycle starting from new_start
-        new_cycle = cycle[new_start:]
-        new_cycle.extend(cycle[1:new_start + 1])
-        cycle = new_cycle
-
-        # Add the random walk part
-        current = cycle[-1]
-        while True:
-            next_node = find_unexplored_edge_direct(current, visited_edges)
-            if next_node is None:
-                break
-            visited_edges.add((current.value, next_node.value))
-            cycle.append(next_node)
-            current = next_node
-
-    return [node.value for node in cycle]
-
-def has_eulerian_cycle_direct(graph):
-    """Check if the Graph object has an Eulerian cycle."""
-    # Calculate in-degrees
-    in_degree = defaultdict(int)
-    for node in graph.nodes.values():
-        for neighbor in node.neighbors:
-            in_degree[neighbor.value] += 1
-
-    # Check if in-degree equals out-degree for each node
-    for node in graph.nodes.values():
-        if len(node.neighbors) != in_degree[node.value]:
-            return False
-    return True
-
-def eulerian_path_direct(graph):
-    """Find an Eulerian path in the directed Graph object."""
-    if not graph.nodes:
-        return None
-
-    # Calculate in-degrees and out-degrees
-    in_degree = defaultdict(int)
-    out_degree = {}
-
-    # Initialize degrees
-    for node in graph.nodes.values():
-        out_degree[node.value] = len(node.neighbors)
-        for neighbor in node.neighbors:
-            in_degree[neighbor.value] += 1
-            if neighbor.value not in out_degree:
-                out_degree[neighbor.value] = 0
-        if node.value not in in_degree:
-            in_degree[node.value] = 0
-
-    # Find start vertex
-    start = None
-    for value, node in graph.nodes.items():
-        if out_degree[value] - in_degree[value] == 1:
-            start = node
-            break
-    if start is None:
-        # If no vertex with out_degree = in_degree + 1, take any vertex with edges
-        for value, node in graph.nodes.items():
-            if out_degree[value] > 0:
-                start = node
-                break
-
-    if start is None:
-        return None
-
-    # Hierholzer's algorithm
-    path = []
-    stack = [start]
-    current_path = []
-
-    remaining_edges = {node.value: list(node.neighbors) for node in graph.nodes.values()}
-
-    while stack:
-        current = stack[-1]
-        if not remaining_edges[current.value]:
-            current_path.append(stack.pop().value)
-        else:
-            next_vertex = remaining_edges[current.value].pop()
-            stack.append(next_vertex)
-
-    # Reverse path to get correct order
-    path = current_path[::-1]
-
-    # Verify that we used all edges
-    total_edges = sum(len(node.neighbors) for node in graph.nodes.values())
-    if len(path) - 1 != total_edges:
-        return None
-
-    return path
 
 def generate_binary_kmers(k):
     """Generate all possible binary k-mers."""
@@ -230,17 +121,12 @@ def universal_circular_string(k):
         graph.add_edge(kmer, kmer[1:] + "0")
         graph.add_edge(kmer, kmer[1:] + "1")
 
-    # Find Eulerian cycle
+    # Find Eulerian cycle, the binary de Bruijn graph is balanced and strongly connected
     cycle = eulerian_cycle_direct(graph)
 
-    if not cycle:
-        return None
-
     # Construct the universal string
     # We need only k-1 characters from each vertex except the first one
-    result = cycle[0]
-    for i in range(1, len(cycle)):
-        result += cycle[i][-1]
+    result = PathSpeller.from_node_path(cycle).getvalue()
 
     return result[:-k + 1]  # Remove last k-1 characters as they overlap with the beginning
 
@@ -1,16 +1,35 @@
-from collections import defaultdict
 import glob
+import mmap
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.spelling import PathSpeller
+from dnagraph.csr import CSRGraph # backend for PairedCompositeGraph(..., graph_type=CSRGraph)
+from dnagraph.eulerian import EulerianError, eulerian_path_direct
 
 
 class Node:
     def __init__(self, value):
         self.value = value  # Unique identifier or data for the node
-        self.neighbors = []  # List to store references to neighboring Node objects
+        self.edges = {}  # Neighboring Node -> multiplicity, each distinct edge is stored once
+        self.in_count = 0  # edges entering / leaving the node, kept up to date by add_neighbor
+        self.out_count = 0
+
+    def add_neighbor(self, neighbor_node, multiplicity=1):
+        self.edges[neighbor_node] = self.edges.get(neighbor_node, 0) + multiplicity
+        self.out_count += multiplicity
+        neighbor_node.in_count += multiplicity
+
+    @property
+    def neighbors(self): #Re-expanded with the multiplicities, only for the code that needs every parallel edge
+        return [neighbor for neighbor, multiplicity in self.edges.items() for _ in range(multiplicity)]
+
+    def out_degree(self):
+        return self.out_count
 
-    def add_neighbor(self, neighbor_node):
-        # if neighbor_node not in self.neighbors: #For unique Nodes
-        # self.neighbors.append(neighbor_node)
-        self.neighbors.append(neighbor_node)
+    def in_degree(self):
+        return self.in_count
 
     def __repr__(self):
         return f"{self.value}"
@@ -57,159 +76,35 @@ class Graph:
                 graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
         return graph_repr
 
+
 def prefix(text):
     return text[:-1]
 
 def suffix(text):
     return text[1:]
 
-def PairedCompositeGraph(ListPairedPatterns, k):
-    Debruijn_graph = Graph()
+def PairedCompositeGraph(ListPairedPatterns, k, graph_type=Graph):
+    Debruijn_graph = graph_type()
     # k = len(ListPatterns[0])
     for pattern in ListPairedPatterns:
+        if not isinstance(pattern, str): # bytes-like records (see read_sequences_mmap)
+            pattern = str(pattern, "ascii")
         (seq1, seq2) = pattern.split("|")
         Debruijn_graph.add_edge("|".join([prefix(seq1),prefix(seq2)]), "|".join([suffix(seq1),suffix(seq2)]))
     return Debruijn_graph
 
-def find_unexplored_edge_direct(node, visited_edges):
-    """Find an unexplored edge from the given node using direct Graph object."""
-    for neighbor in node.neighbors:
-        if (node.value, neighbor.value) not in visited_edges:
-            return neighbor
-    return None
-
-def eulerian_cycle_direct(graph):
-    """Find an Eulerian cycle in the directed graph using Graph object."""
-    # Count total edges
-    total_edges = sum(len(node.neighbors) for node in graph.nodes.values())
-
-    # Initialize visited edges set
-    visited_edges = set()
-
-    # Start from any node
-    start_node = next(iter(graph.nodes.values()))
-    cycle = [start_node]
-    current = start_node
-
-    # Form initial cycle
-    while True:
-        next_node = find_unexplored_edge_direct(current, visited_edges)
-        if next_node is None:
-            break
-        visited_edges.add((current.value, next_node.value))
-        cycle.append(next_node)
-        current = next_node
-
-    # While there are unexplored edges
-    while len(visited_edges) < total_edges:
-        # Find a node in cycle with unexplored edges
-        new_start = None
-        for i, node in enumerate(cycle):
-            if find_unexplored_edge_direct(node, visited_edges) is not None:
-                new_start = i
-                break
-
-        # Form new cycle starting from new_start
-        new_cycle = cycle[new_start:]
-        new_cycle.extend(cycle[1:new_start + 1])
-        cycle = new_cycle
-
-        # Add the random walk part
-        current = cycle[-1]
-        while True:
-            next_node = find_unexplored_edge_direct(current, visited_edges)
-            if next_node is None:
-                break
-            visited_edges.add((current.value, next_node.value))
-            cycle.append(next_node)
-            current = next_node
-
-    return [node.value for node in cycle]
-
-def has_eulerian_cycle_direct(graph):
-    """Check if the Graph object has an Eulerian cycle."""
-    # Calculate in-degrees
-    in_degree = defaultdict(int)
-    for node in graph.nodes.values():
-        for neighbor in node.neighbors:
-            in_degree[neighbor.value] += 1
-
-    # Check if in-degree equals out-degree for each node
-    for node in graph.nodes.values():
-        if len(node.neighbors) != in_degree[node.value]:
-            return False
-    return True
-
-def eulerian_path_direct(graph):
-    """Find an Eulerian path in the directed Graph object."""
-    if not graph.nodes:
-        return None
-
-    # Calculate in-degrees and out-degrees
-    in_degree = defaultdict(int)
-    out_degree = {}
-
-    # Initialize degrees
-    for node in graph.nodes.values():
-        out_degree[node.value] = len(node.neighbors)
-        for neighbor in node.neighbors:
-            in_degree[neighbor.value] += 1
-            if neighbor.value not in out_degree:
-                out_degree[neighbor.value] = 0
-        if node.value not in in_degree:
-            in_degree[node.value] = 0
-
-    # Find start vertex
-    start = None
-    for value, node in graph.nodes.items():
-        if out_degree[value] - in_degree[value] == 1:
-            start = node
-            break
-    if start is None:
-        # If no vertex with out_degree = in_degree + 1, take any vertex with edges
-        for value, node in graph.nodes.items():
-            if out_degree[value] > 0:
-                start = node
-                break
-
-    if start is None:
-        return None
-
-    # Hierholzer's algorithm
-    path = []
-    stack = [start]
-    current_path = []
-
-    remaining_edges = {node.value: list(node.neighbors) for node in graph.nodes.values()}
-
-    while stack:
-        current = stack[-1]
-        if not remaining_edges[current.value]:
-            current_path.append(stack.pop().value)
-        else:
-            next_vertex = remaining_edges[current.value].pop()
-            stack.append(next_vertex)
-
-    # Reverse path to get correct order
-    path = current_path[::-1]
-
-    # Verify that we used all edges
-    total_edges = sum(len(node.neighbors) for node in graph.nodes.values())
-    if len(path) - 1 != total_edges:
-        return None
-
-    return path
 
 def glue_sequences(path, k, d):
     glued = ''
-    seq1_array = []
-    seq2_array = []
-    for seq in path:
+    for_seq = PathSpeller() # first reads: first one whole, then the last symbol of each
+    rev_seq = PathSpeller() # second reads: first symbol of each, then the rest of the last one
+    for i, seq in enumerate(path):
         seq1, seq2 = seq.split("|")
-        seq1_array.append(seq1)
-        seq2_array.append(seq2)
-    for_seq = seq1_array[0] + "".join([x[-1] for x in seq1_array[1:]])
-    rev_seq = "".join(x[0] for x in seq2_array[:-1]) + seq2_array[-1]
+        for_seq.append(seq1 if i == 0 else seq1[-1])
+        rev_seq.append(seq2[0])
+    rev_seq.append(seq2[1:])
+    for_seq = for_seq.getvalue()
+    rev_seq = rev_seq.getvalue()
     glued += for_seq[:k+d] + rev_seq
     return glued
 
@@ -244,6 +139,84 @@ def read_file_txt(file_path):
     except Exception as error:
         print(f"Error while reading file {file_path}: {error}")
 
+def read_sequences_mmap(file_path):
+    """
+    Memory-mapped reader, yields the sequence of every record as a read-only memoryview slice of the file (no copy).
+    FASTA (">" headers, the sequence may be wrapped over several lines and then keeps its line breaks), FASTQ
+    ("@" header, sequence lines, "+" separator, then quality lines until they are as long as the sequence, so
+    wrapped records and quality lines starting with "@" are read correctly) and plain text (one sequence per
+    non empty line) are supported. Malformed or truncated FASTQ records raise ValueError.
+    The mapping is released once no yielded slice is referenced anymore.
+    """
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    size = len(mapped)
+
+    def line_bounds(start): # (start, end) of every line from start on, trailing spaces and \r excluded
+        while start < size:
+            end = mapped.find(b"\n", start)
+            next_start = size if end == -1 else end + 1
+            end = size if end == -1 else end
+            while end > start and mapped[end - 1] in b" \t\r":
+                end -= 1
+            yield start, end
+            start = next_start
+
+    first = 0
+    while first < size and mapped[first] in b" \t\r\n":
+        first += 1
+    if first == size:
+        return
+    match mapped[first:first + 1]:
+        case b">":
+            start = first
+            while start != -1:
+                sequence_start = mapped.find(b"\n", start) + 1 # skip the header line
+                end = mapped.find(b"\n>", start)
+                next_start = -1 if end == -1 else end + 1
+                end = size if end == -1 else end
+                while end > sequence_start and mapped[end - 1] in b" \t\r\n":
+                    end -= 1
+                if sequence_start > 0 and end > sequence_start:
+                    yield view[sequence_start:end]
+                start = next_start
+        case b"@":
+            lines = line_bounds(first)
+            for start, end in lines: # header line of the next record
+                if end == start:
+                    continue
+                if mapped[start:start + 1] != b"@":
+                    raise ValueError(f"{file_path}: FASTQ header expected at byte {start}")
+                record = start
+                sequence_start = sequence_end = None
+                length = 0 # sequence length without the line breaks
+                for start, end in lines: # sequence lines up to the "+" separator
+                    if mapped[start:start + 1] == b"+":
+                        break
+                    if sequence_start is None:
+                        sequence_start = start
+                    sequence_end = end
+                    length += end - start
+                else:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has no '+' line")
+                quality = 0
+                while quality < length: # quality lines until they cover the sequence
+                    bounds = next(lines, None)
+                    if bounds is None:
+                        raise ValueError(f"{file_path}: FASTQ record at byte {record} is truncated")
+                    quality += bounds[1] - bounds[0]
+                if quality != length:
+                    raise ValueError(f"{file_path}: FASTQ record at byte {record} has {quality} quality values for {length} bases")
+                if length:
+                    yield view[sequence_start:sequence_end]
+        case _:
+            for start, end in line_bounds(first):
+                if end > start:
+                    yield view[start:end]
+
 
 def write_file_txt(file_path, content):
     name_split = file_path.split("/")
@@ -270,23 +243,15 @@ if __name__ == "__main__":
 
     # #MODIFY THIS SECTION FOR EACH FUNCTION
     for input_file in input_files:
-        file_load = read_file_txt(input_file)
-        file_load = [l.strip() for l in file_load]
-        (k,d) = map(int,file_load[0].split(' '))
-        kmers = []
-        for line in file_load[1:]:
-            kmers.append(line)
-        graph_seq = PairedCompositeGraph(kmers, k)
-        # We suppose all graphs and sequences received are strongly connected
-        if has_eulerian_cycle_direct(graph_seq):
-            cycle = eulerian_cycle_direct(graph_seq)
-            #print("Eulerian cycle:", " -> ".join(map(str, cycle)))
-            solution: glue_sequences(cycle, k, d)
-        else:
+        records = read_sequences_mmap(input_file)
+        (k, d) = map(int, bytes(next(records)).split())
+        graph_seq = PairedCompositeGraph(records, k)
+        try: # a path, or a cycle when the graph is balanced
             path = eulerian_path_direct(graph_seq)
-            if path:
-                #print("Eulerian path:", " -> ".join(map(str, path)))
-                solution = glue_sequences(path, k, d)
-            else:
-                solution = "Neither Eulerian path nor Eulerian cycle was found."
+        except EulerianError as error:
+            print(f"{input_file}: {error}")
+            solution = "Neither Eulerian path nor Eulerian cycle was found."
+        else:
+            #print("Eulerian path:", " -> ".join(map(str, path)))
+            solution = glue_sequences(path, k, d)
         write_file_txt(input_file, solution)
\ No newline at end of file
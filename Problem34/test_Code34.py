@@ -0,0 +1,141 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from Code34 import (BaseSymbols, BOSSGraph, CSRGraph, CompositeGraph, ImplicitDeBruijnGraph, RankSelectBits,
+                    ZeroPositions, encode_kmer, find_contigs, load_graph, save_graph)
+
+KMERS = ["ATGG", "TGGG", "GGGT", "GGTA", "GTAT", "TATG", "ATGA", "TGAT", "GATG", "CCCC", "AAAC"]
+
+
+def boss_graph(kmers, k=4):
+    return BOSSGraph(np.array(sorted({encode_kmer(kmer) for kmer in kmers}), dtype=np.uint64), k)
+
+
+class RankSelectTest(unittest.TestCase):
+    def check_bits(self, vector, bits):
+        ones = [i for i, bit in enumerate(bits) if bit]
+        self.assertEqual([vector[i] for i in range(len(bits))], bits)
+        for i in range(len(bits) + 1):
+            self.assertEqual(vector.rank1(i), sum(bits[:i]))
+        for r, position in enumerate(ones):
+            self.assertEqual(vector.select1(r), position)
+
+    def test_bit_vectors_match_naive_counts(self):
+        generator = random.Random(1)
+        for density in (0.5, 0.97):
+            bits = [int(generator.random() < density) for _ in range(1500)]
+            self.check_bits(RankSelectBits(bits), bits)
+            self.check_bits(ZeroPositions(bits), bits)
+
+    def test_base_symbols_match_naive_counts(self):
+        generator = random.Random(2)
+        # $ (0) and flagged (9-12) edges are rare in practice, frequent here so that blocks hold some
+        symbols = [generator.choice((0, 1, 2, 3, 4, 1, 2, 3, 4, 9, 10, 11, 12)) for _ in range(1300)]
+        W = BaseSymbols(symbols)
+        self.assertEqual([W[i] for i in range(len(symbols))], symbols)
+        for symbol in (1, 2, 3, 4, 9, 10, 11, 12):
+            positions = [i for i, value in enumerate(symbols) if value == symbol]
+            for i in range(0, len(symbols) + 1, 7):
+                self.assertEqual(W.rank(symbol, i), sum(position < i for position in positions))
+            for r, position in enumerate(positions):
+                self.assertEqual(W.select(symbol, r), position)
+
+
+class BOSSGraphTest(unittest.TestCase):
+    def test_matches_csr_graph(self):
+        generator = random.Random(3)
+        genome = "".join(generator.choice("ACGT") for _ in range(1500))
+        kmers = sorted({genome[i:i + 9] for i in range(len(genome) - 8)} | {"CCCCCCCCC", "ACGTACGTA"})
+        graph = boss_graph(kmers, k=9)
+        reference = CompositeGraph(kmers, 9, graph_type=CSRGraph)
+        labels = [graph.label(node) for node in range(graph.node_count)]
+        self.assertEqual(sorted(labels), sorted(reference.labels))
+        successors = {label: sorted(neighbor.value for neighbor in reference.get_node(label).neighbors)
+                      for label in labels}
+        predecessors = {label: [] for label in labels}
+        for label, targets in successors.items():
+            for target in targets:
+                predecessors[target].append(label)
+        for node, label in enumerate(labels):
+            self.assertEqual(sorted(labels[target] for target in graph.successors(node)), successors[label])
+            self.assertEqual(sorted(labels[source] for source in graph.backward(node)), sorted(predecessors[label]))
+            self.assertEqual(graph.indegree(node), len(predecessors[label]))
+            for symbol, base in enumerate("ACGT", 1):
+                target = graph.forward(node, symbol)
+                expected = label[1:] + base if label[1:] + base in successors[label] else None
+                self.assertEqual(None if target is None else labels[target], expected)
+
+    def test_node_protocol_and_path_labels(self):
+        graph = boss_graph(KMERS)
+        labels = [graph.label(node) for node in range(graph.node_count)]
+        for node in graph.nodes:
+            self.assertEqual(graph.out_degree(node), len(graph.successors(node)))
+            self.assertEqual(graph.in_degree(node), len(graph.predecessors(node)))
+            self.assertEqual(graph.predecessors(node), graph.backward(node))
+        for contig in find_contigs(graph):
+            self.assertEqual(graph.path_labels(contig), [labels[node] for node in contig])
+        self.assertEqual(graph.path_labels([]), [])
+
+    def test_bits_per_edge(self):
+        generator = random.Random(4)
+        genome = "".join(generator.choice("ACGT") for _ in range(20000))
+        graph = BOSSGraph.from_patterns([genome[i:i + 25] for i in range(len(genome) - 24)])
+        self.assertLess(graph.bits_per_edge(), 4)
+
+
+class ImplicitGraphTest(unittest.TestCase):
+    def test_matches_stored_graph(self):
+        generator = random.Random(5)
+        genome = "".join(generator.choice("ACGT") for _ in range(800))
+        kmers = sorted({genome[i:i + 7] for i in range(len(genome) - 6)} | {"TTTTTTT"})
+        graph = ImplicitDeBruijnGraph.from_patterns(kmers + kmers[:10]) # duplicates are not kept
+        reference = CompositeGraph(kmers, 7)
+        self.assertEqual(repr(graph), repr(reference))
+        labels = sorted(graph.label(value) for value in graph.nodes)
+        self.assertEqual(labels, sorted(reference.nodes))
+        self.assertEqual(len(graph.nodes), len(labels))
+        for value in graph.nodes:
+            node, expected = graph.nodes[value], reference.get_node(graph.label(value))
+            self.assertEqual(node.out_degree(), expected.out_degree())
+            self.assertEqual(node.in_degree(), expected.in_degree())
+            self.assertEqual(sorted(map(graph.label, graph.predecessors(value))),
+                             sorted(label for label in labels if expected in reference.get_node(label).edges))
+        self.assertNotIn(encode_kmer("GGGGGG"), graph.nodes)
+
+    def test_contigs_match_stored_graph(self):
+        graph = ImplicitDeBruijnGraph.from_patterns(KMERS)
+        spelled = sorted(tuple(graph.label(value) for value in contig) for contig in find_contigs(graph))
+        self.assertEqual(spelled, sorted(tuple(contig) for contig in find_contigs(CompositeGraph(KMERS, 4))))
+
+
+class BOSSSaveTest(unittest.TestCase):
+    def test_round_trip_keeps_labels(self):
+        graph = boss_graph(KMERS)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "boss.bin")
+            save_graph(graph, path)
+            loaded = load_graph(path)
+            self.assertEqual(repr(loaded), repr(graph))
+            self.assertEqual(repr(loaded), repr(CompositeGraph(KMERS, 4, graph_type=CSRGraph)))
+            self.assertIsNone(loaded.label_length)
+            self.assertEqual(sorted(loaded.labels), sorted(graph.label(value) for value in graph.nodes))
+
+
+class FindContigsTest(unittest.TestCase):
+    def spelled(self, graph):
+        return sorted(tuple(graph.label(value) for value in contig) for contig in find_contigs(graph))
+
+    def test_backends_agree(self):
+        expected = self.spelled(CompositeGraph(KMERS, 4))
+        self.assertIn(("ATG", "TGG", "GGG", "GGT", "GTA", "TAT", "ATG"), expected)
+        self.assertEqual(self.spelled(CompositeGraph(KMERS, 4, graph_type=CSRGraph)), expected)
+        self.assertEqual(self.spelled(CompositeGraph(KMERS, 4, graph_type=CSRGraph, packed=True)), expected)
+        self.assertEqual(self.spelled(boss_graph(KMERS)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
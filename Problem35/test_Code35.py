@@ -0,0 +1,33 @@
+import random
+import unittest
+
+from Code35 import CSRGraph, EulerianError, Graph, PairedCompositeGraph, StringReconstruction
+
+
+def random_dna(length, seed=0):
+    generator = random.Random(seed)
+    return "".join(generator.choice("ACGT") for _ in range(length))
+
+
+class StringReconstructionTest(unittest.TestCase):
+    def test_every_backend_spells_the_text(self):
+        text = random_dna(3000, 1)
+        kmers = [text[i:i + 25] for i in range(len(text) - 24)]
+        random.Random(1).shuffle(kmers)
+        for graph_type in (Graph, CSRGraph, "implicit", "boss"):
+            self.assertEqual(StringReconstruction(kmers, graph_type), text)
+
+    def test_no_eulerian_path(self):
+        for graph_type in (Graph, "implicit", "boss"):
+            with self.assertRaises(EulerianError):
+                StringReconstruction(["AAC", "AAG", "AAT"], graph_type)
+
+    def test_read_pairs_need_a_pair_backend(self):
+        with self.assertRaises(ValueError):
+            PairedCompositeGraph(["GAGA|TTGA"], 4, graph_type="boss")
+        with self.assertRaises(ValueError):
+            StringReconstruction(["ACG"], "suffix array")
+
+
+if __name__ == "__main__":
+    unittest.main()
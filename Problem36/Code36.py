@@ -11,19 +11,44 @@ Given: A collection of k-mers Patterns.
 Return: All contigs in DeBruijn(Patterns). (You may return the strings in any order.)
 """
 
-from collections import defaultdict
 import glob
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the CSR graph backend and the binary graph format
+    np = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) # shared dnagraph package at the repo root
+from dnagraph.csr import CSRGraph
+from dnagraph.implicit import ImplicitDeBruijnGraph
+from dnagraph.boss import BOSSGraph
+
+KMER_GRAPH_TYPES = {"implicit": ImplicitDeBruijnGraph, "boss": BOSSGraph} # graph_type -> backend built from k-mers
 
 
 class Node:
     def __init__(self, value):
         self.value = value  # Unique identifier or data for the node
-        self.neighbors = []  # List to store references to neighboring Node objects
+        self.edges = {}  # Neighboring Node -> multiplicity, each distinct edge is stored once
+        self.in_count = 0  # edges entering / leaving the node, kept up to date by add_neighbor
+        self.out_count = 0
+
+    def add_neighbor(self, neighbor_node, multiplicity=1):
+        self.edges[neighbor_node] = self.edges.get(neighbor_node, 0) + multiplicity
+        self.out_count += multiplicity
+        neighbor_node.in_count += multiplicity
 
-    def add_neighbor(self, neighbor_node):
-        # if neighbor_node not in self.neighbors: #For unique Nodes
-        # self.neighbors.append(neighbor_node)
-        self.neighbors.append(neighbor_node)
+    @property
+    def neighbors(self): #Re-expanded with the multiplicities, only for the code that needs every parallel edge
+        return [neighbor for neighbor, multiplicity in self.edges.items() for _ in range(multiplicity)]
+
+    def out_degree(self):
+        return self.out_count
+
+    def in_degree(self):
+        return self.in_count
 
     def __repr__(self):
         return f"{self.value}"
@@ -72,34 +97,84 @@ class Graph:
         return graph_repr
 
 
-def MaximalNonBranchingPaths(graph):
-    # Calculate in-degrees and out-degrees
-    in_degree = defaultdict(int)
-    out_degree = defaultdict(int)
-    for node_val, node_obj in graph.nodes.items():
-        out_degree[node_val] = len(node_obj.neighbors)
-        for neighbor in node_obj.neighbors:
-            in_degree[neighbor.value] += 1
+def non_branching_paths_from_arrays(values, offsets, targets, multiplicities, in_degrees):
+    """
+    MaximalNonBranchingPaths over integer node ids (the CSR arrays of a CSRGraph, distinct targets with their
+    multiplicities). The isolated cycles are taken in id order, each starting from its smallest id.
+    """
+    def is_1_in_1_out(node_id): # a single target entry standing for a single edge
+        return (in_degrees[node_id] == 1 and offsets[node_id + 1] - offsets[node_id] == 1
+                and multiplicities[offsets[node_id]] == 1)
+
+    paths = []
+    in_paths = bytearray(len(values)) # 1 once a node belongs to a path
+
+    # Find paths starting from non-1-in-1-out nodes
+    for v in range(len(values)):
+        if not is_1_in_1_out(v):
+            for position in range(offsets[v], offsets[v + 1]):
+                for _ in range(multiplicities[position]): # every outgoing edge, parallel ones included
+                    current = targets[position]
+                    path = [values[v], values[current]]
+                    in_paths[v] = in_paths[current] = 1
+                    while is_1_in_1_out(current):
+                        current = targets[offsets[current]]
+                        path.append(values[current])
+                        in_paths[current] = 1
+                    paths.append(path)
+
+    # Find isolated cycles from the remaining nodes, every one of them is 1-in-1-out
+    for start in range(len(values)):
+        if in_paths[start]:
+            continue
+        cycle_path = [values[start]]
+        in_paths[start] = 1
+        current = targets[offsets[start]]
+        while current != start:
+            cycle_path.append(values[current])
+            in_paths[current] = 1
+            current = targets[offsets[current]]
+        cycle_path.append(values[start])
+        paths.append(cycle_path)
+
+    return paths
 
+def MaximalNonBranchingPaths(graph, graph_type=None):
+    """
+    Maximal non-branching paths of graph, as lists of node values. With graph_type="implicit" or "boss", graph is a
+    collection of DNA k-mers instead: their de Bruijn graph is built as an ImplicitDeBruijnGraph or a BOSSGraph and
+    the paths are returned as (k-1)-mer strings, like the ones of a Graph built from the same k-mers once repeated
+    k-mers are dropped.
+    """
+    if graph_type is not None:
+        if graph_type not in KMER_GRAPH_TYPES:
+            raise ValueError(f"unknown graph_type {graph_type!r}, expected one of {sorted(KMER_GRAPH_TYPES)}")
+        kmer_graph = KMER_GRAPH_TYPES[graph_type].from_patterns(graph)
+        return [kmer_graph.path_labels(path) for path in MaximalNonBranchingPaths(kmer_graph)]
+    if isinstance(graph, CSRGraph): # no CSRNode per visited node, the walk reads the id arrays
+        return non_branching_paths_from_arrays(graph.labels, memoryview(graph.offsets), memoryview(graph.targets),
+                                               memoryview(graph.multiplicities), memoryview(graph.in_degrees))
+
+    # In-degrees and out-degrees are kept by the graph
     paths = []
     nodes_in_paths = set()
 
     # Find paths starting from non-1-in-1-out nodes
-    for v_value in graph.nodes:
-        is_1_in_1_out = in_degree[v_value] == 1 and out_degree[v_value] == 1
+    for v_value, v_node in graph.nodes.items():
+        is_1_in_1_out = v_node.in_degree() == 1 and v_node.out_degree() == 1
         if not is_1_in_1_out:
-            if out_degree[v_value] > 0:
-                for w_node in graph.nodes[v_value].neighbors:
+            if v_node.out_degree() > 0:
+                for w_node in v_node.neighbors:
                     path = [v_value, w_node.value]
                     nodes_in_paths.add(v_value)
                     nodes_in_paths.add(w_node.value)
 
-                    current_node = w_node.value
-                    while in_degree[current_node] == 1 and out_degree[current_node] == 1:
-                        next_node = graph.nodes[current_node].neighbors[0]
+                    current_node = w_node
+                    while current_node.in_degree() == 1 and current_node.out_degree() == 1:
+                        next_node = next(iter(current_node.edges))
                         path.append(next_node.value)
                         nodes_in_paths.add(next_node.value)
-                        current_node = next_node.value
+                        current_node = next_node
 
                     paths.append(path)
 
@@ -114,12 +189,12 @@ def MaximalNonBranchingPaths(graph):
         current_node = start_node
 
         # Traverse the cycle
-        next_node = graph.nodes[current_node].neighbors[0]
+        next_node = next(iter(graph.nodes[current_node].edges))
         while next_node.value != start_node:
             cycle_path.append(next_node.value)
             if next_node.value in remaining_nodes:
                 remaining_nodes.remove(next_node.value)
-            next_node = graph.nodes[next_node.value].neighbors[0]
+            next_node = next(iter(graph.nodes[next_node.value].edges))
 
         cycle_path.append(start_node)
         paths.append(cycle_path)
@@ -0,0 +1,51 @@
+import random
+import unittest
+
+from Code36 import CSRGraph, Graph, MaximalNonBranchingPaths
+
+EDGES = [("1", "2"), ("2", "3"), ("3", "4"), ("3", "5"), ("6", "7"), ("7", "6"), ("5", "8"), ("8", "9"), ("9", "10")]
+
+
+def build(graph_type):
+    graph = graph_type()
+    for source, target in EDGES:
+        graph.add_edge(source, target)
+    return graph
+
+
+def rotate(path): #Cycles compared from their smallest node
+    if path[0] != path[-1]:
+        return tuple(path)
+    start = path.index(min(path[:-1]))
+    return tuple(path[start:-1] + path[:start + 1])
+
+
+class MaximalNonBranchingPathsTest(unittest.TestCase):
+    expected = [("1", "2", "3"), ("3", "4"), ("3", "5", "8", "9", "10"), ("6", "7", "6")]
+
+    def test_graph(self):
+        self.assertEqual(sorted(map(rotate, MaximalNonBranchingPaths(build(Graph)))), self.expected)
+
+    def test_csr_graph_walks_the_id_arrays(self):
+        paths = MaximalNonBranchingPaths(build(CSRGraph))
+        self.assertEqual(sorted(map(tuple, paths)), self.expected)
+
+    def test_kmer_set_backends(self):
+        generator = random.Random(0)
+        genome = "".join(generator.choice("ACGT") for _ in range(2000))
+        circle = "".join(generator.choice("ACGT") for _ in range(40)) # its k-mers form an isolated cycle
+        kmers = [genome[i:i + 12] for i in range(len(genome) - 11)]
+        kmers += [(circle + circle)[i:i + 12] for i in range(len(circle))]
+        reference = Graph()
+        for kmer in dict.fromkeys(kmers):
+            reference.add_edge(kmer[:-1], kmer[1:])
+        for graph_type in ("implicit", "boss"):
+            paths = MaximalNonBranchingPaths(kmers + kmers[:50], graph_type=graph_type)
+            self.assertEqual(sorted(map(rotate, paths)), sorted(map(rotate, MaximalNonBranchingPaths(reference))))
+            self.assertIn(len(circle) + 1, map(len, paths))
+        with self.assertRaises(ValueError):
+            MaximalNonBranchingPaths(kmers, graph_type="suffix array")
+
+
+if __name__ == "__main__":
+    unittest.main()
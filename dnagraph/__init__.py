@@ -0,0 +1,5 @@
+"""
+Shared graph code for the genome assembly problems: path spelling, the CSR / implicit / BOSS de Bruijn graph
+backends, their binary format and the Eulerian path engine. The ProblemNN scripts put the repository root on
+sys.path and import from here, so there is a single definition of each class.
+"""
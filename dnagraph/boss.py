@@ -0,0 +1,375 @@
+"""
+Succinct (BOSS) de Bruijn graph backend: the edge symbols and node boundaries of a k-mer set in rank / select
+bit vectors, a few bits per edge, with forward / backward / outdegree / indegree answered from them.
+"""
+from collections.abc import Mapping
+from array import array
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError: # the bit vectors are built with numpy, BOSSGraph raises ImportError without it
+    np = None
+
+from dnagraph.kmers import BASES, decode_kmer, packed_kmer_blocks
+
+
+class RankSelectBits:
+    """Bit vector packed 8 bits per byte with rank1 / select1, a 32 bit rank sample every 512 bits."""
+    SAMPLE_BITS = 512
+
+    def __init__(self, bits):
+        bits = np.asarray(bits, dtype=bool)
+        self.size = len(bits)
+        self.bits = np.packbits(bits, bitorder="little").tobytes()
+        ones = np.concatenate(([0], np.cumsum(bits, dtype=np.int64)))
+        self.samples = array("I", ones[::self.SAMPLE_BITS].astype(np.uint32).tobytes())
+
+    def __getitem__(self, i):
+        return (self.bits[i >> 3] >> (i & 7)) & 1
+
+    def rank1(self, i): #Ones in [0, i)
+        count = self.samples[i >> 9] + int.from_bytes(self.bits[(i >> 9) << 6:i >> 3], "little").bit_count()
+        if i & 7:
+            count += (self.bits[i >> 3] & ((1 << (i & 7)) - 1)).bit_count()
+        return count
+
+    def select1(self, r): #Position of the one of rank r (r ones before it)
+        block = bisect_right(self.samples, r) - 1
+        count = self.samples[block]
+        byte = block << 6
+        while count + self.bits[byte].bit_count() <= r:
+            count += self.bits[byte].bit_count()
+            byte += 1
+        value = self.bits[byte]
+        for bit in range(8):
+            if (value >> bit) & 1:
+                if count == r:
+                    return (byte << 3) | bit
+                count += 1
+
+    def nbytes(self):
+        return len(self.bits) + self.samples.itemsize * len(self.samples)
+
+
+class ZeroPositions:
+    """Bit vector with few zeros, stored as the sorted positions of its zeros, with the rank1 / select1 of RankSelectBits."""
+    def __init__(self, bits):
+        bits = np.asarray(bits, dtype=bool)
+        self.size = len(bits)
+        self.zeros = array("q", np.flatnonzero(~bits).astype(np.int64).tobytes())
+
+    def __getitem__(self, i):
+        j = bisect_left(self.zeros, i)
+        return 0 if j < len(self.zeros) and self.zeros[j] == i else 1
+
+    def rank1(self, i): #Ones in [0, i)
+        return i - bisect_left(self.zeros, i)
+
+    def select1(self, r): #The one of rank r follows every zero with at most r ones before it
+        zeros = self.zeros
+        return r + bisect_right(range(len(zeros)), r, key=lambda j: zeros[j] - j)
+
+    def nbytes(self):
+        return self.zeros.itemsize * len(self.zeros)
+
+
+class BaseSymbols:
+    """
+    Edge symbols of a BOSS W: the base of every edge packed 2 bits per edge, four per byte, the rare $ (stored as an A)
+    and flagged (symbol + 8) edges kept aside as sorted positions. rank / select of the unflagged symbols 1-4 use a
+    32 bit count sample every 512 edges, those of the flagged symbols 9-12 are a bisect.
+    """
+    SAMPLE_SYMBOLS = 512
+
+    def __init__(self, symbols):
+        symbols = np.asarray(symbols, dtype=np.uint8)
+        self.size = len(symbols)
+        bases = np.maximum(symbols & 7, 1) - 1 # 0-3 for A-T, $ counts as A
+        padded = np.zeros(-(-len(symbols) // 4) * 4, dtype=np.uint8)
+        padded[:len(symbols)] = bases
+        self.bases = (padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)).tobytes()
+        self.positions = {0: array("q", np.flatnonzero(symbols == 0).tobytes())} # $ and flagged symbol -> positions
+        self.samples = {}
+        self.count_tables = {} # byte -> number of its four bases equal to the symbol, for bytes.translate
+        fields = np.arange(256)
+        for symbol in (1, 2, 3, 4):
+            self.positions[symbol + 8] = array("q", np.flatnonzero(symbols == symbol + 8).tobytes())
+            occurrences = np.concatenate(([0], np.cumsum(symbols == symbol, dtype=np.int64)))
+            self.samples[symbol] = array("I", occurrences[::self.SAMPLE_SYMBOLS].astype(np.uint32).tobytes())
+            self.count_tables[symbol] = sum(((fields >> shift) & 3) == symbol - 1
+                                            for shift in (0, 2, 4, 6)).astype(np.uint8).tobytes()
+
+    def stored_aside(self, symbol, i): #Whether position i is one of the kept aside positions of symbol
+        positions = self.positions[symbol]
+        j = bisect_left(positions, i)
+        return j < len(positions) and positions[j] == i
+
+    def __getitem__(self, i):
+        symbol = ((self.bases[i >> 2] >> ((i & 3) << 1)) & 3) + 1
+        if self.stored_aside(symbol + 8, i):
+            return symbol + 8
+        if symbol == 1 and self.stored_aside(0, i):
+            return 0
+        return symbol
+
+    def aside_count(self, symbol, start, end): #$ and flagged edges stored as the base of symbol in [start, end)
+        count = 0
+        for positions in (self.positions[symbol + 8], self.positions[0]) if symbol == 1 else (self.positions[symbol + 8],):
+            count += bisect_left(positions, end) - bisect_left(positions, start)
+        return count
+
+    def rank(self, symbol, i): #Occurrences of symbol in [0, i)
+        if symbol > 8:
+            return bisect_left(self.positions[symbol], i)
+        start = (i >> 9) << 9
+        count = self.samples[symbol][i >> 9] + sum(self.bases[start >> 2:i >> 2].translate(self.count_tables[symbol]))
+        byte = self.bases[i >> 2] if i & 3 else 0
+        for field in range(i & 3):
+            if (byte >> (field << 1)) & 3 == symbol - 1:
+                count += 1
+        return count - self.aside_count(symbol, start, i)
+
+    def select(self, symbol, r): #Position of the occurrence of rank r
+        if symbol > 8:
+            return self.positions[symbol][r]
+        samples = self.samples[symbol]
+        block = bisect_right(samples, r) - 1
+        count = samples[block]
+        i = block * self.SAMPLE_SYMBOLS
+        table = self.count_tables[symbol]
+        has_aside = self.aside_count(symbol, i, i + self.SAMPLE_SYMBOLS) > 0 # usually none in the block
+        while True: # whole bytes first, then the edges of the byte holding the occurrence
+            in_byte = table[self.bases[i >> 2]]
+            if in_byte and has_aside:
+                in_byte -= self.aside_count(symbol, i, i + 4)
+            if count + in_byte > r:
+                break
+            count += in_byte
+            i += 4
+        while True:
+            if self[i] == symbol:
+                if count == r:
+                    return i
+                count += 1
+            i += 1
+
+    def nbytes(self):
+        return (len(self.bases) + sum(samples.itemsize * len(samples) for samples in self.samples.values())
+                + sum(positions.itemsize * len(positions) for positions in self.positions.values()))
+
+
+class BOSSNode:
+    """Node of a BOSSGraph, with the value / edges / neighbors / out_degree surface of Node."""
+    __slots__ = ("graph", "value")
+
+    def __init__(self, graph, value):
+        self.graph = graph
+        self.value = value # colex rank of the (k-1)-mer
+
+    @property
+    def edges(self):
+        return {BOSSNode(self.graph, target): 1 for target in self.graph.successors(self.value)}
+
+    @property
+    def neighbors(self):
+        return [BOSSNode(self.graph, target) for target in self.graph.successors(self.value)]
+
+    def out_degree(self):
+        return self.graph.out_degree(self.value)
+
+    def in_degree(self):
+        return self.graph.in_degree(self.value)
+
+    def __eq__(self, other):
+        return isinstance(other, BOSSNode) and other.graph is self.graph and other.value == self.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return self.graph.label(self.value)
+
+
+class BOSSNodesView(Mapping):
+    """Node rank -> BOSSNode, every rank in range(node_count) is a node."""
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, value):
+        if not (isinstance(value, int) and 0 <= value < self.graph.node_count):
+            raise KeyError(value)
+        return BOSSNode(self.graph, value)
+
+    def __iter__(self):
+        return iter(range(self.graph.node_count))
+
+    def __len__(self):
+        return self.graph.node_count
+
+
+class BOSSGraph:
+    """
+    Succinct de Bruijn graph of a set of DNA k-mers (k <= 32), modeled on BOSS (Bowe, Onodera, Sadakane, Shibuya).
+    The (k-1)-mer nodes are sorted in colex order (by last symbol, then the one before, ...) and each contributes its
+    outgoing edge symbols to W, in order ($ for a node without outgoing edge). L marks the last edge of every node.
+    An edge is flagged (symbol + 8) when an earlier edge with the same symbol enters the same node, so the unflagged
+    c-edges meet the nodes ending in c in the same order, which makes forward / backward a rank / select pair. Nodes
+    that no edge enters (no $-padded dummy edges are stored) are listed in I, and their labels are kept aside. W takes
+    2 bits per edge and L 1, the rank samples about 0.3 more. $ edges, flagged edges and nodes without in-edge cost 64
+    bits each, which stays well under a bit per edge unless the k-mers repeat a lot (branching nodes get flagged
+    edges). A read-like set of 25-mers measures about 3.3 bits per edge, see bits_per_edge.
+    Node values are colex ranks, label() spells a node by walking backward.
+    """
+    rank_values = True # node values are not labels, save_graph writes the spelled labels
+    def __init__(self, kmer_codes, k):
+        if np is None:
+            raise ImportError("numpy is required for the succinct de Bruijn graph")
+        if not 2 <= k <= 32:
+            raise ValueError(f"the succinct de Bruijn graph supports 2 <= k <= 32, got k={k}")
+        self.k = k
+        self.label_length = k - 1
+        kmers = np.unique(np.asarray(kmer_codes, dtype=np.uint64))
+        node_mask = np.uint64((1 << (2 * (k - 1))) - 1)
+        sources = kmers >> np.uint64(2)
+        targets = kmers & node_mask
+        codes = np.unique(np.concatenate((sources, targets)))
+        # Colex rank of every node: sort on the reversed 2-bit digits
+        reversed_codes = np.zeros_like(codes)
+        remaining = codes.copy()
+        for _ in range(k - 1):
+            reversed_codes = (reversed_codes << np.uint64(2)) | (remaining & np.uint64(3))
+            remaining >>= np.uint64(2)
+        colex_order = np.argsort(reversed_codes, kind="stable")
+        rank_of_code = np.empty(len(codes), dtype=np.int64) # position in codes -> colex rank
+        rank_of_code[colex_order] = np.arange(len(codes))
+        source_nodes = rank_of_code[np.searchsorted(codes, sources)]
+        target_nodes = rank_of_code[np.searchsorted(codes, targets)]
+        self.node_count = len(codes)
+        # Edges grouped by source node in colex order, by symbol inside a node, a $ edge for nodes without successors
+        sinks = np.flatnonzero(np.bincount(source_nodes, minlength=self.node_count) == 0)
+        edge_nodes = np.concatenate((source_nodes, sinks))
+        edge_symbols = np.concatenate(((kmers & np.uint64(3)).astype(np.uint8) + 1, np.zeros(len(sinks), np.uint8)))
+        edge_targets = np.concatenate((target_nodes, np.full(len(sinks), -1, dtype=np.int64)))
+        order = np.lexsort((edge_symbols, edge_nodes))
+        edge_nodes, edge_symbols, edge_targets = edge_nodes[order], edge_symbols[order], edge_targets[order]
+        self.edge_count = len(edge_nodes)
+        flagged = edge_targets >= 0
+        real_edges = np.flatnonzero(flagged)
+        _, first_entries = np.unique(edge_targets[real_edges], return_index=True)
+        flagged[real_edges[first_entries]] = False # the first edge into every node is the unflagged one
+        self.W = BaseSymbols(edge_symbols + 8 * flagged)
+        self.L = RankSelectBits(np.append(edge_nodes[1:] != edge_nodes[:-1], True))
+        has_incoming = np.bincount(target_nodes, minlength=self.node_count) > 0
+        self.I = ZeroPositions(has_incoming)
+        node_codes = codes[colex_order]
+        self.F = array("q", np.concatenate(([0], np.cumsum(np.bincount((node_codes & np.uint64(3)).astype(np.int64),
+                                                                         minlength=4)))).tobytes())
+        self.F_incoming = array("q", [self.I.rank1(start) for start in self.F]) # nodes with an in-edge before each block
+        self.source_labels = {int(node): int(node_codes[node]) for node in np.flatnonzero(~has_incoming)}
+        self.nodes = BOSSNodesView(self)
+
+    @classmethod
+    def from_patterns(cls, ListPatterns, canonical=False):
+        codes = array("Q")
+        k = None
+        for block, k in packed_kmer_blocks(ListPatterns, canonical, vectorized=True):
+            codes.extend(block.tolist() if not isinstance(block, list) else block)
+        if k is None:
+            raise ValueError("a succinct de Bruijn graph needs at least one k-mer")
+        return cls(np.frombuffer(codes, dtype=np.uint64), k)
+
+    def edge_range(self, node): #First and last edge positions of a node in W
+        first = 0 if node == 0 else self.L.select1(node - 1) + 1
+        return first, self.L.select1(node)
+
+    def last_symbol(self, node): #1-4 for A-T, from the F block holding the node
+        return bisect_right(self.F, node)
+
+    def target(self, position): #Node entered by the edge at position
+        symbol = self.W[position] & 7
+        unflagged = self.W.rank(symbol, position + 1) - 1 # a flagged edge enters the node of the previous unflagged
+        return self.I.select1(self.F_incoming[symbol - 1] + unflagged)
+
+    def outdegree(self, node):
+        first, last = self.edge_range(node)
+        return 0 if self.W[first] == 0 else last - first + 1
+
+    def forward(self, node, symbol): #Successor reached by the base symbol (1-4), None if there is no such edge
+        first, last = self.edge_range(node)
+        for position in range(first, last + 1):
+            if self.W[position] & 7 == symbol:
+                return self.target(position)
+        return None
+
+    def successors(self, node):
+        first, last = self.edge_range(node)
+        if self.W[first] == 0:
+            return []
+        return [self.target(position) for position in range(first, last + 1)]
+
+    def incoming_edges(self, node): #Positions of the edges entering node, the unflagged one first
+        if not self.I[node]:
+            return []
+        symbol = self.last_symbol(node)
+        unflagged = self.I.rank1(node) - self.F_incoming[symbol - 1]
+        position = self.W.select(symbol, unflagged)
+        following = (self.W.select(symbol, unflagged + 1) if unflagged + 1 < self.W.rank(symbol, self.edge_count)
+                     else self.edge_count)
+        flagged_before = self.W.rank(symbol + 8, position)
+        flagged_count = self.W.rank(symbol + 8, following) - flagged_before
+        return [position] + [self.W.select(symbol + 8, flagged_before + i) for i in range(flagged_count)]
+
+    def indegree(self, node):
+        if not self.I[node]:
+            return 0
+        symbol = self.last_symbol(node)
+        unflagged = self.I.rank1(node) - self.F_incoming[symbol - 1]
+        position = self.W.select(symbol, unflagged)
+        following = (self.W.select(symbol, unflagged + 1) if unflagged + 1 < self.W.rank(symbol, self.edge_count)
+                     else self.edge_count)
+        return 1 + self.W.rank(symbol + 8, following) - self.W.rank(symbol + 8, position)
+
+    def backward(self, node): #Predecessors, the source node of an edge is the number of nodes ending before it
+        return [self.L.rank1(position) for position in self.incoming_edges(node)]
+
+    # Node queries under the names CSRGraph and ImplicitDeBruijnGraph answer to
+    out_degree = outdegree
+    in_degree = indegree
+    predecessors = backward
+
+    def label(self, node): #Spelled right to left by following the first in-edge back
+        symbols = []
+        while len(symbols) < self.label_length:
+            if not self.I[node]: # no in-edge: the label was kept at construction
+                source = decode_kmer(self.source_labels[node], self.label_length)
+                return source[len(symbols):] + "".join(reversed(symbols))
+            symbols.append(BASES[self.last_symbol(node) - 1])
+            node = self.L.rank1(self.incoming_edges(node)[0])
+        return "".join(reversed(symbols))
+
+    def path_labels(self, path): #Labels along a path of edges, each one is the previous shifted by the last symbol
+        labels = [self.label(path[0])] if path else []
+        for node in path[1:]:
+            labels.append(labels[-1][1:] + BASES[self.last_symbol(node) - 1])
+        return labels
+
+    def bits_per_edge(self):
+        return 8 * (self.W.nbytes() + self.L.nbytes() + self.I.nbytes()) / self.edge_count
+
+    def get_node(self, value):
+        return self.nodes.get(value)
+
+    def get_simplegraph(self):
+        simplegraph = {}
+        for node in range(self.node_count):
+            neighbor_values = sorted(self.label(target) for target in self.successors(node))
+            if neighbor_values:
+                simplegraph[self.label(node)] = neighbor_values
+        return dict(sorted(simplegraph.items()))
+
+    def __repr__(self):
+        graph_repr = ""
+        for node_value, neighbor_values in self.get_simplegraph().items():
+            graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
+        return graph_repr
@@ -0,0 +1,396 @@
+"""
+CSR (compressed sparse row) graph backend and the binary graph format written by save_graph and read back, memory
+mapped, by load_graph.
+"""
+from collections.abc import Mapping, Sequence
+import os
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the CSR graph backend and the binary graph format
+    np = None
+
+from dnagraph.kmers import decode_kmer
+
+
+class CSRNode:
+    """
+    Handle on one node of a CSRGraph, with the value / neighbors surface of Node. sort_graph renumbers the nodes, so
+    a handle taken before it raises RuntimeError instead of reading another node (get it again from graph.nodes).
+    Hot loops should not go through handles at all but through the id arrays (the CSR arrays of a CSRGraph).
+    """
+    __slots__ = ("graph", "id", "generation")
+
+    def __init__(self, graph, node_id):
+        self.graph = graph
+        self.id = node_id
+        self.generation = graph.generation # numbering the id belongs to
+
+    @property
+    def node_id(self):
+        if self.generation != self.graph.generation:
+            raise RuntimeError(f"stale CSRNode {self.id}: sort_graph renumbered the nodes since it was taken")
+        return self.id
+
+    @property
+    def value(self):
+        return self.graph.labels[self.node_id]
+
+    @property
+    def neighbors(self): #Re-expanded with the multiplicities from the CSR row, in insertion order like Node.neighbors
+        return [neighbor for neighbor, multiplicity in self.edges.items() for _ in range(multiplicity)]
+
+    def add_neighbor(self, neighbor_node, multiplicity=1):
+        self.graph.add_edge_ids(self.node_id, neighbor_node.node_id, multiplicity)
+
+    @property
+    def edges(self): #Distinct neighbors with their multiplicity, like Node.edges
+        node_id = self.node_id
+        targets, multiplicities = self.graph.successors(node_id), self.graph.multiplicities_of(node_id)
+        return {CSRNode(self.graph, target): multiplicity
+                for target, multiplicity in zip(targets.tolist(), multiplicities.tolist())}
+
+    def out_degree(self):
+        return self.graph.out_degree(self.node_id)
+
+    def in_degree(self):
+        return self.graph.in_degree(self.node_id)
+
+    def __eq__(self, other):
+        return isinstance(other, CSRNode) and other.graph is self.graph and other.node_id == self.node_id
+
+    def __hash__(self):
+        return hash(self.node_id)
+
+    def __repr__(self):
+        return f"{self.value}"
+
+
+class CSRNodesView(Mapping):
+    """Read-only label -> CSRNode mapping, iterated in insertion order like the Graph.nodes dictionary."""
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, value):
+        return CSRNode(self.graph, self.graph.ids[value])
+
+    def __contains__(self, value):
+        return value in self.graph.ids
+
+    def __iter__(self):
+        return iter(self.graph.labels)
+
+    def __len__(self):
+        return len(self.graph.labels)
+
+
+class CSRGraph:
+    """
+    Graph backend for large graphs, with the add_edge / get_node / get_simplegraph / __repr__ surface of Graph.
+    Node labels are interned to dense integer ids and the adjacency is kept in CSR form: the distinct successors of
+    node i are targets[offsets[i]:offsets[i + 1]], in first-insertion order, and multiplicities holds how many
+    parallel edges each of them stands for (NumPy int64 arrays), like the Node.edges dictionary. New edges go to typed
+    arrays and are merged into the CSR arrays on first read, so an edge costs 16 bytes however often it repeats
+    instead of a Python list slot and a Node object. graph.nodes is a view that hands out CSRNode objects, which lets
+    the algorithms written for Graph run on it unchanged.
+    """
+    def __init__(self):
+        if np is None:
+            raise ImportError("numpy is required for the CSR graph backend")
+        self.label_ids = {} # label -> node id, None until first used on a graph loaded by load_graph
+        self.labels = [] # node id -> label
+        self.pending_sources = array("q") # edges added since the last compaction
+        self.pending_targets = array("q")
+        self.pending_multiplicities = array("q")
+        self.csr_offsets = np.zeros(1, dtype=np.int64)
+        self.csr_targets = np.zeros(0, dtype=np.int64)
+        self.csr_multiplicities = np.zeros(0, dtype=np.int64) # parallel edges behind every target entry
+        self.csr_in_degrees = None # in-degree of every node, recounted on first use after the edges changed
+        self.csr_edge_offsets = None # running edge count (multiplicities included) at every row start, same
+        self.nodes = CSRNodesView(self)
+        self.generation = 0 # bumped whenever sort_graph renumbers the nodes, older CSRNode handles become stale
+        self.label_length = None # length of the packed (k-1)-mer codes when the labels are integers
+
+    def label(self, value): #Label as printed, packed codes are decoded only here
+        return value if self.label_length is None else decode_kmer(value, self.label_length)
+
+    @property
+    def ids(self):
+        if self.label_ids is None:
+            self.label_ids = {label: node_id for node_id, label in enumerate(self.labels)}
+        return self.label_ids
+
+    def intern(self, value):
+        node_id = self.ids.get(value)
+        if node_id is None:
+            if not isinstance(self.labels, list): # first node added to a loaded graph, its labels are read in
+                self.labels = list(self.labels)
+            node_id = self.ids[value] = len(self.labels)
+            self.labels.append(value)
+        return node_id
+
+    def add_node(self, value):
+        return CSRNode(self, self.intern(value))
+
+    def add_edge_ids(self, source, target, multiplicity=1):
+        self.pending_sources.append(source)
+        self.pending_targets.append(target)
+        self.pending_multiplicities.append(multiplicity)
+
+    def add_edge(self, value1, value2):
+        self.add_edge_ids(self.intern(value1), self.intern(value2))
+
+    def add_kmer_codes(self, codes, k):
+        """
+        Adds the edge prefix -> suffix of every packed k-mer code (k <= 32) with array operations: prefixes and
+        suffixes are a shift and a mask, and one np.unique over them interns each distinct (k-1)-mer once, in
+        first-seen order like add_edge, so only the nodes (not the edges) cost Python objects.
+        """
+        codes = np.asarray(codes, dtype=np.uint64)
+        ends = np.empty(2 * len(codes), dtype=np.uint64) # prefix, suffix of every k-mer, interleaved
+        ends[0::2] = codes >> np.uint64(2)
+        ends[1::2] = codes & np.uint64((1 << (2 * (k - 1))) - 1)
+        values, first_seen, inverse = np.unique(ends, return_index=True, return_inverse=True)
+        order = np.argsort(first_seen)
+        node_ids = np.empty(len(values), dtype=np.int64)
+        node_ids[order] = [self.intern(value) for value in values[order].tolist()]
+        end_ids = node_ids[inverse.ravel()]
+        self.pending_sources.frombytes(end_ids[0::2].tobytes())
+        self.pending_targets.frombytes(end_ids[1::2].tobytes())
+        self.pending_multiplicities.frombytes(np.ones(len(codes), dtype=np.int64).tobytes())
+
+    def compact(self):
+        """
+        Merges the pending edges into the CSR arrays: repeats of a (source, target) pair, pending or already stored,
+        add up into one entry whose multiplicity is their sum, and every row keeps its targets in first-insertion
+        order (the stored entries come first, then the new ones in the order they were added).
+        """
+        n = len(self.labels)
+        if not self.pending_sources and len(self.csr_offsets) == n + 1:
+            return
+        sources = np.concatenate((np.repeat(np.arange(len(self.csr_offsets) - 1), np.diff(self.csr_offsets)),
+                                  np.frombuffer(self.pending_sources, dtype=np.int64)))
+        targets = np.concatenate((self.csr_targets, np.frombuffer(self.pending_targets, dtype=np.int64)))
+        multiplicities = np.concatenate((self.csr_multiplicities,
+                                         np.frombuffer(self.pending_multiplicities, dtype=np.int64)))
+        _, first, inverse = np.unique(sources * max(n, 1) + targets, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=multiplicities, minlength=len(first)).astype(np.int64)
+        order = np.argsort(first) # distinct edges by first insertion, the stable sort then groups them by source
+        order = order[np.argsort(sources[first[order]], kind="stable")]
+        self.csr_targets = targets[first[order]]
+        self.csr_multiplicities = counts[order]
+        self.csr_in_degrees = self.csr_edge_offsets = None
+        self.csr_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources[first], minlength=n), out=self.csr_offsets[1:])
+        self.pending_sources = array("q")
+        self.pending_targets = array("q")
+        self.pending_multiplicities = array("q")
+
+    @property
+    def offsets(self):
+        self.compact()
+        return self.csr_offsets
+
+    @property
+    def targets(self):
+        self.compact()
+        return self.csr_targets
+
+    @property
+    def multiplicities(self):
+        self.compact()
+        return self.csr_multiplicities
+
+    def successors(self, node_id): #Distinct successors, see multiplicities_of for the parallel edges
+        offsets = self.offsets
+        return self.csr_targets[offsets[node_id]:offsets[node_id + 1]]
+
+    def multiplicities_of(self, node_id): #Multiplicity of every successor of node_id, aligned with successors
+        offsets = self.offsets
+        return self.csr_multiplicities[offsets[node_id]:offsets[node_id + 1]]
+
+    @property
+    def edge_offsets(self): #Number of edges, parallel ones included, before every row, recounted like in_degrees
+        offsets = self.offsets
+        if self.csr_edge_offsets is None:
+            running = np.zeros(len(self.csr_multiplicities) + 1, dtype=np.int64)
+            np.cumsum(self.csr_multiplicities, out=running[1:])
+            self.csr_edge_offsets = running[offsets]
+        return self.csr_edge_offsets
+
+    def out_degree(self, node_id):
+        edge_offsets = self.edge_offsets
+        return int(edge_offsets[node_id + 1] - edge_offsets[node_id])
+
+    @property
+    def in_degrees(self): #In-degree of every node id (parallel edges counted), recounted after the edges changed
+        targets = self.targets
+        if self.csr_in_degrees is None:
+            self.csr_in_degrees = np.bincount(targets, weights=self.csr_multiplicities,
+                                              minlength=len(self.labels)).astype(np.int64)
+        return self.csr_in_degrees
+
+    def in_degree(self, node_id):
+        return int(self.in_degrees[node_id])
+
+    def get_node(self, value):
+        node_id = self.ids.get(value)
+        return None if node_id is None else CSRNode(self, node_id)
+
+    def sort_graph(self): #Renumbers the nodes in label order, as Graph.sort_graph reorders its dictionary
+        self.compact()
+        order = np.array(sorted(range(len(self.labels)), key=self.labels.__getitem__), dtype=np.int64)
+        if np.array_equal(order, np.arange(len(order))): # already in label order, ids and handles stay valid
+            return self.nodes
+        self.generation += 1
+        new_ids = np.empty_like(order)
+        new_ids[order] = np.arange(len(order))
+        degrees = np.diff(self.csr_offsets)[order]
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+        # Position of every edge in the old targets array, row by row in the new order
+        positions = np.repeat(self.csr_offsets[:-1][order] - offsets[:-1], degrees) + np.arange(offsets[-1])
+        self.csr_targets = new_ids[self.csr_targets[positions]]
+        self.csr_multiplicities = self.csr_multiplicities[positions]
+        self.csr_in_degrees = self.csr_edge_offsets = None
+        self.csr_offsets = offsets
+        self.labels = [self.labels[node_id] for node_id in order.tolist()]
+        self.label_ids = {label: node_id for node_id, label in enumerate(self.labels)}
+        return self.nodes
+
+    def get_simplegraph(self):
+        self.sort_graph()
+        simplegraph = {}
+        for node_id, node_value in enumerate(self.labels):
+            neighbor_values = sorted([self.labels[target] for target, multiplicity
+                                      in zip(self.successors(node_id).tolist(), self.multiplicities_of(node_id).tolist())
+                                      for _ in range(multiplicity)])
+            if neighbor_values:
+                simplegraph[self.label(node_value)] = [self.label(value) for value in neighbor_values]
+        return simplegraph
+
+    def __repr__(self):
+        graph_repr = ""
+        for node_value, neighbor_values in self.get_simplegraph().items():
+            graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
+        return graph_repr
+
+
+GRAPH_MAGIC = b"DBGRAPH\0"
+GRAPH_VERSION = 1
+GRAPH_HEADER = struct.Struct("<8sIIQQQQ") # magic, version, flags, node count, edge count, label length, reserved
+GRAPH_PACKED_LABELS = 1 # flag: labels are uint64 2-bit codes instead of UTF-8 strings
+GRAPH_PARALLEL_EDGES = 2 # flag: some multiplicity is above 1
+
+
+class LabelTable(Sequence):
+    """Read-only node id -> label sequence over the label section of a graph file, a label is decoded when read."""
+    def __init__(self, codes=None, offsets=None, text=None):
+        self.codes = codes # uint64 packed labels, or
+        self.offsets = offsets # int64 offsets of the UTF-8 labels in text
+        self.text = text
+
+    def __getitem__(self, node_id):
+        if self.codes is not None:
+            return int(self.codes[node_id])
+        return bytes(self.text[self.offsets[node_id]:self.offsets[node_id + 1]]).decode()
+
+    def __iter__(self):
+        return (self[node_id] for node_id in range(len(self)))
+
+    def __len__(self):
+        return len(self.codes) if self.codes is not None else len(self.offsets) - 1
+
+
+def save_graph(graph, file_path):
+    """
+    Write graph (Graph, CSRGraph, or anything with the same nodes / edges surface) to file_path in the binary format
+    read by load_graph: a header, the CSR offsets, targets and multiplicities of the distinct edges (int64), then the
+    node labels, as uint64 codes when they are packed integers, else as UTF-8 strings behind an int64 offsets array.
+    Node ids follow the graph.nodes order and every node keeps the order of its edges.
+    """
+    if np is None:
+        raise ImportError("numpy is required for the binary graph format")
+    if isinstance(graph, CSRGraph):
+        labels = graph.labels
+        offsets, targets, multiplicities = graph.offsets, graph.targets, graph.multiplicities
+    else:
+        labels = list(graph.nodes)
+        ids = {value: node_id for node_id, value in enumerate(labels)}
+        offsets, targets, multiplicities = array("q", [0]), array("q"), array("q")
+        for node in graph.nodes.values():
+            for neighbor, multiplicity in node.edges.items():
+                targets.append(ids[neighbor.value])
+                multiplicities.append(multiplicity)
+            offsets.append(len(targets))
+        offsets, targets, multiplicities = (np.frombuffer(values, dtype=np.int64)
+                                            for values in (offsets, targets, multiplicities))
+        if getattr(graph, "rank_values", False): # node values are ranks (BOSSGraph), not labels: save the spelled ones
+            labels = [graph.label(value) for value in labels]
+    flags = GRAPH_PARALLEL_EDGES if len(multiplicities) and multiplicities.max() > 1 else 0
+    if len(labels) and all(isinstance(label, int) for label in labels):
+        flags |= GRAPH_PACKED_LABELS
+        label_sections = [np.array(labels, dtype=np.uint64).tobytes()]
+    elif all(isinstance(label, str) for label in labels):
+        encoded = [label.encode() for label in labels]
+        label_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(label) for label in encoded], out=label_offsets[1:])
+        label_sections = [label_offsets.tobytes(), b"".join(encoded)]
+    else:
+        raise TypeError("graph labels must be all strings or all packed integer codes")
+    label_length = getattr(graph, "label_length", None) or 0
+    if len(labels) and not flags & GRAPH_PACKED_LABELS: # labels saved as strings are not decoded again
+        label_length = 0
+    with open(file_path, "wb") as f:
+        f.write(GRAPH_HEADER.pack(GRAPH_MAGIC, GRAPH_VERSION, flags, len(labels), len(targets), label_length, 0))
+        for section in (offsets.tobytes(), targets.tobytes(), multiplicities.tobytes(), *label_sections):
+            f.write(section)
+
+
+def load_graph(file_path):
+    """
+    Open a file written by save_graph as a CSRGraph without reading it into Python objects: the CSR arrays (distinct
+    targets and their multiplicities, the layout CSRGraph uses) and the labels are read-only views on a numpy.memmap
+    of the file, labels are decoded when read and the label -> id dictionary is only built on the first lookup by
+    label. Adding edges or sorting the graph copies the arrays into memory, the file is never written.
+    """
+    if np is None:
+        raise ImportError("numpy is required for the binary graph format")
+    size = os.path.getsize(file_path)
+    if size < GRAPH_HEADER.size:
+        raise ValueError(f"{file_path} is truncated: {size} bytes, shorter than the graph file header")
+    data = np.memmap(file_path, dtype=np.uint8, mode="r")
+    magic, version, flags, node_count, edge_count, label_length, _ = GRAPH_HEADER.unpack_from(data)
+    if magic != GRAPH_MAGIC:
+        raise ValueError(f"{file_path} is not a graph file")
+    if version != GRAPH_VERSION:
+        raise ValueError(f"{file_path} has graph format version {version}, only version {GRAPH_VERSION} is supported")
+    position = GRAPH_HEADER.size
+    label_bytes = 8 * node_count if flags & GRAPH_PACKED_LABELS else 8 * (node_count + 1) # codes or label offsets
+    expected = position + 8 * (node_count + 1) + 16 * edge_count + label_bytes
+    if size < expected:
+        raise ValueError(f"{file_path} is truncated: {size} bytes, the header announces at least {expected}")
+    offsets = np.frombuffer(data, dtype=np.int64, count=node_count + 1, offset=position)
+    position += offsets.nbytes
+    targets = np.frombuffer(data, dtype=np.int64, count=edge_count, offset=position)
+    position += targets.nbytes
+    multiplicities = np.frombuffer(data, dtype=np.int64, count=edge_count, offset=position)
+    position += multiplicities.nbytes
+    graph = CSRGraph()
+    graph.label_length = label_length or None
+    if flags & GRAPH_PACKED_LABELS:
+        graph.labels = LabelTable(codes=np.frombuffer(data, dtype=np.uint64, count=node_count, offset=position))
+    else:
+        label_offsets = np.frombuffer(data, dtype=np.int64, count=node_count + 1, offset=position)
+        if size < expected + label_offsets[-1]:
+            raise ValueError(f"{file_path} is truncated: {size} bytes, the labels end at {expected + label_offsets[-1]}")
+        graph.labels = LabelTable(offsets=label_offsets, text=data[position + label_offsets.nbytes:])
+    graph.label_ids = None
+    graph.csr_offsets = offsets # same distinct targets + multiplicities layout as CSRGraph, nothing is copied
+    graph.csr_targets = targets
+    graph.csr_multiplicities = multiplicities
+    return graph
+
+
@@ -0,0 +1,305 @@
+"""
+Eulerian cycles and paths of directed graphs (Problems 31-35): the degree and strong connectivity checks, and
+Hierholzer's algorithm over integer id arrays, for any graph with the nodes / edges surface of Graph and, through
+NumPy arrays, for CSRGraph.
+"""
+import itertools
+from array import array
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the CSR walkers
+    np = None
+
+from dnagraph.csr import CSRGraph
+
+
+def edge_arrays(graph):
+    """
+    Integer id view of graph for the hot loops: (values, offsets, targets, multiplicities, in_degrees), node i being
+    values[i], its distinct successors targets[offsets[i]:offsets[i + 1]], multiplicities[j] the number of parallel
+    edges to targets[j] and in_degrees[i] counting the edges (parallel ones included) that enter node i. A CSRGraph
+    hands out its own arrays as memoryviews (indexing them gives plain ints and no CSRNode is built), any other graph
+    is flattened once from node.edges, in graph.nodes order.
+    """
+    if isinstance(graph, CSRGraph):
+        offsets, targets, multiplicities = graph.offsets, graph.targets, graph.multiplicities
+        return (graph.labels, memoryview(offsets), memoryview(targets), memoryview(multiplicities),
+                memoryview(graph.in_degrees))
+    nodes = list(graph.nodes.values())
+    index = {node: i for i, node in enumerate(nodes)}
+    offsets = array("q", [0])
+    targets = array("q")
+    multiplicities = array("q")
+    for node in nodes:
+        for neighbor, multiplicity in node.edges.items():
+            targets.append(index[neighbor])
+            multiplicities.append(multiplicity)
+        offsets.append(len(targets))
+    in_degrees = array("q", [node.in_degree() for node in nodes])
+    return list(graph.nodes), offsets, targets, multiplicities, in_degrees
+
+
+class EulerianError(ValueError):
+    """
+    Raised when a graph has no Eulerian cycle / path. components holds the strongly connected components (lists of
+    node values) the edges split into when that is the reason, it is empty when the degrees do not balance.
+    """
+    def __init__(self, message, components=()):
+        super().__init__(message)
+        self.components = list(components)
+
+
+def strongly_connected_components(offsets, targets, extra_edge=None):
+    """
+    Iterative Tarjan's algorithm over integer node ids, O(V + E) without recursion: the successors of node i are
+    targets[offsets[i]:offsets[i + 1]] (see edge_arrays), plus extra_edge = (source, target) when given. Returns the
+    components as lists of ids, a component before any component that reaches it.
+    """
+    n = len(offsets) - 1
+    extra_source, extra_target = extra_edge if extra_edge is not None else (-1, -1)
+    order = array("q", [-1]) * n # discovery index of every node, -1 until visited
+    low = array("q", [0]) * n
+    on_stack = bytearray(n)
+    stack = []
+    components = []
+    counter = 0
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        call_nodes = [root] # explicit call stack: node and the position of the next edge to follow
+        call_edges = [offsets[root]]
+        while call_nodes:
+            node = call_nodes[-1]
+            edge = call_edges[-1]
+            row_end = offsets[node + 1]
+            if edge < row_end or (edge == row_end and node == extra_source): # the extra edge comes after the row
+                call_edges[-1] = edge + 1
+                target = targets[edge] if edge < row_end else extra_target
+                if order[target] == -1:
+                    order[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    call_nodes.append(target)
+                    call_edges.append(offsets[target])
+                elif on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+            else:
+                call_nodes.pop()
+                call_edges.pop()
+                if call_nodes and low[node] < low[call_nodes[-1]]:
+                    low[call_nodes[-1]] = low[node]
+                if low[node] == order[node]: # node is the root of a component, pop it
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def eulerian_start(graph, arrays, path=False):
+    """
+    Start node id of an Eulerian cycle of graph, or of an Eulerian path when path is set (a cycle if the graph is
+    balanced), arrays being edge_arrays(graph). The degrees are checked first, then that the edges, closed by an
+    end -> start edge for a path, form one strongly connected component, each once in O(V + E). Raises
+    EulerianError otherwise, with the components (nodes without edges left out) when the edges are split.
+    """
+    values, offsets, targets, multiplicities, in_degrees = arrays
+    label = getattr(graph, "label", str) # nodes are named as printed, packed codes decoded
+    if not len(targets):
+        raise EulerianError("the graph has no edges")
+    start = end = None
+    running = list(itertools.accumulate(multiplicities, initial=0)) # edges before every entry, parallel ones counted
+    for node_id in range(len(values)):
+        balance = running[offsets[node_id + 1]] - running[offsets[node_id]] - in_degrees[node_id]
+        if balance == 0:
+            continue
+        if path and balance == 1 and start is None:
+            start = node_id
+        elif path and balance == -1 and end is None:
+            end = node_id
+        else:
+            raise EulerianError(f"node {label(values[node_id])} has out-degree - in-degree = {balance}")
+    extra_edge = None if start is None else (end, start)
+    if start is None: # balanced, the walk closes on the first node with edges
+        start = next(node_id for node_id in range(len(values)) if offsets[node_id + 1] > offsets[node_id])
+    components = [component for component in strongly_connected_components(offsets, targets, extra_edge)
+                  if len(component) > 1 or offsets[component[0] + 1] > offsets[component[0]]]
+    if len(components) > 1:
+        summary = "; ".join(f"{len(component)} nodes ({", ".join(str(label(values[i])) for i in component[:3])}"
+                            f"{", ..." if len(component) > 3 else ""})" for component in components)
+        raise EulerianError(f"the edges split into {len(components)} strongly connected components: {summary}",
+                            [[values[i] for i in component] for component in components])
+    return start
+
+
+def hierholzer_walk(offsets, targets, multiplicities, start):
+    """
+    Hierholzer's algorithm with an explicit stack over integer node ids, O(V + E): the distinct successors of node i
+    are targets[offsets[i]:offsets[i + 1]] (see edge_arrays), a cursor per node marks the entries left, taken from the
+    end of the row, and a count per entry the parallel edges left behind it. Edges are numbered row by row with the
+    copies of an entry next to each other (0 to the edge count - 1), so parallel edges keep distinct ids. Returns
+    (node_ids, edge_ids) of the walk from start, edge_ids[i] going from node_ids[i] to node_ids[i + 1].
+    """
+    cursors = list(offsets[1:]) # one past the entry to take edges from at every node
+    remaining = list(multiplicities) # copies of every entry not walked yet
+    first_ids = list(itertools.accumulate(remaining, initial=0)) # id of the first copy of every entry
+    stack = [start]
+    stack_edges = [-1] # edge that led to every stack entry, none for start
+    walk = []
+    walk_edges = []
+    while stack:
+        current = stack[-1]
+        entry = cursors[current]
+        if entry > offsets[current]:
+            entry -= 1
+            left = remaining[entry] - 1
+            remaining[entry] = left
+            if not left: # last copy of the entry, the cursor moves on
+                cursors[current] = entry
+            stack.append(targets[entry])
+            stack_edges.append(first_ids[entry] + left)
+        else:
+            # No edge left here: the node closes the walk built so far
+            walk.append(stack.pop())
+            walk_edges.append(stack_edges.pop())
+    walk.reverse()
+    walk_edges.reverse()
+    return walk, walk_edges[1:]
+
+
+def eulerian_cycle_direct(graph, with_edges=False):
+    """
+    Find an Eulerian cycle in the directed graph using Graph object, raises EulerianError when there is none. With
+    with_edges, returns (node values, edge ids) instead, numbered as in hierholzer_walk so that every parallel edge
+    appears exactly once.
+    """
+    arrays = edge_arrays(graph)
+    values, offsets, targets, multiplicities, _ = arrays
+    node_ids, edge_ids = hierholzer_walk(offsets, targets, multiplicities, eulerian_start(graph, arrays))
+    path = [values[node_id] for node_id in node_ids]
+    return (path, edge_ids) if with_edges else path
+
+
+def has_eulerian_cycle_direct(graph):
+    """Check if the Graph object has an Eulerian cycle: balanced degrees and one strongly connected component."""
+    try:
+        eulerian_start(graph, edge_arrays(graph))
+    except EulerianError:
+        return False
+    return True
+
+
+def eulerian_path_direct(graph, with_edges=False):
+    """
+    Find an Eulerian path in the directed Graph object, a cycle (first node repeated at the end) when every node is
+    balanced. Raises EulerianError when there is none. with_edges also returns the edge ids, see eulerian_cycle_direct.
+    """
+    arrays = edge_arrays(graph)
+    values, offsets, targets, multiplicities, _ = arrays
+    start = eulerian_start(graph, arrays, path=True)
+    node_ids, edge_ids = hierholzer_walk(offsets, targets, multiplicities, start)
+    path = [values[node_id] for node_id in node_ids]
+    return (path, edge_ids) if with_edges else path
+
+
+def csr_hierholzer_walk(offsets, targets, multiplicities, start, result=None):
+    """
+    Hierholzer's algorithm over CSR arrays (the distinct successors of node i are targets[offsets[i]:offsets[i + 1]],
+    node ids int32 or int64, multiplicities[j] the parallel edges to targets[j]), for graphs too large for the lists
+    of hierholzer_walk. The stack is a preallocated array of node ids, a cursor array indexed by node id keeps the
+    entries left at every node and a count array the copies left of every entry (taken from the end of the row, like
+    hierholzer_walk), and the walk is written backward into result, so memory stays a few arrays of the edge count.
+    Returns the node ids of the walk from start, a view on the end of result (all of it once every edge was reached).
+    """
+    remaining = np.array(multiplicities, dtype=np.int64) # copies of every entry not walked yet
+    edge_count = int(remaining.sum())
+    if result is None:
+        result = np.empty(edge_count + 1, dtype=targets.dtype)
+    stack = np.empty(edge_count + 1, dtype=targets.dtype)
+    cursors = np.array(offsets[1:], dtype=np.int64) # one past the entry to take edges from at every node
+    row_starts = np.ascontiguousarray(offsets[:-1], dtype=np.int64)
+    # Indexing memoryviews gives plain ints, much faster in this loop than NumPy scalars
+    stack_view, cursor_view, row_view = memoryview(stack), memoryview(cursors), memoryview(row_starts)
+    target_view, result_view = memoryview(np.ascontiguousarray(targets)), memoryview(result)
+    remaining_view = memoryview(remaining)
+
+    stack_view[0] = start
+    depth = 1
+    position = edge_count + 1 # result is filled from the end
+    while depth:
+        current = stack_view[depth - 1]
+        cursor = cursor_view[current]
+        if cursor > row_view[current]:
+            cursor -= 1
+            left = remaining_view[cursor] - 1
+            remaining_view[cursor] = left
+            if not left: # last copy of the entry, the cursor moves on
+                cursor_view[current] = cursor
+            stack_view[depth] = target_view[cursor]
+            depth += 1
+        else:
+            # No edge left here: the node closes the walk built so far
+            depth -= 1
+            position -= 1
+            result_view[position] = current
+    return result[position:]
+
+
+def csr_eulerian_start(offsets, targets, multiplicities, path=False):
+    """
+    Start node id of an Eulerian cycle over CSR arrays (see csr_hierholzer_walk), or of an Eulerian path when path is
+    set (a cycle if every node is balanced), None if there is none. The degrees are checked with NumPy, out-degree -
+    in-degree (parallel edges counted) being 0 at every node but one +1 (the start) and one -1 (the end) node for a
+    path, then the edges, closed by end -> start for a path, must form one strongly connected component, the same
+    check eulerian_start runs on a Graph.
+    """
+    if len(targets) == 0:
+        return None
+    multiplicities = np.asarray(multiplicities, dtype=np.int64)
+    running = np.zeros(len(multiplicities) + 1, dtype=np.int64)
+    np.cumsum(multiplicities, out=running[1:])
+    out_degrees = np.diff(running[np.asarray(offsets)])
+    in_degrees = np.bincount(targets, weights=multiplicities, minlength=len(out_degrees)).astype(np.int64)
+    balance = out_degrees - in_degrees
+    unbalanced = np.flatnonzero(balance)
+    extra_edge = None
+    if len(unbalanced) == 0:
+        start = int(np.flatnonzero(out_degrees)[0])
+    elif path and len(unbalanced) == 2 and sorted(balance[unbalanced].tolist()) == [-1, 1]:
+        start, end = (int(node_id) for node_id in unbalanced[np.argsort(-balance[unbalanced])])
+        extra_edge = (end, start)
+    else:
+        return None
+    # Indexing memoryviews gives plain ints, as in csr_hierholzer_walk
+    offset_view = memoryview(np.ascontiguousarray(offsets, dtype=np.int64))
+    components = strongly_connected_components(offset_view, memoryview(np.ascontiguousarray(targets)), extra_edge)
+    edge_components = [component for component in components
+                       if len(component) > 1 or offset_view[component[0] + 1] > offset_view[component[0]]]
+    return start if len(edge_components) == 1 else None
+
+
+def eulerian_cycle_csr(graph):
+    """Eulerian cycle of a CSRGraph as an array of node ids (graph.labels gives their values), None if there is none."""
+    offsets, targets, multiplicities = graph.offsets, graph.targets, graph.multiplicities
+    start = csr_eulerian_start(offsets, targets, multiplicities)
+    return None if start is None else csr_hierholzer_walk(offsets, targets, multiplicities, start)
+
+
+def eulerian_path_csr(graph):
+    """
+    Eulerian path of a CSRGraph as an array of node ids (graph.labels gives their values), a cycle when every node is
+    balanced, None if there is none.
+    """
+    offsets, targets, multiplicities = graph.offsets, graph.targets, graph.multiplicities
+    start = csr_eulerian_start(offsets, targets, multiplicities, path=True)
+    return None if start is None else csr_hierholzer_walk(offsets, targets, multiplicities, start)
@@ -0,0 +1,154 @@
+"""
+Implicit de Bruijn graph backend: a sorted array of packed k-mer codes and nothing else, the adjacency of every
+(k-1)-mer node is recomputed from it on each query.
+"""
+from collections.abc import Mapping
+from array import array
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError: # numpy only speeds up the sort of the k-mer codes
+    np = None
+
+from dnagraph.kmers import decode_kmer, packed_kmer_blocks
+
+
+class ImplicitNode:
+    """Node of an ImplicitDeBruijnGraph, its edges are found by probing the k-mer array on every access."""
+    __slots__ = ("graph", "value")
+
+    def __init__(self, graph, value):
+        self.graph = graph
+        self.value = value # packed (k-1)-mer code
+
+    @property
+    def edges(self): #Every k-mer is one edge, so each neighbor has multiplicity 1
+        return {ImplicitNode(self.graph, neighbor): 1 for neighbor in self.graph.successors(self.value)}
+
+    @property
+    def neighbors(self):
+        return [ImplicitNode(self.graph, neighbor) for neighbor in self.graph.successors(self.value)]
+
+    def out_degree(self):
+        return self.graph.out_degree(self.value)
+
+    def in_degree(self):
+        return self.graph.in_degree(self.value)
+
+    def __eq__(self, other):
+        return isinstance(other, ImplicitNode) and other.graph is self.graph and other.value == self.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return self.graph.label(self.value)
+
+
+class ImplicitNodesView(Mapping):
+    """(k-1)-mer code -> ImplicitNode for every node with an edge, nothing is stored besides the k-mers."""
+    def __init__(self, graph):
+        self.graph = graph
+        self.count = None
+
+    def __getitem__(self, value):
+        if value not in self:
+            raise KeyError(value)
+        return ImplicitNode(self.graph, value)
+
+    def __contains__(self, value):
+        return (isinstance(value, int) and 0 <= value <= self.graph.node_mask
+                and bool(self.graph.successors(value) or self.graph.predecessors(value)))
+
+    def __iter__(self):
+        # Nodes with an out-edge come in k-mer order, once per run of k-mers sharing the prefix. A node without
+        # out-edges is yielded from its smallest in-edge: no k-mer with a smaller first base ends in it.
+        graph = self.graph
+        previous = None
+        for kmer in graph.kmers:
+            prefix = kmer >> 2
+            if prefix != previous:
+                yield prefix
+                previous = prefix
+            suffix = kmer & graph.node_mask
+            if not graph.successors(suffix) and graph.predecessors(suffix)[0] == prefix:
+                yield suffix
+
+    def __len__(self):
+        if self.count is None: # the k-mer set is fixed, counted once
+            self.count = sum(1 for _ in self)
+        return self.count
+
+
+class ImplicitDeBruijnGraph:
+    """
+    de Bruijn graph of a set of DNA k-mers that stores no adjacency: only a sorted array of packed k-mer codes,
+    8 bytes per k-mer. The successors of a (k-1)-mer node v are the k-mers v + base present in the array, one bisect
+    and a scan of at most 4 entries, the predecessors are 4 membership probes for base + v. Node values are the
+    packed (k-1)-mer codes, label() decodes them. graph.nodes and the node objects have the surface of Graph, so the
+    Eulerian and contig algorithms run on it unchanged (each k-mer is one edge, duplicates are not kept).
+    """
+    def __init__(self, kmer_codes, k):
+        self.k = k
+        self.label_length = k - 1
+        self.node_mask = (1 << (2 * (k - 1))) - 1
+        if np is not None and k <= 32:
+            codes = np.unique(np.asarray(kmer_codes, dtype=np.uint64))
+            self.kmers = array("Q", codes.tobytes())
+        else:
+            self.kmers = array("Q", sorted(set(kmer_codes))) if k <= 32 else sorted(set(kmer_codes))
+        self.nodes = ImplicitNodesView(self)
+
+    @classmethod
+    def from_patterns(cls, ListPatterns, canonical=False):
+        codes = array("Q")
+        k = None
+        for block, k in packed_kmer_blocks(ListPatterns, canonical, vectorized=np is not None):
+            codes.extend(block.tolist() if not isinstance(block, list) else block)
+        if k is None:
+            raise ValueError("an implicit de Bruijn graph needs at least one k-mer")
+        return cls(codes, k)
+
+    def has_kmer(self, code):
+        position = bisect_left(self.kmers, code)
+        return position < len(self.kmers) and self.kmers[position] == code
+
+    def successors(self, value):
+        position = bisect_left(self.kmers, value << 2)
+        successors = []
+        while position < len(self.kmers) and self.kmers[position] >> 2 == value:
+            successors.append(self.kmers[position] & self.node_mask)
+            position += 1
+        return successors
+
+    def predecessors(self, value):
+        shift = 2 * (self.k - 1)
+        return [((base << shift) | value) >> 2 for base in range(4) if self.has_kmer((base << shift) | value)]
+
+    def out_degree(self, value):
+        return len(self.successors(value))
+
+    def in_degree(self, value):
+        return len(self.predecessors(value))
+
+    def label(self, value): #Packed codes are decoded only for output
+        return decode_kmer(value, self.label_length)
+
+    def path_labels(self, path): #Same surface as BOSSGraph.path_labels, decoding is cheap here
+        return [self.label(value) for value in path]
+
+    def get_node(self, value):
+        return self.nodes.get(value)
+
+    def get_simplegraph(self):
+        simplegraph = {}
+        for kmer in self.kmers: # k-mer order is node order, then successor order
+            simplegraph.setdefault(self.label(kmer >> 2), []).append(self.label(kmer & self.node_mask))
+        return simplegraph
+
+    def __repr__(self):
+        graph_repr = ""
+        for node_value, neighbor_values in self.get_simplegraph().items():
+            graph_repr += f"{node_value} -> {",".join(neighbor_values)}\n"
+        return graph_repr
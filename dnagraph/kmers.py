@@ -0,0 +1,105 @@
+"""
+2-bit packing of DNA k-mers (A=0, C=1, G=2, T=3, so integer order is lexicographic order) and the reverse
+complement / canonical helpers built on it.
+"""
+import itertools
+
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by the vectorized packed_kmer_blocks
+    np = None
+
+BASES = "ACGT" # 2-bit code of each base is its index, so A<C<G<T keeps lexicographic order
+MASK64 = (1 << 64) - 1
+
+def encode_kmer(kmer): #Packs a DNA string into an integer, 2 bits per base
+    code = 0
+    for base in kmer:
+        code = (code << 2) | BASES.index(base)
+    return code
+
+def decode_kmer(code, k): #Unpacks a 2-bit integer back to its k-mer string
+    kmer = []
+    for _ in range(k):
+        kmer.append(BASES[code & 3])
+        code >>= 2
+    return "".join(reversed(kmer))
+
+def reverse_complement_word(word): #Reverse complement of 32 packed bases (a full 64 bit word)
+    word = ~word & MASK64 # complement: A(00)<->T(11) and C(01)<->G(10) is a bitwise NOT
+    word = ((word >> 2) & 0x3333333333333333) | ((word & 0x3333333333333333) << 2) # swap bases in pairs
+    word = ((word >> 4) & 0x0F0F0F0F0F0F0F0F) | ((word & 0x0F0F0F0F0F0F0F0F) << 4) # swap pairs in nibbles
+    word = ((word >> 8) & 0x00FF00FF00FF00FF) | ((word & 0x00FF00FF00FF00FF) << 8) # swap bytes
+    word = ((word >> 16) & 0x0000FFFF0000FFFF) | ((word & 0x0000FFFF0000FFFF) << 16)
+    return (word >> 32) | ((word & 0xFFFFFFFF) << 32)
+
+def reverse_complement_packed(code, k): #Bit-twiddling reverse complement, k > 32 is handled in 64 bit words
+    words = (k + 31) // 32
+    reverse = 0
+    for _ in range(words): # the lowest word (last bases) becomes the highest one of the reverse complement
+        reverse = (reverse << 64) | reverse_complement_word(code & MASK64)
+        code >>= 64
+    return reverse >> (64 * words - 2 * k) # drop the complement of the zero padding
+
+def canonical_pattern(pattern):
+    """Smallest of a k-mer and its reverse complement, compared on their 2-bit packed codes."""
+    code = encode_kmer(pattern)
+    reverse = reverse_complement_packed(code, len(pattern))
+    return pattern if code <= reverse else decode_kmer(reverse, len(pattern))
+
+PACK_DIGITS = str.maketrans("ACGT", "0123") # base -> base 4 digit, int(digits, 4) then packs a k-mer at C speed
+PACK_BYTES = bytes.maketrans(b"ACGT", b"0123")
+
+def packed_pattern(pattern, canonical=False):
+    """
+    (2-bit code, k) of a k-mer given as str or bytes-like, the canonical code when canonical is set. Used for the
+    integer node ids: the (k-1)-mer prefix is code >> 2 and the suffix code & mask, no strings are sliced or hashed.
+    """
+    if isinstance(pattern, str):
+        digits = pattern.translate(PACK_DIGITS)
+    else: # bytes-like records (see read_sequences_mmap), line breaks removed
+        digits = bytes(pattern).translate(PACK_BYTES, b" \t\r\n")
+    if not digits or digits.lstrip("0123" if isinstance(digits, str) else b"0123"): # another symbol was left
+        raise ValueError(f"integer node ids need ACGT k-mers, got {pattern!r}")
+    code = int(digits, 4)
+    k = len(digits)
+    if canonical:
+        code = min(code, reverse_complement_packed(code, k))
+    return code, k
+
+PACK_BLOCK = 1 << 16 # k-mers packed together by packed_kmer_blocks
+PACK_LOOKUP = None if np is None else np.full(256, 4, dtype=np.uint64) # byte -> 2-bit code, 4 for other symbols
+if PACK_LOOKUP is not None:
+    PACK_LOOKUP[np.frombuffer(b"ACGT", dtype=np.uint8)] = np.arange(4, dtype=np.uint64)
+
+def packed_kmer_blocks(ListPatterns, canonical=False, vectorized=False):
+    """
+    Packs the k-mers block by block, yields (codes, k). When vectorized, a block of plain ACGT k-mers with k <= 32
+    is joined into one buffer and packed with a single matrix product over its base codes (the canonical codes come
+    from the reversed complemented bases, 3 - code), giving a uint64 NumPy array. Other blocks go through
+    packed_pattern one k-mer at a time and give a list of ints.
+    """
+    patterns = iter(ListPatterns)
+    k = None
+    while block := list(itertools.islice(patterns, PACK_BLOCK)):
+        if k is None:
+            k = packed_pattern(block[0])[1]
+        codes = None
+        if vectorized and k <= 32 and all(len(pattern) == k for pattern in block): # else the rows would misalign
+            buffer = b"".join(pattern.encode() if isinstance(pattern, str) else bytes(pattern) for pattern in block)
+            if len(buffer) == k * len(block):
+                bases = PACK_LOOKUP[np.frombuffer(buffer, dtype=np.uint8)].reshape(-1, k)
+                if bases.max() <= 3:
+                    weights = np.uint64(4) ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+                    codes = bases @ weights
+                    if canonical:
+                        codes = np.minimum(codes, (np.uint64(3) - bases[:, ::-1]) @ weights)
+        if codes is None:
+            codes = []
+            for pattern in block:
+                code, length = packed_pattern(pattern, canonical)
+                if length != k:
+                    raise ValueError(f"all k-mers must have the same length, got {length} and {k}")
+                codes.append(code)
+        yield codes, k
+
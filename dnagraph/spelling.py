@@ -0,0 +1,39 @@
+"""
+String builder used to spell genome paths (Problems 25, 26 and 31-35).
+"""
+
+
+class PathSpeller:
+    """
+    String builder for genome paths, grows from both ends in amortized O(1) per symbol: appended text goes to a
+    bytearray and prepended text to a second bytearray kept reversed, both are joined only once by getvalue().
+    """
+    def __init__(self, text=""):
+        self.front = bytearray() # prepended symbols, stored reversed
+        self.back = bytearray(text.encode())
+
+    def append(self, text):
+        self.back += text.encode()
+
+    def prepend(self, text):
+        self.front += text.encode()[::-1]
+
+    def __len__(self):
+        return len(self.front) + len(self.back)
+
+    def getvalue(self):
+        return (self.front[::-1] + self.back).decode()
+
+    @classmethod
+    def from_node_path(cls, path): #Nodes overlapping by all but one symbol: first node, then last symbol of each
+        speller = cls(path[0] if path else "")
+        for node in path[1:]:
+            speller.back.append(ord(node[-1]))
+        return speller
+
+    @classmethod
+    def from_edge_path(cls, edges): #Edges as (u, v) pairs: u of the first edge, then last symbol of each v
+        speller = cls(edges[0][0] if edges else "")
+        for _, node in edges:
+            speller.back.append(ord(node[-1]))
+        return speller